@@ -1,95 +1,111 @@
 # main.py
 
-
-from fastapi import FastAPI, Request
-from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
-from fastapi.middleware.cors import CORSMiddleware
-from core import models
-from core import database
-
-# --- NEW: Import our routers ---
-from Calendar_app.routers import users, events, tasks
-from Finance_app.routers import finance
-from Notebook_app.routers import notebooks
-
-# --- Database & App Setup ---
-# This line creates our tables (app.db) if they don't exist
-models.Base.metadata.create_all(bind=database.engine)
-
-app = FastAPI()
-
-# --- CORS Middleware (Unchanged) ---
-# This allows our frontend to talk to our backend
-origins = [
-    "http://localhost",
-    "http://localhost:8000",
-    "http://127.0.0.1:8000",
-    "null"
-]
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-
-# This is where we "plug in" our "mini-brains"
-app.include_router(users.router)
-app.include_router(events.router)
-app.include_router(tasks.router)
-app.include_router(finance.router)
-app.include_router(notebooks.router)
-
-
-# --- Static & Template Setup ---
-
-# 1. Mount the single global static folder
-# Note: directory="../static" means "go up one level to find the static folder"
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
-# 2. Templates (Unchanged)
-templates = Jinja2Templates(directory="Calendar_app/templates")
-templates_finance = Jinja2Templates(directory="Finance_app/templates")
-templates_notebook = Jinja2Templates(directory="Notebook_app/templates")
-
-# --- Page Serving Endpoints (Unchanged) ---
-# These are the only endpoints left in main.py
-
-@app.get("/signup")
-def serve_signup_page(request: Request):
-    return templates.TemplateResponse("signup.html", {"request": request})
-
-@app.get("/login")
-def serve_login_page(request: Request):
-    return templates.TemplateResponse("login.html", {"request": request})
-
-@app.get("/")
-def serve_home(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
-
-@app.get("/finance")
-def serve_finance_page(request: Request):
-    # We use the NEW "templates_finance" variable here
-    return templates_finance.TemplateResponse("finance.html", {"request": request})
-
-@app.get("/finance/summary")
-def serve_summary_page(request: Request):
-    return templates_finance.TemplateResponse("summary.html", {"request": request})
-
-
-@app.get("/notebooks")
-def serve_notebooks_page(request: Request):
-    # This uses the 'templates_notebook' variable we defined earlier
-    return templates_notebook.TemplateResponse("notebooks.html", {"request": request})
-
-
-@app.get("/notebooks/{notebook_id}")
-def serve_notebook_canvas(notebook_id: int, request: Request):
-    # We pass the 'notebook_id' to the HTML so JavaScript can use it
-    return templates_notebook.TemplateResponse("canvas.html", {
-        "request": request, 
-        "notebook_id": notebook_id
-    })
\ No newline at end of file
+"""
+The web app. create_app() builds it; importing this module does nothing
+else, so a worker (or a test) only pays for the routers, the database and
+the assets when it actually creates an app.
+
+    uvicorn Calendar_app.main:create_app --factory
+    uvicorn Calendar_app.main:app        # also works: made on first access
+
+The schema is brought up to date by `python -m core.manage migrate`.
+With AUTO_MIGRATE (the default outside production) create_app runs it too.
+
+benchmarks/startup_time.py tracks import time and time to first request.
+"""
+
+from typing import Optional
+
+from core.config import Settings, configure
+
+
+def create_app(app_settings: Optional[Settings] = None):
+    """Builds the app with `app_settings` (default: the environment plus .env)."""
+    settings = configure(app_settings)
+
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+    from core import assets
+    from core import auth, broker, principals, response_cache
+    from core import database
+    from core import migrations
+    from core.compression import CompressionMiddleware, levels_from
+    from core.services import freebusy
+
+    # --- Engines, caches and the password pool ---
+    # Built from these settings, not from whatever the first import saw. A
+    # process has one set of them, so the last app created wins (as with
+    # configure() itself).
+    if database.configure(settings):
+        # Another database: nothing cached from the old one still holds
+        principals.cache.clear()
+        response_cache.cache.clear()
+        freebusy.clear()
+    response_cache.configure(settings)
+    principals.configure(settings)
+    broker.configure(settings)
+    auth.configure(settings)
+
+    # --- Database ---
+    # This brings app.db up to the current schema (tables + indexes).
+    # Same thing as running `python -m core.manage migrate` by hand.
+    if settings.AUTO_MIGRATE:
+        migrations.upgrade(database.engine)
+
+    app = FastAPI()
+
+    # --- CORS Middleware ---
+    # This allows our frontend to talk to our backend
+    origins = [
+        "http://localhost",
+        "http://localhost:8000",
+        "http://127.0.0.1:8000",
+        "null"
+    ]
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # --- Response compression ---
+    # gzip (or brotli/zstd when installed) for JSON, pages and exports above
+    # COMPRESSION_MIN_SIZE; see core/compression.py for what is left alone.
+    app.add_middleware(
+        CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE, levels=levels_from(settings)
+    )
+
+    # This is where we "plug in" our "mini-brains"
+    from Calendar_app.routers import users, events, tasks, system, search, changes, pages
+    from Finance_app.routers import finance
+    from Notebook_app.routers import notebooks
+
+    app.include_router(users.router)
+    app.include_router(events.router)
+    app.include_router(tasks.router)
+    app.include_router(finance.router)
+    app.include_router(notebooks.router)
+    app.include_router(system.router)
+    app.include_router(search.router)
+    app.include_router(changes.router)
+    # The HTML pages, rendered on their first request (routers/pages.py)
+    app.include_router(pages.router)
+
+    # --- Static files ---
+    # The hashed + gzipped copies under static/dist are written here (see
+    # core/assets.py); the pages link them with asset_url('js/script.js').
+    assets.build_or_warn()
+    app.mount("/static", assets.AssetFiles(directory="static"), name="static")
+
+    return app
+
+
+def __getattr__(name):
+    # `from Calendar_app.main import app` / `uvicorn Calendar_app.main:app`:
+    # the app from the environment, created on first use
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,61 @@
+# routers/changes.py
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from core import models, schemas
+from core.broker import StreamsFull, broker
+from core.compression import no_compression
+from core.config import settings
+from core.dependencies import get_async_read_db, get_current_user, run_service
+from core.fast_json import FastJSONResponse
+from core.services import sync as sync_service
+
+router = APIRouter(
+    prefix="/api",
+    tags=["Changes"]
+)
+
+# --- 1. LIVE UPDATES (Server-Sent Events) ---
+# One long-lived response per open page. Every write the user may see
+# arrives as
+#     event: change
+#     data: {"entity": "note", "id": 12, "op": "update", "payload": {...}}
+# and the page patches itself with it. "event: resync" means the stream was
+# dropped for falling behind: re-read the view (EventSource reconnects).
+# A change's `id:` line is its change-log seq, a cursor for /api/sync below.
+# Not compressed: each frame has to reach the browser on its own.
+@router.get("/stream", dependencies=[Depends(no_compression)])
+async def stream_changes(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    # The login check may have used a pooled connection: give it back now,
+    # not when the stream ends hours later
+    await db.close()
+    try:
+        subscriber = broker.subscribe(current_user)
+    except StreamsFull:
+        raise HTTPException(status_code=503, detail="Too many open streams", headers={"Retry-After": "30"})
+
+    # A client that goes away is noticed at the next write to it (at the
+    # latest the heartbeat), which ends the generator and unsubscribes it
+    return StreamingResponse(
+        broker.frames(subscriber, settings.STREAM_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# --- 2. CHANGES SINCE A CURSOR ---
+# e.g. /api/sync?since=0 (everything), then ?since=<cursor> of the last page
+# until has_more is false; keep the last cursor for the next sync.
+@router.get("/sync", response_model=schemas.SyncPage, response_class=FastJSONResponse)
+async def sync_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(sync_service.SYNC_PAGE_DEFAULT, ge=1, le=sync_service.SYNC_PAGE_MAX),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    page = await run_service(db, sync_service.get_changes_since, since, current_user, limit=limit)
+    # Trusted output: the rows are the read endpoints' own column dicts
+    return FastJSONResponse(page)
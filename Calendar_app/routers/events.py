@@ -1,11 +1,18 @@
 # routers/events.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
 from core import models, schemas as schemas, auth
-from core.dependencies import get_db, get_current_user 
+from core.dependencies import (
+    ResponseSlot, cached_response, get_async_db, get_async_read_db, get_current_user,
+    resource_etag, run_service,
+)
+from core.fast_json import FastJSONResponse
+from core.services import versions
 from core.services import events as event_service
+from core.services import freebusy as freebusy_service
 from core.services import tasks as task_service
 
 router = APIRouter(
@@ -13,42 +20,115 @@ router = APIRouter(
 )
 
 # --- CREATE EVENT ---
-@router.post("/calendar/general/events", response_model=schemas.Event)
-def create_event(
+@router.post("/calendar/general/events", response_model=schemas.EventCreated)
+async def create_event(
     event: schemas.EventCreate, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     current_user: models.User = Depends(get_current_user)
 ):
     # Delegate to service
-    return event_service.create_new_event(event, current_user, db)
+    return await run_service(db, event_service.create_new_event, event, current_user)
 
 # --- DELETE EVENT ---
 @router.delete("/events/{event_id}")
-def delete_event(
+async def delete_event(
     event_id: int, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     current_user: models.User = Depends(get_current_user)
 ):
     # Delegate to service
-    return event_service.delete_event_by_id(event_id, current_user, db)
+    return await run_service(db, event_service.delete_event_by_id, event_id, current_user)
 
-# --- CALENDAR FEED ---
-@router.get("/calendar/feed", response_model=schemas.CalendarFeed)
-def get_calendar_feed(
-    db: Session = Depends(get_db), 
+# --- RECURRING EVENT EXCEPTIONS ---
+# Cancel or change one occurrence of a series (picked by its recurrence_id)
+@router.post("/events/{event_id}/exceptions", response_model=schemas.EventException)
+async def save_event_exception(
+    event_id: int,
+    exception: schemas.EventExceptionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    return await run_service(db, event_service.save_event_exception, event_id, exception, current_user)
+
+@router.delete("/events/{event_id}/exceptions/{exception_id}")
+async def delete_event_exception(
+    event_id: int,
+    exception_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    return await run_service(db, event_service.delete_event_exception, event_id, exception_id, current_user)
+
+# --- FREE/BUSY ---
+@router.get("/calendar/freebusy", response_model=List[schemas.FreeBusy])
+async def get_free_busy(
+    start: datetime,
+    end: datetime,
+    user_id: Optional[List[int]] = Query(None),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: models.User = Depends(get_current_user)
+):
+    """Who in the company is free in [start, end). `user_id` (repeatable)
+    narrows it down to some people."""
+    return await run_service(
+        db, freebusy_service.get_free_busy, current_user,
+        start=start.replace(tzinfo=None), end=end.replace(tzinfo=None), user_ids=user_id,
+    )
+
+# --- CALENDAR FEED ---
+FEED_VIEWS = {"general", "personal", "tasks"}
+
+@router.get("/calendar/feed", response_model=schemas.CalendarFeed, response_class=FastJSONResponse,
+             dependencies=[Depends(resource_etag(versions.CALENDAR))])
+async def get_calendar_feed(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    view: Optional[List[str]] = Query(None),
+    db: AsyncSession = Depends(get_async_read_db), 
+    current_user: models.User = Depends(get_current_user),
+    cache: ResponseSlot = Depends(cached_response(versions.CALENDAR))
 ):
     """
     This endpoint is now purely a Coordinator.
     It asks the Event Service for events.
     It asks the Task Service for tasks.
     It bundles them together.
+
+    `start`/`end` are the window FullCalendar is showing (fetchInfo), and
+    `view` (repeatable: general, personal, tasks) limits what is fetched.
+    Leaving them out returns everything, like before.
     """
+    views = set(view) if view else FEED_VIEWS
+    if not views <= FEED_VIEWS:
+        raise HTTPException(status_code=400, detail="Invalid view")
+
+    # FullCalendar sends local times with an offset; our columns store naive
+    # local wall-clock times, so we compare on the wall-clock part only.
+    if start is not None:
+        start = start.replace(tzinfo=None)
+    if end is not None:
+        end = end.replace(tzinfo=None)
+
+    # 0. Same company data, same window? Then the JSON is already made.
+    cached = cache.hit()
+    if cached is not None:
+        return cached
     
     # 1. Get Events via Service 
-    all_events = event_service.get_user_events(current_user, db)
+    all_events = await run_service(
+        db, event_service.get_user_events, current_user,
+        start=start, end=end,
+        include_general="general" in views,
+        include_personal="personal" in views,
+        as_rows=True,
+    )
     
     # 2. Get Tasks via Service (CLEAN NOW!)
-    all_tasks = task_service.get_user_tasks(current_user, db)
+    all_tasks = []
+    if "tasks" in views:
+        all_tasks = await run_service(
+            db, task_service.get_user_tasks, current_user, start=start, end=end, as_rows=True
+        )
         
-    return {"events": all_events, "tasks": all_tasks}
\ No newline at end of file
+    # Rows straight from the services' column queries: no re-validation
+    return cache.store_trusted({"events": all_events, "tasks": all_tasks})
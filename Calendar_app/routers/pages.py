@@ -0,0 +1,50 @@
+# routers/pages.py
+
+from fastapi import APIRouter, Request
+from core.pages import PageShells
+
+router = APIRouter(tags=["Pages"])
+
+# Every page is rendered once, on its first request, and answered from
+# memory after that (with a 304 when the browser's copy is current).
+# See core/pages.py.
+pages = PageShells({
+    "signup.html": "Calendar_app/templates",
+    "login.html": "Calendar_app/templates",
+    "index.html": "Calendar_app/templates",
+    "finance.html": "Finance_app/templates",
+    "summary.html": "Finance_app/templates",
+    "notebooks.html": "Notebook_app/templates",
+    "canvas.html": "Notebook_app/templates",
+})
+
+@router.get("/signup")
+async def serve_signup_page(request: Request):
+    return pages.response("signup.html", request)
+
+@router.get("/login")
+async def serve_login_page(request: Request):
+    return pages.response("login.html", request)
+
+@router.get("/")
+async def serve_home(request: Request):
+    return pages.response("index.html", request)
+
+@router.get("/finance")
+async def serve_finance_page(request: Request):
+    return pages.response("finance.html", request)
+
+@router.get("/finance/summary")
+async def serve_summary_page(request: Request):
+    return pages.response("summary.html", request)
+
+
+@router.get("/notebooks")
+async def serve_notebooks_page(request: Request):
+    return pages.response("notebooks.html", request)
+
+
+@router.get("/notebooks/{notebook_id}")
+async def serve_notebook_canvas(notebook_id: int, request: Request):
+    # One page for every notebook: canvas.js reads the id from the URL
+    return pages.response("canvas.html", request)
@@ -0,0 +1,25 @@
+# routers/search.py
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from core import models, schemas
+from core.dependencies import get_async_read_db, get_current_user, run_service
+from core.services import search as search_service
+
+router = APIRouter(
+    prefix="/api/search",
+    tags=["Search"]
+)
+
+# --- 1. SEARCH EVERYTHING THE USER CAN SEE ---
+# e.g. /api/search?q=invoice%20march&kind=note&kind=transaction
+@router.get("", response_model=List[schemas.SearchResult])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Optional[List[str]] = Query(None),
+    limit: int = Query(search_service.SEARCH_LIMIT_DEFAULT, ge=1, le=search_service.SEARCH_LIMIT_MAX),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    return await run_service(db, search_service.search, q, current_user, kinds=kind, limit=limit)
@@ -0,0 +1,29 @@
+# routers/system.py
+
+from fastapi import APIRouter, Depends, HTTPException
+from core import models, response_cache
+from core.broker import broker
+from core.dependencies import get_current_user
+
+router = APIRouter(
+    prefix="/api/system",
+    tags=["System"]
+)
+
+# --- 1. RESPONSE CACHE STATS ---
+# Counters are per worker process (hits, misses, evictions, invalidations);
+# entries/bytes come from the backend, so with "sqlite" they cover all workers.
+@router.get("/cache")
+async def get_cache_stats(current_user: models.User = Depends(get_current_user)):
+    if current_user.role != "owner":
+        raise HTTPException(status_code=403, detail="Only owners can view cache stats")
+    return response_cache.cache.stats()
+
+# --- 2. LIVE UPDATE STATS ---
+# Open /api/stream connections of this worker, changes delivered, slow
+# subscribers evicted
+@router.get("/streams")
+async def get_stream_stats(current_user: models.User = Depends(get_current_user)):
+    if current_user.role != "owner":
+        raise HTTPException(status_code=403, detail="Only owners can view stream stats")
+    return broker.stats()
@@ -1,30 +1,30 @@
 # routers/users.py
 
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from core import models, schemas as schemas, auth
-from core.dependencies import get_db, get_current_user 
+from core import models, schemas as schemas, auth, principals
+from core.dependencies import get_async_db, get_async_read_db, get_current_user, run_service
 from core.services import users as user_service
 
 router = APIRouter(tags=["Users & Auth"])
 
 # --- 1. SIGNUP (Unchanged) ---
 @router.post("/signup", response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    return user_service.create_new_user(user, db)
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    return await user_service.create_new_user(user, db)
 
 
 # --- 2. LOGIN (UPDATED) ---
 @router.post("/login")
-def login_for_access_token(
+async def login_for_access_token(
     response: Response,  # We need this to set the cookie
     form_data: OAuth2PasswordRequestForm = Depends(), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # 1. Authenticate via Service
-    user = user_service.authenticate_user(form_data.username, form_data.password, db)
+    user = await user_service.authenticate_user(form_data.username, form_data.password, db)
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
         
@@ -49,26 +49,30 @@ def login_for_access_token(
 
 # --- 3. LOGOUT (NEW) ---
 @router.post("/logout")
-def logout(response: Response):
+async def logout(request: Request, response: Response):
     # To logout, we simply delete the cookie
+    # (and stop trusting the token in this worker's principal cache)
+    token = request.cookies.get("access_token")
+    if token:
+        principals.forget_token(token)
     response.delete_cookie("access_token")
     return {"message": "Logged out"}
 
 
 # --- 4. GET EMPLOYEE LIST (Unchanged) ---
 @router.get("/api/my-employees", response_model=List[schemas.Employee])
-def get_employees(
-    db: Session = Depends(get_db), 
+async def get_employees(
+    db: AsyncSession = Depends(get_async_read_db), 
     current_user: models.User = Depends(get_current_user)
 ):
-    return user_service.get_company_employees(current_user, db)
+    return await run_service(db, user_service.get_company_employees, current_user)
 
 
 
 # Add this at the bottom of routers/users.py
 
 @router.get("/api/me")
-def read_users_me(current_user: models.User = Depends(get_current_user)):
+async def read_users_me(current_user: models.User = Depends(get_current_user)):
     return {
         "id": current_user.id,
         "email": current_user.email,
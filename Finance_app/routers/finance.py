@@ -1,11 +1,18 @@
 # Finance_app/routers/finance.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
-from core import models, schemas
-from core.dependencies import get_db, get_current_user
+from fastapi import APIRouter, Body, Depends, File, Form, HTTPException, Query, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+from core import models, schemas, database
+from core.dependencies import (
+    ResponseSlot, cached_response, get_async_db, get_async_read_db, get_current_user,
+    resource_etag, run_service,
+)
+from core import fast_json
+from core.fast_json import FastJSONResponse
+from core.services import versions
 from core.services import finance as finance_service
 
 router = APIRouter(
@@ -15,35 +22,145 @@ router = APIRouter(
 
 # --- 1. CREATE TRANSACTION ---
 @router.post("/transactions", response_model=schemas.Transaction)
-def create_transaction(
+async def create_transaction(
     transaction: schemas.TransactionCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    return finance_service.create_transaction(transaction, current_user, db)
+    return await run_service(db, finance_service.create_transaction, transaction, current_user)
 
-# --- 2. GET DASHBOARD ---
-@router.get("/dashboard", response_model=schemas.DashboardData)
-def get_dashboard_data(
-    db: Session = Depends(get_db),
+# --- 1b. BULK CREATE (JSON array or CSV upload) ---
+@router.post("/transactions/bulk", response_model=schemas.TransactionBulkResult)
+async def bulk_create_transactions(
+    rows: List[Dict[str, Any]] = Body(...),
+    atomic: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    # The rows are taken as plain dicts and validated by the service, so one
+    # bad row is reported by its number instead of failing the whole request
+    return await run_service(
+        db, finance_service.bulk_create_transactions, rows, current_user, atomic=atomic
+    )
+
+@router.post("/transactions/bulk/csv", response_model=schemas.TransactionBulkResult)
+async def bulk_create_transactions_csv(
+    file: UploadFile = File(...),
+    atomic: bool = False,
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    return finance_service.get_dashboard_stats(current_user, db)
+    try:
+        text = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8")
+    rows = list(finance_service.parse_transactions_csv(text))
+    return await run_service(
+        db, finance_service.bulk_create_transactions, rows, current_user, atomic=atomic
+    )
+
+# --- 2. GET DASHBOARD ---
+@router.get("/dashboard", response_model=schemas.DashboardData,
+             dependencies=[Depends(resource_etag(versions.FINANCE))])
+async def get_dashboard_data(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: models.User = Depends(get_current_user),
+    cache: ResponseSlot = Depends(cached_response(versions.FINANCE, per_user=False))
+):
+    cached = cache.hit()
+    if cached is not None:
+        return cached
+    stats = await run_service(db, finance_service.get_dashboard_stats, current_user)
+    return cache.store(schemas.DashboardData, stats)
 
 # --- 3. GET TRANSACTION LIST ---
-@router.get("/transactions", response_model=List[schemas.Transaction])
-def get_transactions(
-    db: Session = Depends(get_db),
+@router.get("/transactions", response_model=schemas.TransactionPage, response_class=FastJSONResponse,
+             dependencies=[Depends(resource_etag(versions.FINANCE))])
+async def get_transactions(
+    response: Response,
+    limit: int = Query(finance_service.PAGE_SIZE_DEFAULT, ge=1, le=finance_service.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    type: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    return finance_service.get_transactions_list(current_user, db)
+    page = await run_service(
+        db, finance_service.get_transactions_list, current_user,
+        limit=limit, cursor=cursor, t_type=type, as_rows=True
+    )
+    # Trusted output: plain dicts from the ledger's own columns, encoded as
+    # they are. Returned as a Response so response_model doesn't re-validate
+    # (and so the ETag headers have to be passed along by hand).
+    return FastJSONResponse(page, headers=response.headers)
+
+# --- 3b. EXPORT THE WHOLE LEDGER (streamed) ---
+@router.get("/transactions/export")
+async def export_transactions(
+    format: str = "csv",
+    current_user: models.User = Depends(get_current_user)
+):
+    if format not in finance_service.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+
+    # The stream outlives this function, so it gets its own (sync, read-only) session
+    # that is closed when the last chunk has been sent. Starlette iterates
+    # this plain generator on its threadpool, one chunk at a time.
+    def stream():
+        db = database.ReadSessionLocal()
+        try:
+            yield from finance_service.export_transactions(current_user, db, format)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type=finance_service.EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'}
+    )
+
+# --- 3c. IMPORT A BANK STATEMENT (streamed progress) ---
+@router.post("/transactions/import")
+async def import_statement(
+    file: UploadFile = File(...),
+    format: Optional[str] = Form(None),
+    mapping: Optional[str] = Form(None),
+    current_user: models.User = Depends(get_current_user)
+):
+    # format defaults from the file name (.ofx/.qfx, anything else is CSV);
+    # mapping is a JSON object of schemas.StatementMapping
+    if format is None:
+        format = "ofx" if (file.filename or "").lower().endswith((".ofx", ".qfx")) else "csv"
+    if format not in finance_service.IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ofx")
+    try:
+        columns = schemas.StatementMapping.model_validate_json(mapping or "{}")
+    except ValidationError:
+        raise HTTPException(status_code=400, detail="Invalid column mapping")
+
+    # Checked now (a bad CSV header is a 400), read lazily from here on
+    records = finance_service.read_statement(file.file, format, columns)
+
+    # One NDJSON progress line per committed batch, the last one with "done".
+    # Like the export, the stream gets its own session on the threadpool.
+    def stream():
+        db = database.SessionLocal()
+        try:
+            for progress in finance_service.import_statement(records, current_user, db=db):
+                yield fast_json.dumps(progress) + b"\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 # --- 4. GET SUMMARY REPORT ---
-@router.get("/summary", response_model=schemas.SummaryReport)
-def get_summary_report(
+@router.get("/summary", response_model=schemas.SummaryReport,
+             dependencies=[Depends(resource_etag(versions.FINANCE))])
+async def get_summary_report(
     start_date: str,
     end_date: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    return finance_service.generate_summary_report(start_date, end_date, current_user, db)
\ No newline at end of file
+    return await run_service(
+        db, finance_service.generate_summary_report, start_date, end_date, current_user
+    )
\ No newline at end of file
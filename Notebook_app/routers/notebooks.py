@@ -1,10 +1,15 @@
 # Notebook_app/routers/notebooks.py
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from core import models, schemas
-from core.dependencies import get_db, get_current_user
+from core.dependencies import (
+    ResponseSlot, cached_response, get_async_db, get_async_read_db, get_current_user,
+    resource_etag, run_service,
+)
+from core.fast_json import FastJSONResponse
+from core.services import versions
 from core.services import notebooks as notebook_service
 
 router = APIRouter(
@@ -15,66 +20,127 @@ router = APIRouter(
 # --- 1. NOTEBOOK ENDPOINTS (The Shelves) ---
 
 @router.post("/", response_model=schemas.Notebook)
-def create_notebook(
+async def create_notebook(
     notebook: schemas.NotebookCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    return notebook_service.create_new_notebook(notebook, current_user, db)
-
-@router.get("/", response_model=List[schemas.Notebook])
-def get_notebooks(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    return await run_service(db, notebook_service.create_new_notebook, notebook, current_user)
+
+@router.get("/", response_model=List[schemas.NotebookSummary],
+             dependencies=[Depends(resource_etag(versions.NOTEBOOKS))])
+async def get_notebooks(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: models.User = Depends(get_current_user),
+    cache: ResponseSlot = Depends(cached_response(versions.NOTEBOOKS, per_user=False))
 ):
-    return notebook_service.get_all_notebooks(current_user, db)
-
-@router.get("/{notebook_id}", response_model=schemas.Notebook)
-def get_one_notebook(
+    cached = cache.hit()
+    if cached is not None:
+        return cached
+    notebooks = await run_service(db, notebook_service.get_all_notebooks, current_user)
+    return cache.store(List[schemas.NotebookSummary], notebooks)
+
+@router.get("/{notebook_id}", response_model=schemas.Notebook,
+             dependencies=[Depends(resource_etag(versions.NOTEBOOKS))])
+async def get_one_notebook(
     notebook_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: models.User = Depends(get_current_user),
+    cache: ResponseSlot = Depends(cached_response(versions.NOTEBOOKS, per_user=False))
 ):
-    return notebook_service.get_notebook_by_id(notebook_id, current_user, db)
+    cached = cache.hit()
+    if cached is not None:
+        return cached
+    notebook = await run_service(
+        db, notebook_service.get_notebook_by_id, notebook_id, current_user, with_notes=True
+    )
+    return cache.store(schemas.Notebook, notebook)
 
 
 # --- 2. NOTE ENDPOINTS (The Cards) ---
 
 @router.post("/{notebook_id}/notes", response_model=schemas.Note)
-def create_note(
+async def create_note(
     notebook_id: int,
     note: schemas.NoteCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    return notebook_service.create_note_in_notebook(notebook_id, note, current_user, db)
+    return await run_service(db, notebook_service.create_note_in_notebook, notebook_id, note, current_user)
 
-@router.get("/{notebook_id}/notes", response_model=List[schemas.Note])
-def get_notes(
+@router.get("/{notebook_id}/notes", response_model=List[schemas.Note], response_class=FastJSONResponse,
+             dependencies=[Depends(resource_etag(versions.NOTEBOOKS))])
+async def get_notes(
     notebook_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: models.User = Depends(get_current_user),
+    cache: ResponseSlot = Depends(cached_response(versions.NOTEBOOKS, per_user=False))
 ):
-    return notebook_service.get_notes_for_notebook(notebook_id, current_user, db)
+    cached = cache.hit()
+    if cached is not None:
+        return cached
+    notes = await run_service(
+        db, notebook_service.get_notes_for_notebook, notebook_id, current_user, as_rows=True
+    )
+    return cache.store_trusted(notes)
 
 
 
 
 @router.delete("/notes/{note_id}")
-def delete_note(
+async def delete_note(
     note_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    return notebook_service.delete_note_by_id(note_id, current_user, db)
+    return await run_service(db, notebook_service.delete_note_by_id, note_id, current_user)
 
 
 
 @router.put("/notes/{note_id}", response_model=schemas.Note)
-def update_note(
+async def update_note(
     note_id: int,
     note: schemas.NoteUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    return await run_service(db, notebook_service.update_note_content, note_id, note, current_user)
+
+
+# --- 3. CHECKLIST ITEM ENDPOINTS (The Boxes) ---
+
+@router.post("/notes/{note_id}/items", response_model=schemas.ChecklistItemResult)
+async def add_checklist_item(
+    note_id: int,
+    item: schemas.ChecklistItemCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    return await run_service(db, notebook_service.add_checklist_item, note_id, item, current_user)
+
+@router.patch("/items/{item_id}", response_model=schemas.ChecklistItemResult)
+async def update_checklist_item(
+    item_id: int,
+    item: schemas.ChecklistItemUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    # Ticking a box: {"done": true}
+    return await run_service(db, notebook_service.update_checklist_item, item_id, item, current_user)
+
+@router.put("/notes/{note_id}/items/order", response_model=schemas.ChecklistState)
+async def reorder_checklist_items(
+    note_id: int,
+    order: schemas.ChecklistReorder,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    return await run_service(db, notebook_service.reorder_checklist_items, note_id, order, current_user)
+
+@router.delete("/items/{item_id}")
+async def delete_checklist_item(
+    item_id: int,
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    return notebook_service.update_note_content(note_id, note, current_user, db)
\ No newline at end of file
+    return await run_service(db, notebook_service.delete_checklist_item, item_id, current_user)
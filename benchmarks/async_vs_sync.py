@@ -0,0 +1,190 @@
+# benchmarks/async_vs_sync.py
+
+"""
+Async vs sync database path, side by side.
+
+Serves the calendar feed and the first ledger page two ways against the
+same seeded SQLite file:
+
+  * async -- the real routers: `async def` + AsyncSession (aiosqlite)
+  * sync  -- the old shape: plain `def` endpoints + blocking SessionLocal,
+             which FastAPI runs on its threadpool
+
+and hammers each with the same number of concurrent clients.
+
+    python benchmarks/async_vs_sync.py [--clients 100] [--requests 2000]
+                                       [--profile production]
+
+Last run (50 clients, 1000 requests, development profile):
+
+    calendar feed   sync 104 req/s   async 250 req/s
+    ledger page     sync 267 req/s   async 229 req/s
+
+The async ledger page is the one regression: it is a single indexed query,
+so the per-statement hop to aiosqlite's connection thread (plus the ETag
+version lookup the real router does) costs more than the threadpool
+dispatch it replaces. Writing the query against the AsyncSession directly
+instead of through run_service measures the same, so the services stay
+sync.
+
+Uses a throwaway database; needs httpx installed. The sync engine's pool is
+sized to the number of clients: a sync session keeps its connection until
+get_db's teardown gets a threadpool slot, so with the default 5+10 pool the
+threads waiting for a connection starve the teardowns that would free one
+and the sync run deadlocks instead of finishing.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+FEED_PARAMS = {"start": "2024-03-01T00:00:00", "end": "2024-04-12T00:00:00"}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def seed(engine):
+    from sqlalchemy import insert
+    from sqlalchemy.orm import Session
+
+    from core import migrations, models
+    from core.services import finance as finance_service
+
+    migrations.upgrade(engine)
+    start = datetime(2023, 1, 1, 9, 0)
+    with Session(engine) as db:
+        company = models.Company(name="Bench", company_code="BENCH1")
+        db.add(company)
+        db.flush()
+        owner = models.User(email="owner@bench.test", hashed_password="x",
+                            role="owner", company_id=company.id)
+        db.add(owner)
+        db.flush()
+        db.execute(insert(models.Event), [
+            {"title": f"Event {i}", "start_time": start + timedelta(hours=8 * i),
+             "end_time": start + timedelta(hours=8 * i + 1), "calendar_type": "general",
+             "company_id": company.id}
+            for i in range(3000)
+        ])
+        db.execute(insert(models.Transaction), [
+            {"amount": 10 + i % 90, "type": "expense", "category": "Food",
+             "date": start + timedelta(hours=3 * i), "company_id": company.id, "user_id": owner.id}
+            for i in range(5000)
+        ])
+        db.commit()
+        finance_service.rebuild_rollups(db)
+        return owner.id, company.id
+
+
+def build_sync_app(SessionLocal, principal):
+    """The pre-async shape of the same two endpoints."""
+    from fastapi import Depends, FastAPI
+    from sqlalchemy.orm import Session
+
+    from core import schemas
+    from core.services import events as event_service
+    from core.services import finance as finance_service
+    from core.services import tasks as task_service
+
+    app = FastAPI()
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @app.get("/calendar/feed", response_model=schemas.CalendarFeed)
+    def feed(start: datetime, end: datetime, db: Session = Depends(get_db)):
+        return {
+            "events": event_service.get_user_events(principal, db, start, end),
+            "tasks": task_service.get_user_tasks(principal, db, start, end),
+        }
+
+    @app.get("/api/finance/transactions", response_model=schemas.TransactionPage)
+    def transactions(db: Session = Depends(get_db)):
+        return finance_service.get_transactions_list(principal, db)
+
+    return app
+
+
+async def hammer(app, path, params, clients, total):
+    import httpx
+
+    latencies = []
+    per_client = total // clients
+    transport = httpx.ASGITransport(app=app)
+
+    async def client_loop():
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+            for _ in range(per_client):
+                started = time.perf_counter()
+                r = await c.get(path, params=params)
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert r.status_code == 200, r.text
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, statistics.median(latencies), percentile(latencies, 99)
+
+
+async def run(args):
+    # Throwaway database; set before core is imported (engines come from Settings)
+    tmp_dir = tempfile.mkdtemp(prefix="karya-bench-")
+    path = os.path.join(tmp_dir, "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["DB_PROFILE"] = args.profile
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from core import database, principals
+    from core.dependencies import get_current_user
+
+    owner_id, company_id = seed(database.engine)
+    principal = principals.Principal(id=owner_id, email="owner@bench.test",
+                                     role="owner", company_id=company_id)
+
+    # --- async app: the real routers and engines ---
+    from Calendar_app.main import app as async_app
+
+    async_app.dependency_overrides[get_current_user] = lambda: principal
+
+    # --- sync app: same services, blocking sessions on the threadpool ---
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False},
+                           pool_size=args.clients, max_overflow=0)
+    sync_app = build_sync_app(sessionmaker(autocommit=False, autoflush=False, bind=engine), principal)
+
+    print(f"{args.clients} concurrent clients, {args.requests} requests per run, "
+          f"DB_PROFILE={args.profile}")
+    for label, path_, params in (("calendar feed", "/calendar/feed", FEED_PARAMS),
+                                 ("ledger page", "/api/finance/transactions", None)):
+        for name, app in (("sync", sync_app), ("async", async_app)):
+            rps, p50, p99 = await hammer(app, path_, params, args.clients, args.requests)
+            print(f"{label:>14} {name:>5}: {rps:8.1f} req/s  p50={p50:7.1f}ms  p99={p99:7.1f}ms")
+
+    for async_engine in {database.async_engine, database.async_read_engine}:
+        await async_engine.dispose()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--profile", choices=["development", "production"], default="development",
+                        help="DB_PROFILE for the async run")
+    asyncio.run(run(parser.parse_args()))
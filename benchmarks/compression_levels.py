@@ -0,0 +1,97 @@
+# benchmarks/compression_levels.py
+
+"""
+CPU time vs bytes saved for response compression, on our own payloads.
+
+Seeds --rows rows per list (the same data as json_serialization.py), renders
+the big JSON responses the way the endpoints do, and compresses each one
+with every available encoding (gzip always; brotli and zstd when their
+modules are installed) at a range of levels. For each it prints the
+compressed size, the compression time, and an estimated time to deliver
+the response over a --mbps link:
+
+    delivery = compression time + compressed bytes / link speed
+
+The level with the lowest delivery time for the link our remote offices
+use, at a CPU cost the workers can afford, is what goes into
+COMPRESSION_*_LEVEL (core/config.py).
+
+    python benchmarks/compression_levels.py [--rows 5000] [--repeat 5] [--mbps 10]
+
+Uses a throwaway SQLite database.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+# Same seed as the serialization benchmark (this directory is on sys.path)
+from json_serialization import best_of, seed  # noqa: E402
+
+LEVELS = {"gzip": (1, 3, 4, 5, 6, 9), "br": (1, 3, 4, 5, 7, 11), "zstd": (1, 3, 6, 9, 19)}
+
+
+def payloads(user, notebook_id, db):
+    from core import fast_json
+    from core.services import events as event_service
+    from core.services import finance as finance_service
+    from core.services import notebooks as notebook_service
+    from core.services import tasks as task_service
+
+    page = finance_service.PAGE_SIZE_MAX
+    return [
+        ("calendar feed", fast_json.dumps({
+            "events": event_service.get_user_events(user, db, as_rows=True),
+            "tasks": task_service.get_user_tasks(user, db, as_rows=True),
+        })),
+        (f"transactions (page of {page})",
+         fast_json.dumps(finance_service.get_transactions_list(user, db, limit=page, as_rows=True))),
+        ("notebook notes",
+         fast_json.dumps(notebook_service.get_notes_for_notebook(notebook_id, user, db, as_rows=True))),
+    ]
+
+
+def main(args):
+    tmp_dir = tempfile.mkdtemp(prefix="karya-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_dir}/bench.db"
+
+    from core import compression, database, migrations, principals
+
+    migrations.upgrade(database.engine)
+    with database.SessionLocal() as db:
+        owner_id, company_id, notebook_id = seed(db, args.rows)
+    user = principals.Principal(id=owner_id, email="owner@bench.test", role="owner", company_id=company_id)
+    with database.SessionLocal() as db:
+        bodies = payloads(user, notebook_id, db)
+
+    bytes_per_ms = args.mbps * 1_000_000 / 8 / 1000
+    print(f"{args.rows} rows per list, best of {args.repeat}, {args.mbps} Mbit/s link; "
+          f"encodings available: {', '.join(compression.ENCODINGS)}")
+    for name, body in bodies:
+        print(f"\n{name}: {len(body):,} bytes, uncompressed delivery {len(body) / bytes_per_ms:.1f} ms")
+        print(f"{'encoding':>9} {'level':>5} {'bytes':>10} {'ratio':>6} {'cpu ms':>7} {'MB/s':>7} {'delivery ms':>12}")
+        for encoding in compression.ENCODINGS:
+            for level in LEVELS[encoding]:
+                def compress():
+                    c = compression.compressor(encoding, level)
+                    return c.compress(body) + c.finish()
+
+                seconds, compressed = best_of(args.repeat, compress)
+                cpu_ms = seconds * 1000
+                print(f"{encoding:>9} {level:>5} {len(compressed):>10,} {len(body) / len(compressed):>6.1f} "
+                      f"{cpu_ms:>7.2f} {len(body) / seconds / 1e6:>7.0f} "
+                      f"{cpu_ms + len(compressed) / bytes_per_ms:>12.1f}")
+
+    database.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mbps", type=float, default=10.0, help="Link speed for the delivery estimate")
+    main(parser.parse_args())
@@ -0,0 +1,116 @@
+# benchmarks/freebusy_latency.py
+
+"""
+Free/busy lookups on a company with a long calendar history.
+
+Seeds one company with --events events (a mix of general events and
+personal events of --people employees) spread over --years years, then
+times core/services/freebusy.get_free_busy for a two-hour and a one-week
+window. The first lookup builds the company's interval index; the timed
+ones reuse it. For comparison it also times the same question asked the
+straightforward way: one windowed events query per employee.
+
+    python benchmarks/freebusy_latency.py [--events 200000] [--people 50] [--repeat 50]
+
+Uses a throwaway SQLite database.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+
+def seed(db, events, people, years):
+    from sqlalchemy import insert
+
+    from core import models
+
+    rng = random.Random(7)
+    company = models.Company(name="Bench", company_code="BENCH")
+    db.add(company)
+    db.flush()
+    owner = models.User(email="owner@bench.test", hashed_password="x", role="owner", company_id=company.id)
+    staff = [models.User(email=f"emp{i}@bench.test", hashed_password="x", role="employee",
+                         company_id=company.id) for i in range(people)]
+    db.add_all([owner] + staff)
+    db.flush()
+
+    start = datetime(2026, 1, 1) - timedelta(days=365 * years)
+    span_hours = 24 * 365 * years
+    rows = []
+    for _ in range(events):
+        begins = start + timedelta(hours=rng.randrange(span_hours))
+        general = rng.random() < 0.2
+        rows.append({
+            "title": "Meeting", "start_time": begins,
+            "end_time": begins + timedelta(minutes=rng.choice((30, 60, 90, 120))),
+            "calendar_type": "general" if general else "personal", "company_id": company.id,
+            "owner_id": None if general else rng.choice(staff).id,
+        })
+    db.execute(insert(models.Event), rows)
+    db.commit()
+    return (owner.id, owner.email, owner.role, company.id), [member.id for member in staff]
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+
+
+def main(args):
+    tmp_dir = tempfile.mkdtemp(prefix="karya-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_dir}/bench.db"
+
+    from core import database, migrations, principals
+    from core.services import events as event_service
+    from core.services import freebusy
+
+    migrations.upgrade(database.engine)
+    with database.SessionLocal() as db:
+        (user_id, email, role, company_id), staff_ids = seed(db, args.events, args.people, args.years)
+    owner = principals.Principal(id=user_id, email=email, role=role, company_id=company_id)
+    print(f"seeded {args.events} events for {args.people} people over {args.years} years")
+
+    with database.SessionLocal() as db:
+        t0 = time.perf_counter()
+        freebusy.get_free_busy(owner, db, datetime(2025, 6, 3, 14), datetime(2025, 6, 3, 16))
+        print(f"index build (first lookup): {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+        print(f"{'window':>10} {'approach':>22} {'p50 ms':>8} {'p95 ms':>8}")
+        for label, window in (("2 hours", (datetime(2025, 6, 3, 14), datetime(2025, 6, 3, 16))),
+                              ("1 week", (datetime(2025, 6, 2), datetime(2025, 6, 9)))):
+            def indexed():
+                freebusy.get_free_busy(owner, db, *window)
+
+            def per_person():
+                for member_id in staff_ids:
+                    member = principals.Principal(id=member_id, email="", role="employee", company_id=company_id)
+                    event_service.get_user_events(member, db, *window, as_rows=True)
+
+            for name, fn in (("interval index", indexed), ("query per employee", per_person)):
+                p50, p95 = timed(fn, args.repeat)
+                print(f"{label:>10} {name:>22} {p50:8.2f} {p95:8.2f}")
+
+    database.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--people", type=int, default=50)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=50)
+    main(parser.parse_args())
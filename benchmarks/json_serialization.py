@@ -0,0 +1,143 @@
+# benchmarks/json_serialization.py
+
+"""
+Rows/second of the list endpoints, validated path vs trusted fast path.
+
+For each list endpoint this times the work between "the service is called"
+and "the response body is ready":
+
+  before -- ORM objects, response_model validation, stdlib json
+            (what FastAPI does with a plain `return`)
+  after  -- the service's as_rows=True column query, encoded by
+            core/fast_json.dumps (orjson when installed)
+
+    python benchmarks/json_serialization.py [--rows 5000] [--repeat 5]
+
+Uses a throwaway SQLite database.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+
+def seed(db, rows):
+    from sqlalchemy import insert
+
+    from core import models
+
+    start = datetime(2024, 1, 1, 9, 0)
+    company = models.Company(name="Bench", company_code="BENCH1")
+    db.add(company)
+    db.flush()
+    owner = models.User(email="owner@bench.test", hashed_password="x", role="owner", company_id=company.id)
+    db.add(owner)
+    db.flush()
+    notebook = models.Notebook(name="Bench", company_id=company.id, owner_id=owner.id)
+    db.add(notebook)
+    db.flush()
+
+    db.execute(insert(models.Event), [
+        {"title": f"Event {i}", "start_time": start + timedelta(hours=i),
+         "end_time": start + timedelta(hours=i + 1), "calendar_type": "general",
+         "place": "Office", "company_id": company.id}
+        for i in range(rows)
+    ])
+    db.execute(insert(models.Task), [
+        {"title": f"Task {i}", "due_date": start + timedelta(hours=i), "status": models.TaskStatus.to_do,
+         "owner_id": owner.id, "assignee_id": owner.id, "company_id": company.id}
+        for i in range(rows)
+    ])
+    db.execute(insert(models.Transaction), [
+        {"amount": 10 + i % 90, "type": "expense", "category": "Food", "notes": "lunch",
+         "date": start + timedelta(hours=i), "company_id": company.id, "user_id": owner.id}
+        for i in range(rows)
+    ])
+    db.execute(insert(models.Note), [
+        {"title": f"Note {i}", "type": "checklist" if i % 2 else "text", "content": None if i % 2 else "Lorem ipsum",
+         "color": "white", "created_at": start + timedelta(hours=i), "updated_at": start + timedelta(hours=i),
+         "notebook_id": notebook.id}
+        for i in range(rows)
+    ])
+    checklist_ids = [n.id for n in db.query(models.Note.id).filter(models.Note.type == "checklist")]
+    db.execute(insert(models.ChecklistItem), [
+        {"note_id": checklist_ids[i % len(checklist_ids)], "position": i // len(checklist_ids),
+         "text": f"Item {i}", "done": i % 3 == 0}
+        for i in range(rows * 2)
+    ])
+    db.commit()
+    return owner.id, company.id, notebook.id
+
+
+def validated(model, data) -> bytes:
+    """FastAPI's default path: response_model validation, then stdlib json."""
+    from pydantic import TypeAdapter
+
+    adapter = TypeAdapter(model)
+    content = adapter.dump_python(adapter.validate_python(data, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), body
+
+
+def main(args):
+    tmp_dir = tempfile.mkdtemp(prefix="karya-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_dir}/bench.db"
+
+    from core import database, fast_json, migrations, principals, schemas
+    from core.services import events as event_service
+    from core.services import finance as finance_service
+    from core.services import notebooks as notebook_service
+    from core.services import tasks as task_service
+
+    migrations.upgrade(database.engine)
+    with database.SessionLocal() as db:
+        owner_id, company_id, notebook_id = seed(db, args.rows)
+    user = principals.Principal(id=owner_id, email="owner@bench.test", role="owner", company_id=company_id)
+
+    page = finance_service.PAGE_SIZE_MAX
+    endpoints = [
+        ("calendar feed (events)", args.rows, schemas.CalendarFeed,
+         lambda db, rows: {"events": event_service.get_user_events(user, db, as_rows=rows), "tasks": []}),
+        ("calendar feed (tasks)", args.rows, schemas.CalendarFeed,
+         lambda db, rows: {"events": [], "tasks": task_service.get_user_tasks(user, db, as_rows=rows)}),
+        (f"transactions (page of {page})", page, schemas.TransactionPage,
+         lambda db, rows: finance_service.get_transactions_list(user, db, limit=page, as_rows=rows)),
+        ("notebook notes", args.rows, List[schemas.Note],
+         lambda db, rows: notebook_service.get_notes_for_notebook(notebook_id, user, db, as_rows=rows)),
+    ]
+
+    encoder = "orjson" if fast_json.orjson is not None else "stdlib json (orjson not installed)"
+    print(f"{args.rows} rows per list, best of {args.repeat}; fast path encoder: {encoder}")
+    for name, count, model, call in endpoints:
+        with database.SessionLocal() as db:
+            before, slow_body = best_of(args.repeat, lambda: validated(model, call(db, False)))
+            db.expunge_all()
+            after, fast_body = best_of(args.repeat, lambda: fast_json.dumps(call(db, True)))
+        assert json.loads(slow_body) == json.loads(fast_body), name
+        print(f"{name:>30}: before {count / before:10,.0f} rows/s   "
+              f"after {count / after:10,.0f} rows/s   x{before / after:4.1f}")
+
+    database.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
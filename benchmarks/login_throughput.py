@@ -0,0 +1,125 @@
+# benchmarks/login_throughput.py
+
+"""
+Login-wave benchmark.
+
+Fires a burst of concurrent logins and, at the same time, keeps calling an
+ordinary authenticated endpoint (the finance dashboard). Prints p50/p99
+latency of that endpoint on its own and during the burst, plus login
+throughput. Run it twice to compare bcrypt in the process pool with the old
+inline behaviour:
+
+    python benchmarks/login_throughput.py
+    python benchmarks/login_throughput.py --inline
+
+Uses a throwaway SQLite database (DB_PROFILE from the environment applies,
+e.g. DB_PROFILE=production); needs httpx installed.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def probe(client, stop: asyncio.Event, latencies):
+    """Calls the dashboard back to back until told to stop."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/api/finance/dashboard")
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.text
+        await asyncio.sleep(0.005)
+
+
+async def run(args):
+    import httpx
+
+    # --- Throwaway database with one company and `--logins` employees ---
+    # (set before core is imported: the engines are built from Settings)
+    tmp_dir = tempfile.mkdtemp(prefix="karya-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_dir}/bench.db"
+
+    from core.config import Settings
+    from Calendar_app.main import create_app
+
+    overrides = {"PASSWORD_POOL_MAX_QUEUE": max(Settings().PASSWORD_POOL_MAX_QUEUE, args.logins)}
+    if args.inline:
+        overrides["PASSWORD_POOL_WORKERS"] = 0
+    app_settings = Settings.from_env(**overrides)
+    app = create_app(app_settings)  # creates the schema (AUTO_MIGRATE)
+
+    from core import auth, database, models
+
+    password_hash = auth.hash_password("password")
+    with database.SessionLocal() as db:
+        company = models.Company(name="Bench", company_code="BENCH1")
+        db.add(company)
+        db.flush()
+        db.add(models.User(email="owner@bench.test", hashed_password=password_hash,
+                           role="owner", company_id=company.id))
+        db.add_all([
+            models.User(email=f"user{i}@bench.test", hashed_password=password_hash,
+                        role="employee", company_id=company.id)
+            for i in range(args.logins)
+        ])
+        db.commit()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as owner:
+        await owner.post("/login", data={"username": "owner@bench.test", "password": "password"})
+
+        # Warm up (also spawns the pool's worker processes)
+        await owner.get("/api/finance/dashboard")
+
+        # 1. Quiet: dashboard alone
+        quiet, stop = [], asyncio.Event()
+        task = asyncio.create_task(probe(owner, stop, quiet))
+        await asyncio.sleep(args.seconds)
+        stop.set()
+        await task
+
+        # 2. Login wave: everyone logs in at once while the dashboard is polled
+        busy, stop = [], asyncio.Event()
+        task = asyncio.create_task(probe(owner, stop, busy))
+
+        async def login(i):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+                r = await c.post("/login", data={"username": f"user{i}@bench.test", "password": "password"})
+                return r.status_code
+
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(login(i) for i in range(args.logins)))
+        wave_seconds = time.perf_counter() - started
+        stop.set()
+        await task
+
+    auth.shutdown_password_pool()
+
+    mode = "inline (request threads)" if args.inline else f"process pool x{app_settings.PASSWORD_POOL_WORKERS}"
+    print(f"bcrypt: {mode}")
+    print(f"logins: {len(statuses)} in {wave_seconds:.2f}s "
+          f"({len(statuses) / wave_seconds:.1f}/s), "
+          f"ok={statuses.count(200)} busy(503)={statuses.count(503)}")
+    for name, samples in (("quiet", quiet), ("during logins", busy)):
+        print(f"dashboard {name:>14}: n={len(samples):4d}  "
+              f"p50={statistics.median(samples):7.1f}ms  p99={percentile(samples, 99):7.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=60, help="concurrent logins in the wave")
+    parser.add_argument("--seconds", type=float, default=2.0, help="length of the quiet phase")
+    parser.add_argument("--inline", action="store_true", help="hash on request threads (old behaviour)")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,129 @@
+# benchmarks/search_latency.py
+
+"""
+Latency of /api/search's query on a company with a large search index.
+
+Seeds one big company (notes, events, tasks and transactions, indexed by
+the search triggers as they are inserted) next to a second company of the
+same size, then times core/services/search.search for rare, common and
+prefix queries as the owner and as an employee.
+
+    python benchmarks/search_latency.py [--docs 300000] [--repeat 20]
+
+Uses a throwaway SQLite database.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+WORDS = ("invoice budget meeting planning client report supplier travel payroll review "
+         "design launch contract audit office hiring training lunch taxi rent").split()
+
+
+def sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def seed(db, companies, docs_per_company):
+    from sqlalchemy import insert
+
+    from core import models
+
+    rng = random.Random(7)
+    start = datetime(2020, 1, 1, 9, 0)
+    people = []
+    per_kind = docs_per_company // 4
+    for c in range(companies):
+        company = models.Company(name=f"Bench {c}", company_code=f"BENCH{c}")
+        db.add(company)
+        db.flush()
+        owner = models.User(email=f"owner{c}@bench.test", hashed_password="x", role="owner", company_id=company.id)
+        employee = models.User(email=f"emp{c}@bench.test", hashed_password="x", role="employee",
+                               company_id=company.id)
+        db.add_all([owner, employee])
+        db.flush()
+        notebook = models.Notebook(name="Bench", company_id=company.id, owner_id=owner.id)
+        db.add(notebook)
+        db.flush()
+
+        db.execute(insert(models.Note), [
+            {"title": sentence(rng, 3), "type": "text", "content": sentence(rng, 40), "color": "white",
+             "created_at": start, "updated_at": start, "notebook_id": notebook.id}
+            for _ in range(per_kind)
+        ])
+        db.execute(insert(models.Event), [
+            {"title": sentence(rng, 3), "start_time": start + timedelta(hours=i),
+             "end_time": start + timedelta(hours=i + 1), "place": rng.choice(WORDS), "notes": sentence(rng, 10),
+             "calendar_type": "general", "company_id": company.id}
+            for i in range(per_kind)
+        ])
+        db.execute(insert(models.Task), [
+            {"title": sentence(rng, 4), "due_date": start + timedelta(hours=i), "status": models.TaskStatus.to_do,
+             "owner_id": owner.id, "assignee_id": rng.choice((owner.id, employee.id)), "company_id": company.id}
+            for i in range(per_kind)
+        ])
+        db.execute(insert(models.Transaction), [
+            {"amount": 10, "type": "expense", "category": rng.choice(WORDS), "notes": sentence(rng, 6),
+             "date": start + timedelta(hours=i), "company_id": company.id,
+             "user_id": rng.choice((owner.id, employee.id))}
+            for i in range(per_kind)
+        ])
+        people.append({"owner": (owner.id, owner.email, "owner", company.id),
+                       "employee": (employee.id, employee.email, "employee", company.id)})
+        db.commit()
+    return people[0]
+
+
+def main(args):
+    tmp_dir = tempfile.mkdtemp(prefix="karya-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_dir}/bench.db"
+
+    from sqlalchemy import text
+
+    from core import database, migrations, principals
+    from core.services import search as search_service
+
+    migrations.upgrade(database.engine)
+    started = time.perf_counter()
+    with database.SessionLocal() as db:
+        people = seed(db, 2, args.docs)
+        # merge the index segments the inserts left behind, like after a rebuild
+        db.execute(text("INSERT INTO search_index (search_index) VALUES ('optimize')"))
+        db.commit()
+    print(f"seeded 2 x {args.docs} documents in {time.perf_counter() - started:.1f}s")
+
+    users = {
+        who: principals.Principal(id=user_id, email=email, role=role, company_id=company_id)
+        for who, (user_id, email, role, company_id) in people.items()
+    }
+    queries = ["zebra", "invoice", "invoice audit", "plan", "pa", "client review taxi"]
+    print(f"{'query':>22} {'as':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for query in queries:
+        for who, user in users.items():
+            with database.SessionLocal() as db:
+                timings = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    search_service.search(query, user, db)
+                    timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{query!r:>22} {who:>9} {statistics.median(timings):8.1f} {p95:8.1f}")
+
+    database.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=300000, help="documents per company")
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
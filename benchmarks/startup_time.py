@@ -0,0 +1,100 @@
+# benchmarks/startup_time.py
+
+"""
+How long a fresh worker takes to import the app and answer its first requests.
+
+Each run is a new Python process (like a worker booting after a deploy or
+a scale-up) that times
+
+  import        -- `import Calendar_app.main`
+  create_app    -- building the app: settings, routers, assets, and the
+                   migration check when AUTO_MIGRATE is on
+  first page    -- GET /login, the page rendered on first request
+  first API     -- POST /login with an unknown user (routing + one query)
+
+once with AUTO_MIGRATE=1 and once with AUTO_MIGRATE=0, where the schema
+was migrated beforehand by `python -m core.manage migrate` (the production
+setup).
+
+    python benchmarks/startup_time.py [--runs 5]
+
+Uses a throwaway SQLite database.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASES = ("import", "create_app", "first page", "first API")
+
+
+def child():
+    """One worker boot; prints the phase timings (ms) as JSON."""
+    import asyncio
+
+    timings = {}
+    started = time.perf_counter()
+    import Calendar_app.main as main
+    timings["import"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    app = main.create_app()
+    timings["create_app"] = time.perf_counter() - started
+
+    async def first_requests():
+        import httpx
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            started = time.perf_counter()
+            assert (await client.get("/login")).status_code == 200
+            timings["first page"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            response = await client.post("/login", data={"username": "nobody@bench.test", "password": "x"})
+            assert response.status_code == 401, response.text
+            timings["first API"] = time.perf_counter() - started
+
+    asyncio.run(first_requests())
+    print(json.dumps({phase: seconds * 1000 for phase, seconds in timings.items()}))
+
+
+def boot(env) -> dict:
+    out = subprocess.run([sys.executable, __file__, "--child"], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(args):
+    tmp_dir = tempfile.mkdtemp(prefix="karya-bench-")
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_dir}/bench.db", "PYTHONPATH": ROOT,
+           "PASSWORD_POOL_WORKERS": "0", "BCRYPT_ROUNDS": "4"}
+    env.setdefault("SECRET_KEY", "benchmark-secret")
+    subprocess.run([sys.executable, "-m", "core.manage", "migrate"], cwd=ROOT, env=env,
+                   check=True, capture_output=True)
+    boot(env)  # warm the OS file cache and write static/dist once
+
+    print(f"median of {args.runs} fresh processes, ms")
+    print(f"{'':>14}" + "".join(f"{phase:>12}" for phase in PHASES) + f"{'total':>12}")
+    for auto_migrate in ("1", "0"):
+        runs = [boot({**env, "AUTO_MIGRATE": auto_migrate}) for _ in range(args.runs)]
+        medians = [statistics.median(run[phase] for run in runs) for phase in PHASES]
+        print(f"{'AUTO_MIGRATE=' + auto_migrate:>14}" + "".join(f"{m:12.1f}" for m in medians)
+              + f"{sum(medians):12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parsed = parser.parse_args()
+    if parsed.child:
+        child()
+    else:
+        main(parsed)
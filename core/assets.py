@@ -0,0 +1,209 @@
+# assets.py
+
+"""
+Fingerprinted, precompressed static files.
+
+build() copies every file under static/ to static/dist/ with a hash of its
+content in the name (js/script.js -> js/script.1a2b3c4d5e6f.js), next to a
+gzip copy (.gz) and, when the optional `brotli` module is installed, a
+brotli copy (.br). The templates ask asset_url("js/script.js") for the
+hashed URL.
+
+Because a changed file gets a new name, the hashed URLs are cached by the
+browser for a year without revalidating (Cache-Control: immutable), and
+AssetFiles sends the smallest variant the client accepts -- compressed once
+at build time, not on every request.
+
+Files are content-addressed, so building again only writes what changed,
+and several workers building at startup write the same bytes. Old names are
+left in place (pages already open still load them); `rm -rf static/dist`
+clears them out.
+
+    python -m core.manage build-assets   # same thing the app does on startup
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import stat
+from typing import Dict, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+try:  # optional: pip install brotli
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = "static"
+STATIC_URL = "/static"
+DIST = "dist"
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = {"br": ".br", "gzip": ".gz"} if brotli is not None else {"gzip": ".gz"}
+
+# What the last build produced:
+#   source path -> hashed path       ("js/script.js" -> "js/script.1a2b3c4d5e6f.js")
+#   hashed path -> encodings written ("js/script.1a2b3c4d5e6f.js" -> ("br", "gzip"))
+_manifest: Dict[str, str] = {}
+_variants: Dict[str, Tuple[str, ...]] = {}
+
+
+# --- 1. BUILDING ---
+
+def _compress(encoding: str, data: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    # mtime=0: the same input always gives the same bytes
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _write(path: str, data: bytes):
+    # Write-then-rename, so another worker never serves half a file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build(static_dir: str = STATIC_DIR) -> Dict[str, str]:
+    """Writes the hashed copies and their compressed variants.
+
+    Returns the manifest (source path -> hashed path), which asset_url()
+    uses from now on.
+    """
+    dist_dir = os.path.join(static_dir, DIST)
+    manifest, variants = {}, {}
+    for root, dirs, files in os.walk(static_dir):
+        if os.path.abspath(root) == os.path.abspath(static_dir) and DIST in dirs:
+            dirs.remove(DIST)
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            rel = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                data = f.read()
+            stem, ext = os.path.splitext(rel)
+            hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+            target = os.path.join(dist_dir, hashed)
+            if not os.path.exists(target):
+                _write(target, data)
+
+            written = []
+            for encoding, suffix in ENCODINGS.items():
+                if not os.path.exists(target + suffix):
+                    compressed = _compress(encoding, data)
+                    # Tiny files can come out bigger; those are only sent as is
+                    if len(compressed) >= len(data):
+                        continue
+                    _write(target + suffix, compressed)
+                written.append(encoding)
+            manifest[rel] = hashed
+            variants[hashed] = tuple(written)
+
+    _manifest.clear()
+    _manifest.update(manifest)
+    _variants.clear()
+    _variants.update(variants)
+    return manifest
+
+
+def build_or_warn(static_dir: str = STATIC_DIR):
+    """build() for app startup: a read-only checkout still serves the pages."""
+    try:
+        build(static_dir)
+    except OSError:
+        logger.warning("could not build %s/%s; serving unhashed static files", static_dir, DIST,
+                       exc_info=True)
+
+
+# --- 2. TEMPLATES ---
+
+def asset_url(path: str) -> str:
+    """The URL of static/<path>: its hashed copy once built, else the file itself."""
+    path = path.lstrip("/")
+    hashed = _manifest.get(path)
+    if hashed is None:
+        return f"{STATIC_URL}/{path}"
+    return f"{STATIC_URL}/{DIST}/{hashed}"
+
+
+def install(*templates):
+    """Makes asset_url() available to the given Jinja2Templates."""
+    for t in templates:
+        t.env.globals["asset_url"] = asset_url
+
+
+# --- 3. SERVING ---
+
+def preferred_encoding(accept_encoding: str, offered) -> Optional[str]:
+    """The first of `offered` the Accept-Encoding header allows, or None.
+
+    Honours q-values ("gzip;q=0" refuses gzip) and "*"; among acceptable
+    encodings the server's order wins, as it lists the smallest first.
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    for encoding in offered:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class AssetFiles(StaticFiles):
+    """StaticFiles that serves static/dist/ as immutable, precompressed files."""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        rel = path.replace(os.sep, "/")
+        if not rel.startswith(DIST + "/"):
+            return await super().get_response(path, scope)
+
+        hashed = rel[len(DIST) + 1:]
+        encoding = preferred_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), _variants.get(hashed, ())
+        )
+        response = None
+        if encoding is not None and scope["method"] in ("GET", "HEAD"):
+            full_path, stat_result = await anyio.to_thread.run_sync(
+                self.lookup_path, path + ENCODINGS[encoding]
+            )
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                response = self.file_response(full_path, stat_result, scope)
+                if response.status_code == 200:
+                    # FileResponse guessed the type from the .gz/.br name
+                    response.headers["content-type"] = _media_type(hashed)
+                response.headers["content-encoding"] = encoding
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        if response.status_code in (200, 304):
+            response.headers["cache-control"] = IMMUTABLE
+            response.headers["vary"] = "Accept-Encoding"
+        return response
+
+
+def _media_type(path: str) -> str:
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if media_type.startswith("text/"):
+        media_type += "; charset=utf-8"
+    return media_type
@@ -3,9 +3,14 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import multiprocessing
 import string
 import secrets
+import threading
+from starlette.concurrency import run_in_threadpool
 from core.config import settings
 
 import os
@@ -13,8 +18,17 @@ import os
 
 # --- 1. PASSWORD HASHING ---
 
-# This tells passlib to use the "bcrypt" algorithm
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# This tells passlib to use the "bcrypt" algorithm.
+# Hashes below BCRYPT_ROUNDS count as outdated (see verify_and_update_password).
+def _make_context(rounds: int) -> CryptContext:
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+    )
+
+pwd_context = _make_context(settings.BCRYPT_ROUNDS)
 
 def hash_password(password: str):
     """Hashes a plain-text password."""
@@ -24,6 +38,92 @@ def verify_password(plain_password: str, hashed_password: str):
     """Checks if a plain-text password matches a hashed one."""
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Like verify_password, but also returns a fresh hash when the stored one
+    uses outdated settings (e.g. a lower bcrypt cost), so it can be saved."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+# --- 1b. PASSWORD WORK OFF THE REQUEST THREADS ---
+# bcrypt takes ~250ms of CPU on purpose. Running it on the shared request
+# threads starves every other endpoint during a login wave, so the async
+# helpers below send it to a small, dedicated pool of worker processes.
+# The number of jobs allowed to wait for that pool is capped: past
+# PASSWORD_POOL_MAX_QUEUE we refuse quickly instead of queueing forever.
+
+class PasswordPoolBusy(Exception):
+    """Too many password jobs are already waiting for a worker."""
+
+
+_password_pool: Optional[ProcessPoolExecutor] = None
+_pool_settings: Optional[Tuple[int, int]] = None  # (workers, rounds) it was started with
+_pool_lock = threading.Lock()
+_jobs_in_flight = 0
+
+
+def _init_worker(rounds: int):
+    # A spawned worker imports this module afresh, from its own environment:
+    # give it the app's cost factor, not whatever BCRYPT_ROUNDS it finds there
+    global pwd_context
+    pwd_context = _make_context(rounds)
+
+
+def _get_password_pool() -> ProcessPoolExecutor:
+    global _password_pool, _pool_settings
+    with _pool_lock:
+        if _password_pool is None:
+            # "spawn" so the workers don't inherit the server's threads and sockets
+            _pool_settings = (settings.PASSWORD_POOL_WORKERS, settings.BCRYPT_ROUNDS)
+            _password_pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(settings.BCRYPT_ROUNDS,),
+            )
+        return _password_pool
+
+
+async def _run_password_job(fn, *args):
+    global _jobs_in_flight
+    with _pool_lock:
+        if _jobs_in_flight >= settings.PASSWORD_POOL_WORKERS + settings.PASSWORD_POOL_MAX_QUEUE:
+            raise PasswordPoolBusy()
+        _jobs_in_flight += 1
+    try:
+        if settings.PASSWORD_POOL_WORKERS <= 0:
+            # Pool disabled: old behaviour, on a request thread
+            return await run_in_threadpool(fn, *args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_password_pool(), fn, *args)
+    finally:
+        with _pool_lock:
+            _jobs_in_flight -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_password_job(hash_password, password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str):
+    return await _run_password_job(verify_and_update_password, plain_password, hashed_password)
+
+
+def shutdown_password_pool():
+    global _password_pool
+    with _pool_lock:
+        pool, _password_pool = _password_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def configure(config):
+    """Uses `config`'s bcrypt cost from now on. A running pool started with
+    another size or cost is shut down; the next password job starts a new one."""
+    global pwd_context
+    pwd_context = _make_context(config.BCRYPT_ROUNDS)
+    if _password_pool is not None and _pool_settings != (config.PASSWORD_POOL_WORKERS, config.BCRYPT_ROUNDS):
+        shutdown_password_pool()
+
 
 # --- 2. JWT (TOKEN) CREATION & VALIDATION (UPDATED) ---
 
@@ -0,0 +1,177 @@
+# broker.py
+
+"""
+Live updates: an in-process publish/subscribe broker for GET /api/stream.
+
+The services record what they changed (core/services/changes.py). Once the
+write has committed, every change is published here and copied into the
+queue of each open stream of that company that may see it, already encoded
+as a Server-Sent Events frame -- one JSON encode per change, not one per
+listener.
+
+Who sees what uses the same tokens as the search index: c<company> (the
+whole company), k<company> (its owner), u<user> (that user). A subscriber
+holds the tokens of the logged-in user; a change goes to the subscribers
+that share at least one token with its audience.
+
+An idle stream is a suspended coroutine plus a small queue, so one worker
+keeps thousands of them open. Each queue holds at most STREAM_QUEUE_SIZE
+frames: a client that stops reading doesn't make the worker buffer without
+limit. When its queue is full the subscriber is evicted instead -- its
+backlog is dropped, it gets a final "resync" event and the stream ends; the
+browser reconnects and re-reads its view.
+
+Per worker process, like the "memory" response cache: with several workers
+a stream only hears about writes handled by its own worker.
+"""
+
+import asyncio
+import logging
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+from core import fast_json
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RESYNC = b"event: resync\ndata: {}\n\n"
+HEARTBEAT = b": ping\n\n"  # SSE comment: keeps proxies from closing an idle stream
+
+
+class StreamsFull(Exception):
+    """This worker already has STREAM_MAX_SUBSCRIBERS open streams."""
+
+
+def audience_tokens(user) -> FrozenSet[str]:
+    tokens = {f"u{user.id}"}
+    if user.company_id is not None:
+        tokens.add(f"c{user.company_id}")
+        if user.role == "owner":
+            tokens.add(f"k{user.company_id}")
+    return frozenset(tokens)
+
+
+class Subscriber:
+    __slots__ = ("company_id", "tokens", "queue", "evicted")
+
+    def __init__(self, company_id: Optional[int], tokens: FrozenSet[str], queue_size: int):
+        self.company_id = company_id
+        self.tokens = tokens
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.evicted = False
+
+
+class Broker:
+    def __init__(self, queue_size: int, max_subscribers: int):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: Dict[Optional[int], Set[Subscriber]] = {}
+        self._count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._delivered = 0
+        self._evicted = 0
+
+    # --- 1. SUBSCRIBING (on the event loop) ---
+
+    def subscribe(self, user) -> Subscriber:
+        if self._count >= self.max_subscribers:
+            raise StreamsFull()
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber(user.company_id, audience_tokens(user), self.queue_size)
+        self._subscribers.setdefault(user.company_id, set()).add(subscriber)
+        self._count += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        company = self._subscribers.get(subscriber.company_id)
+        if company is None or subscriber not in company:
+            return
+        company.discard(subscriber)
+        if not company:
+            del self._subscribers[subscriber.company_id]
+        self._count -= 1
+
+    # --- 2. PUBLISHING (from any thread) ---
+
+    def publish(self, company_id: Optional[int], audience: Iterable[str], message: dict):
+        """Queues `message` for the company's subscribers in `audience`.
+
+        Called after a commit, which may happen on the event loop (the
+        async routers) or on a worker thread (the streaming imports): off
+        the loop, the delivery is handed over with call_soon_threadsafe.
+        """
+        loop = self._loop
+        if loop is None or company_id not in self._subscribers:
+            return
+        frame = b"event: change\ndata: " + fast_json.dumps(message) + b"\n\n"
+        if message.get("seq") is not None:
+            # The change-log position: a reconnecting client resumes from it (/api/sync)
+            frame = b"id: %d\n" % message["seq"] + frame
+        audience = frozenset(audience)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(company_id, audience, frame)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._deliver, company_id, audience, frame)
+
+    def _deliver(self, company_id: Optional[int], audience: FrozenSet[str], frame: bytes):
+        self._delivered += 1
+        for subscriber in list(self._subscribers.get(company_id, ())):
+            if subscriber.evicted or audience.isdisjoint(subscriber.tokens):
+                continue
+            try:
+                subscriber.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._evict(subscriber)
+
+    def _evict(self, subscriber: Subscriber):
+        # Too slow to keep up: drop what it hasn't read, tell it to re-read
+        # its view, and stop sending it anything.
+        subscriber.evicted = True
+        self._evicted += 1
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(RESYNC)
+        self.unsubscribe(subscriber)
+        logger.info("evicted a slow stream subscriber (company %s)", subscriber.company_id)
+
+    # --- 3. READING ---
+
+    async def frames(self, subscriber: Subscriber, heartbeat: float):
+        """The subscriber's frames, with a heartbeat while nothing happens.
+
+        Ends after the RESYNC frame of an eviction; unsubscribes however
+        the stream ends (including the client going away).
+        """
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                yield frame
+                if frame is RESYNC:
+                    return
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self._count,
+            "companies": len(self._subscribers),
+            "delivered": self._delivered,
+            "evicted": self._evicted,
+        }
+
+
+broker = Broker(settings.STREAM_QUEUE_SIZE, settings.STREAM_MAX_SUBSCRIBERS)
+
+
+def configure(config):
+    """Applies `config`'s limits; streams already open keep their queues."""
+    broker.queue_size = config.STREAM_QUEUE_SIZE
+    broker.max_subscribers = config.STREAM_MAX_SUBSCRIBERS
@@ -0,0 +1,240 @@
+# compression.py
+
+"""
+Compressed responses for the API and pages.
+
+CompressionMiddleware compresses a response body when the client's
+Accept-Encoding allows it, picking the first of zstd, br, gzip it accepts
+(zstd and br only when the optional `zstandard` / `brotli` modules are
+installed; gzip always works). It leaves a response alone when
+
+  * the body is smaller than COMPRESSION_MIN_SIZE (not worth the CPU),
+  * its type isn't text-like (COMPRESSIBLE_TYPES),
+  * it is already encoded (the precompressed files of core/assets.py),
+  * it says Cache-Control: no-transform, or
+  * its route opted out with `dependencies=[Depends(no_compression)]`.
+
+A streaming response (more than one body chunk: exports, the import's
+progress lines) is compressed chunk by chunk, and every chunk is flushed,
+so the client still gets each chunk as soon as it is sent. Server-Sent
+Events are never compressed: they opt out, and a compressor per open
+stream would cost tens of KB per connection.
+
+A compressed body is a different representation, so a strong ETag becomes
+weak (the read endpoints' ETags already are, see core/dependencies.py) and
+the response gets Vary: Accept-Encoding.
+
+The levels are settings (COMPRESSION_*_LEVEL); benchmarks/compression_levels.py
+measures CPU time against bytes saved on our real payloads.
+"""
+
+import zlib
+from typing import Dict, Optional
+
+from fastapi import Request
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.assets import preferred_encoding
+from core.config import settings
+
+try:  # optional: pip install zstandard
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+try:  # optional: pip install brotli
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/x-ndjson", "application/javascript",
+    "text/html", "text/css", "text/javascript", "text/csv", "text/plain", "image/svg+xml",
+)
+
+# What this worker can produce, in order of preference
+ENCODINGS = tuple(
+    name for name, module in (("zstd", zstandard), ("br", brotli), ("gzip", zlib)) if module is not None
+)
+
+
+# --- 1. COMPRESSORS ---
+# One interface over the three libraries: compress() what there is so far,
+# flush() to push it out to the client, finish() at the end of the body.
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip framing
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+_COMPRESSORS = {"zstd": _Zstd, "br": _Brotli, "gzip": _Gzip}
+
+def compressor(encoding: str, level: int):
+    """A fresh compressor for `encoding` at `level` (zstd level, brotli quality, gzip level)."""
+    return _COMPRESSORS[encoding](level)
+
+
+def levels_from(config) -> Dict[str, int]:
+    return {
+        "zstd": config.COMPRESSION_ZSTD_LEVEL,
+        "br": config.COMPRESSION_BROTLI_QUALITY,
+        "gzip": config.COMPRESSION_GZIP_LEVEL,
+    }
+
+
+# --- 2. PER-ROUTE OPT-OUT ---
+
+def no_compression(request: Request):
+    """Route dependency: send this route's responses uncompressed."""
+    request.scope["compress"] = False
+
+
+# --- 3. MIDDLEWARE ---
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = settings.COMPRESSION_MIN_SIZE,
+                 levels: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = levels or levels_from(settings)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = preferred_encoding(Headers(scope=scope).get("accept-encoding", ""), ENCODINGS)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _Responder(scope, send, encoding, self.levels[encoding], self.minimum_size).send)
+
+
+def _compressible(scope: Scope, start: Message) -> bool:
+    if scope.get("compress", True) is False or start["status"] in (204, 206, 304):
+        return False
+    headers = Headers(raw=start.get("headers", []))
+    if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+        return False
+    return headers.get("content-type", "").split(";")[0].strip().lower() in COMPRESSIBLE_TYPES
+
+
+class _Responder:
+    """The send() of one response: holds a compressible response's start
+    message until the first body chunk shows whether it is worth it."""
+
+    def __init__(self, scope: Scope, send: Send, encoding: str, level: int, minimum_size: int):
+        self.scope = scope
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def send(self, message: Message):
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            if not _compressible(self.scope, message):
+                # Decided now: a stream's headers shouldn't wait for its first event
+                self.passthrough = True
+                await self._send(message)
+                return
+            self.start = message
+            return
+
+        if message["type"] != "http.response.body":
+            if self.start is None:
+                # Not part of the response (the test client's http.response.debug)
+                await self._send(message)
+                return
+            # e.g. a file handed to the server to send (pathsend): as is
+            self.passthrough = True
+            await self._send(self.start)
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self._send(self.start)
+                await self._send(message)
+                return
+            self.compressor = compressor(self.encoding, self.level)
+            if not more_body:
+                # The whole body in one go (the usual JSON response)
+                body = self.compressor.compress(body) + self.compressor.finish()
+                self._encode_headers(len(body))
+                await self._send(self.start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            self._encode_headers(None)
+            await self._send(self.start)
+
+        if more_body:
+            chunk = self.compressor.compress(body) + self.compressor.flush() if body else b""
+        else:
+            chunk = self.compressor.compress(body) + self.compressor.finish()
+        if chunk or not more_body:
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _encode_headers(self, length: Optional[int]):
+        self.start.setdefault("headers", [])
+        headers = MutableHeaders(scope=self.start)
+        headers["Content-Encoding"] = self.encoding
+        vary = headers.get("vary")
+        if not vary:
+            headers["Vary"] = "Accept-Encoding"
+        elif "accept-encoding" not in vary.lower():
+            headers["Vary"] = f"{vary}, Accept-Encoding"
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        if length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(length)
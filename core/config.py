@@ -1,26 +1,112 @@
 # core/config.py
 
+"""
+Settings, read from the environment.
+
+Nothing is loaded at import: `settings` holds the environment's values
+(and the defaults below) until the app or the CLI calls configure(), which
+first loads the .env file. Pass overrides to try a setting without
+touching the environment:
+
+    create_app(Settings.from_env(DATABASE_URL="sqlite:///./test.db"))
+"""
+
 import os
-from dotenv import load_dotenv
+from typing import Optional
 
-# Load the .env file immediately when this file is imported
-load_dotenv()
+from dotenv import load_dotenv
 
 class Settings:
-    # 1. Database
-    DATABASE_URL = "sqlite:///./app.db"
-
-    # 2. Security
-    # We try to get it from .env, but if missing, we warn the user (or fail)
-    SECRET_KEY = os.getenv("SECRET_KEY")
-    
-    # Defaults
-    ALGORITHM = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES = 30  # 30 minutes
-
-    # 3. App Info
-    PROJECT_NAME = "Karya 2 Work Hub"
-    VERSION = "1.0.0"
-
-# Create a single instance of the settings to use everywhere
-settings = Settings()
\ No newline at end of file
+    def __init__(self, **overrides):
+        # 1. Database
+        self.DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+
+        # "development" keeps SQLite's defaults. "production" switches the file to
+        # WAL, funnels writes through a single connection and serves GET
+        # endpoints from a separate read-only pool (see core/database.py).
+        self.DB_PROFILE = os.getenv("DB_PROFILE", "development")
+        self.DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "8"))
+
+        # Production PRAGMAs, applied to every new connection
+        self.SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+        self.SQLITE_CACHE_SIZE_KIB = int(os.getenv("SQLITE_CACHE_SIZE_KIB", "65536"))      # per connection
+        self.SQLITE_MMAP_SIZE_BYTES = int(os.getenv("SQLITE_MMAP_SIZE_BYTES", str(256 * 1024 * 1024)))
+
+        # Bring the schema up to date when the app starts (create_app). Off
+        # in production: there `python -m core.manage migrate` runs once per
+        # deploy instead of in every booting worker.
+        self.AUTO_MIGRATE = os.getenv(
+            "AUTO_MIGRATE", "0" if self.DB_PROFILE == "production" else "1"
+        ).lower() in ("1", "true", "yes")
+
+        # 2. Security
+        # We try to get it from .env, but if missing, we warn the user (or fail)
+        self.SECRET_KEY = os.getenv("SECRET_KEY")
+
+        # Defaults
+        self.ALGORITHM = "HS256"
+        self.ACCESS_TOKEN_EXPIRE_MINUTES = 30  # 30 minutes
+
+        # Principal cache (see core/principals.py): how long, and how many,
+        # logged-in users we remember per worker before asking the DB again
+        self.PRINCIPAL_CACHE_TTL_SECONDS = 300
+        self.PRINCIPAL_CACHE_MAX_ENTRIES = 10_000
+
+        # bcrypt cost factor. Raising it makes logins re-hash older passwords.
+        self.BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+        # Password hashing pool (see core/auth.py): bcrypt runs in these worker
+        # processes instead of on the request threads. 0 workers = run inline.
+        self.PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", "2"))
+        # How many hash/verify jobs may wait for a worker before we answer 503
+        self.PASSWORD_POOL_MAX_QUEUE = int(os.getenv("PASSWORD_POOL_MAX_QUEUE", "64"))
+
+        # Response cache (see core/response_cache.py): "memory" (per worker),
+        # "sqlite" (one file shared by all workers) or "off"
+        self.RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+        self.RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "./response_cache.db")
+        self.RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+        self.RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # memory only
+        self.RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "600"))
+
+        # Live updates (see core/broker.py), per worker: open /api/stream
+        # connections allowed, frames a client may fall behind before it is
+        # dropped, and how often an idle stream gets a keep-alive comment
+        self.STREAM_MAX_SUBSCRIBERS = int(os.getenv("STREAM_MAX_SUBSCRIBERS", "10000"))
+        self.STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "256"))
+        self.STREAM_HEARTBEAT_SECONDS = int(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+
+        # Response compression (see core/compression.py): bodies smaller than
+        # this go out as they are. Levels from benchmarks/compression_levels.py:
+        # gzip 5 is as small as 6 on our JSON at about half the CPU.
+        self.COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+        self.COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "5"))
+        self.COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+        self.COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+        # 3. App Info
+        self.PROJECT_NAME = "Karya 2 Work Hub"
+        self.VERSION = "1.0.0"
+
+        for name, value in overrides.items():
+            if not hasattr(self, name):
+                raise TypeError(f"Unknown setting: {name}")
+            setattr(self, name, value)
+
+    @classmethod
+    def from_env(cls, env_file: Optional[str] = None, **overrides) -> "Settings":
+        """The environment's settings, after loading the .env file into it
+        (env_file, or the nearest .env; variables already set win)."""
+        load_dotenv(env_file)
+        return cls(**overrides)
+
+
+# The single instance everyone imports. configure() updates it in place, so
+# modules that imported it earlier see the new values too.
+settings = Settings()
+
+
+def configure(new: Optional[Settings] = None) -> Settings:
+    """Makes `new` (default: Settings.from_env()) the settings to use."""
+    settings.__dict__.update(vars(new if new is not None else Settings.from_env()))
+    return settings
@@ -1,26 +1,145 @@
 # database.py
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-# 1. Define the database URL. "sqlite:///./app.db" means
-# we will use an SQLite database with a file named "app.db"
-# in the current directory.
-SQLALCHEMY_DATABASE_URL = "sqlite:///./app.db"
+from core.config import settings
 
-# 2. Create the SQLAlchemy "engine". This is the main
-# connection point to the database.
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+# The engines below are built by configure() from a Settings: at import from
+# the shared `settings`, and again by create_app() with the app's own, so an
+# app made with another DB_PROFILE or pool size really gets those engines.
+# These are the settings that shape them.
+ENGINE_SETTINGS = (
+    "DATABASE_URL", "DB_PROFILE", "DB_READ_POOL_SIZE",
+    "SQLITE_BUSY_TIMEOUT_MS", "SQLITE_CACHE_SIZE_KIB", "SQLITE_MMAP_SIZE_BYTES",
 )
-# The "check_same_thread" argument is needed only for SQLite.
+
+
+def _apply_profile(engine, pragmas, production):
+    """Runs the profile's PRAGMAs on every new connection the engine opens."""
+    if not production:
+        return engine
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
+
 
 # 3. Create a "Session" class. Each instance of this
 # class will be a new database "conversation" (session).
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# configure() binds these to its engines; they stay the same objects, so
+# code that imported them keeps working when the engines are rebuilt.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+# The async twins, used by the API routers.
+# expire_on_commit=False: after a commit, the objects we return are still
+# readable while FastAPI serializes them (no surprise lazy reload).
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+_configured_with = None
+
+
+def configure(config) -> bool:
+    """Builds the engines for `config`. Returns False (and keeps the current
+    engines) when its ENGINE_SETTINGS are the ones they were built with."""
+    global SQLALCHEMY_DATABASE_URL, ASYNC_DATABASE_URL, PRODUCTION
+    global engine, async_engine, read_engine, async_read_engine, _configured_with
+
+    wanted = tuple(getattr(config, name) for name in ENGINE_SETTINGS)
+    if wanted == _configured_with:
+        return False
+    previous = [globals()[name] for name in ("engine", "read_engine") if name in globals()]
+
+    # 1. The database URL comes from Settings (DATABASE_URL in .env or the
+    # environment). The default, "sqlite:///./app.db", is an SQLite file named
+    # "app.db" in the current directory.
+    SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
+    url = make_url(SQLALCHEMY_DATABASE_URL)
+
+    # The async routers talk to the same file through aiosqlite
+    ASYNC_DATABASE_URL = url.set(drivername="sqlite+aiosqlite")
+
+    # 1b. The "production" profile (DB_PROFILE=production).
+    # WAL lets readers keep reading while a write is being committed, and
+    # synchronous=NORMAL is the safe setting for WAL (fsync per checkpoint, not
+    # per commit). busy_timeout makes a connection wait for the lock instead of
+    # failing straight away with "database is locked". The rest is cache: a
+    # bigger page cache, memory-mapped reads and in-memory temp tables.
+    PRODUCTION = config.DB_PROFILE == "production"
+    is_file = url.database not in (None, "", ":memory:")
+
+    read_pragmas = [
+        f"PRAGMA busy_timeout = {config.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size = -{config.SQLITE_CACHE_SIZE_KIB}",
+        f"PRAGMA mmap_size = {config.SQLITE_MMAP_SIZE_BYTES}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    write_pragmas = ["PRAGMA journal_mode = WAL", "PRAGMA synchronous = NORMAL"] + read_pragmas
+
+    # 2. Create the SQLAlchemy "engine". This is the main
+    # connection point to the database.
+    # The "check_same_thread" argument is needed only for SQLite.
+    engine = _apply_profile(create_engine(
+        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    ), write_pragmas, PRODUCTION)
+
+    # 2b. The async engine. I/O goes through aiosqlite so a request waiting
+    # on the database doesn't hold one of the server's worker threads.
+    # In production SQLite only ever has one writer anyway, so the routers get
+    # exactly one write connection: writes wait their turn in the pool instead
+    # of racing each other for the file lock.
+    writer_pool = {"pool_size": 1, "max_overflow": 0} if PRODUCTION else {}
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **writer_pool)
+    _apply_profile(async_engine.sync_engine, write_pragmas, PRODUCTION)
+
+    # 2c. Read-only engines for GET endpoints.
+    # In production these come from their own pool of read-only connections
+    # (mode=ro), so a page load never waits for the write connection above.
+    # Otherwise they are simply the normal engines.
+    if PRODUCTION and is_file:
+        read_url = url.set(
+            database=f"file:{url.database}",
+            query={**url.query, "mode": "ro", "uri": "true"},
+        )
+        read_pool = {"pool_size": config.DB_READ_POOL_SIZE, "max_overflow": 0}
+
+        read_engine = _apply_profile(create_engine(
+            read_url, connect_args={"check_same_thread": False}, **read_pool
+        ), read_pragmas, PRODUCTION)
+        async_read_engine = create_async_engine(
+            read_url.set(drivername="sqlite+aiosqlite"), **read_pool
+        )
+        _apply_profile(async_read_engine.sync_engine, read_pragmas, PRODUCTION)
+    else:
+        read_engine = engine
+        async_read_engine = async_engine
+
+    SessionLocal.configure(bind=engine)
+    ReadSessionLocal.configure(bind=read_engine)
+    AsyncSessionLocal.configure(bind=async_engine)
+    AsyncReadSessionLocal.configure(bind=async_read_engine)
+
+    # Let the old pools go (close=False: sessions still using one of their
+    # connections finish undisturbed)
+    for old in previous:
+        old.dispose(close=False)
+    _configured_with = wanted
+    return True
+
+
+configure(settings)
 
 # 4. Create a "Base" class. Our data models (in models.py)
 # will "inherit" from this class. This is how SQLAlchemy's
 # magic works to connect our Python classes to database tables.
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
@@ -2,10 +2,18 @@
 
 # --- 1. Imports ---
 # We need to import all the tools our functions will use
-from fastapi import Depends, HTTPException, Request 
+import functools
+import hashlib
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from core import models, schemas as schemas, database, auth
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
+from core import models, schemas as schemas, database, auth, principals, response_cache, fast_json
+from core.config import settings
+from core.services import versions
 
 # --- 2. The "Policeman" ---
 # We move this here from main.py because get_current_user needs it
@@ -19,11 +27,39 @@ def get_db():
     finally:
         db.close()
 
+# --- 1b. Async Database Helpers (for the async routers) ---
+async def get_async_db():
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    """Session for GET endpoints: never writes, so in production it comes
+    from the read-only pool and doesn't wait behind the write connection."""
+    async with database.AsyncReadSessionLocal() as db:
+        yield db
+
+async def run_service(db: AsyncSession, service, *args, **kwargs):
+    """Awaits one of the core/services functions on an async session.
+
+    The service code stays written once, against a plain Session: run_sync
+    hands it the async session's sync facade, and every query/commit inside
+    is awaited through aiosqlite. That is not free of threads: aiosqlite
+    runs each connection on its own worker thread, so every statement is a
+    hop to that thread and back. What the event loop gains is that a
+    request waiting on the database doesn't hold a threadpool slot.
+    benchmarks/async_vs_sync.py measures it: the calendar feed is faster
+    this way, a single-query ledger page is slower (and querying the
+    AsyncSession natively, without run_sync, measures the same).
+    The session is passed as the `db=` keyword, so anything after `db` in
+    the service's signature must be passed by keyword too.
+    """
+    return await db.run_sync(lambda session: service(*args, db=session, **kwargs))
+
 # --- 2. The "Locksmith" Helper (UPDATED) ---
-def get_current_user(
+async def get_current_user(
     request: Request,  # We need the Request object to get cookies
-    db: Session = Depends(get_db)
-):
+    db: AsyncSession = Depends(get_async_read_db)
+) -> principals.Principal:
     # 1. Try to get the token from the "access_token" cookie
     token = request.cookies.get("access_token")
     
@@ -31,7 +67,13 @@ def get_current_user(
         # If no cookie, throw them out
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    # 2. Verify the token (Same logic as before)
+    # 2. Seen this token recently? Then we already verified it and loaded
+    # the user: no HMAC, no query (the session above never even connects).
+    cached = principals.cache.get(token)
+    if cached is not None:
+        return cached[1]
+
+    # 3. Verify the token (Same logic as before)
     payload = auth.verify_access_token(token)
     if payload is None:
         raise HTTPException(status_code=401, detail="Invalid token")
@@ -40,8 +82,113 @@ def get_current_user(
     if email is None:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = db.query(models.User).filter(models.User.email == email).first()
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    user = result.scalars().first()
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
 
-    return user
\ No newline at end of file
+    principal = principals.Principal.from_user(user)
+    principals.cache.put(token, payload, principal)
+    return principal
+
+# --- 3. Conditional GET (ETags) ---
+# Read endpoints declare which resource they show. Before the endpoint runs
+# we look up that resource's version for the user's company (one primary-key
+# read) and turn it into an ETag. If the browser already holds that ETag we
+# answer 304 right here: the endpoint's queries and response_model never run.
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110): W/"x" and "x" are the same tag
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in tags
+
+@functools.lru_cache(maxsize=None)  # one dependency per resource, so FastAPI runs it once per request
+def resource_etag(resource: str):
+    async def check_etag(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_async_read_db),
+        current_user: principals.Principal = Depends(get_current_user)
+    ) -> int:
+        version = await db.run_sync(
+            lambda session: versions.get_version(session, current_user.company_id, resource)
+        )
+        # Same version but a different user, role or query string is a
+        # different response, so those go into the tag too
+        variant = hashlib.sha1(
+            f"{settings.VERSION}|{current_user.id}|{current_user.role}|"
+            f"{request.url.path}?{request.url.query}".encode()
+        ).hexdigest()[:16]
+        etag = f'W/"{resource}-{current_user.company_id}-{version}-{variant}"'
+
+        # no-cache = "keep it, but ask us before using it"
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+        return version
+
+    return check_etag
+
+# --- 4. Response cache ---
+# For the heaviest reads the finished JSON is kept (core/response_cache.py).
+# The endpoint asks its slot for a hit first and only computes on a miss:
+#
+#     cached = cache.hit()
+#     if cached is not None:
+#         return cached
+#     ...
+#     return cache.store(schemas.SomeModel, data)
+@functools.lru_cache(maxsize=None)
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+class ResponseSlot:
+    def __init__(self, key: str, company_id: int, resource: str, response: Response):
+        self.key = key
+        self.company_id = company_id
+        self.resource = resource
+        self._response = response  # carries the ETag headers set above
+
+    def _build(self, body: bytes) -> Response:
+        headers = {k: v for k, v in self._response.headers.items() if k != "content-length"}
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def hit(self) -> Optional[Response]:
+        body = response_cache.cache.get(self.key)
+        return None if body is None else self._build(body)
+
+    def store(self, model, data) -> Response:
+        # What FastAPI would do with response_model, done here so the bytes
+        # can be kept: validate the service's objects, then dump JSON once
+        adapter = _adapter(model)
+        body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+        response_cache.cache.set(self.key, body, self.company_id, self.resource)
+        return self._build(body)
+
+    def store_trusted(self, payload) -> Response:
+        # Trusted output (core/fast_json.py): plain dicts straight from our
+        # own rows, already in the response_model's shape -- just encode
+        body = fast_json.dumps(payload)
+        response_cache.cache.set(self.key, body, self.company_id, self.resource)
+        return self._build(body)
+
+def cached_response(resource: str, per_user: bool = True):
+    """per_user=False: everyone with the same role in the company sees the
+    same answer, so they share one entry."""
+    async def response_slot(
+        request: Request,
+        response: Response,
+        version: int = Depends(resource_etag(resource)),
+        current_user: principals.Principal = Depends(get_current_user)
+    ) -> ResponseSlot:
+        key = response_cache.ResponseCache.make_key(
+            current_user.company_id, resource, version, current_user.role,
+            current_user.id if per_user else None, request.url.path, request.url.query
+        )
+        return ResponseSlot(key, current_user.company_id, resource, response)
+
+    return response_slot
@@ -0,0 +1,105 @@
+# intervals.py
+
+"""
+An in-memory interval index: "which of these [start, end) intervals overlap
+[a, b)?" without looking at the ones that don't.
+
+Items are tuples (start, end, key, ...) with a unique, hashable key (adding
+an item whose key is already there replaces the old one). They are kept
+sorted by start, with a tree of the latest end over that order: a lookup
+bisects to the items that start before b, and only walks down the
+subtrees whose latest end is after a. That reads O(log n) nodes per match
+(O(log n + k) for the usual short, mostly disjoint calendar events) instead
+of every item.
+
+add()/remove() don't rebuild the tree: additions wait in a side list that
+lookups scan, removals are tombstones, and both are folded in with one
+rebuild once they pile up (REBUILD_RATIO of the tree, at least REBUILD_MIN).
+"""
+
+from bisect import bisect_left
+from datetime import datetime
+from operator import itemgetter
+from typing import Hashable, Iterable, List, Tuple
+
+REBUILD_MIN = 64
+REBUILD_RATIO = 8  # pending changes > size / REBUILD_RATIO -> rebuild
+
+
+class IntervalIndex:
+    def __init__(self, items: Iterable[Tuple] = ()):
+        self._build(list(items))
+
+    def _build(self, items: List[Tuple]):
+        items.sort(key=itemgetter(0))
+        self._items = items
+        self._keys = {item[2] for item in items}
+        self._starts = [item[0] for item in items]
+
+        # Max-end tree: leaves are the items' ends in start order, every
+        # parent holds the larger end of its two children.
+        size = 1
+        while size < len(items):
+            size *= 2
+        tree = [datetime.min] * (2 * size)
+        for i, item in enumerate(items):
+            tree[size + i] = item[1]
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._size = size
+        self._tree = tree
+
+        self._added: List[Tuple] = []
+        self._removed = set()
+
+    def __len__(self) -> int:
+        return len(self._items) - len(self._removed) + len(self._added)
+
+    # --- 1. CHANGES ---
+
+    def add(self, item: Tuple):
+        # The tree's copy stays tombstoned: lookups filter it out before they
+        # look at the additions, so the new item is the only one they see
+        self._forget(item[2])
+        self._added.append(item)
+        self._maybe_rebuild()
+
+    def remove(self, key: Hashable):
+        self._forget(key)
+        self._maybe_rebuild()
+
+    def _forget(self, key: Hashable):
+        self._added = [item for item in self._added if item[2] != key]
+        if key in self._keys:
+            self._removed.add(key)
+
+    def _maybe_rebuild(self):
+        pending = len(self._added) + len(self._removed)
+        if pending > max(REBUILD_MIN, len(self._items) // REBUILD_RATIO):
+            self._build([item for item in self._items if item[2] not in self._removed] + self._added)
+
+    # --- 2. LOOKUPS ---
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Tuple]:
+        """Items with item.start < end and item.end > start, by start."""
+        found: List[Tuple] = []
+        limit = bisect_left(self._starts, end)
+        # Walk the tree over positions [0, limit): skip subtrees that end too early
+        stack = [(1, 0, self._size)] if limit else []
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= limit or self._tree[node] <= start:
+                continue
+            if hi - lo == 1:
+                found.append(self._items[lo])
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+
+        if self._removed:
+            found = [item for item in found if item[2] not in self._removed]
+        if self._added:
+            found.extend(item for item in self._added if item[0] < end and item[1] > start)
+            found.sort(key=itemgetter(0))
+        return found
@@ -0,0 +1,136 @@
+# manage.py
+
+"""
+Command line entry point for maintenance jobs.
+
+    python -m core.manage migrate        # create / upgrade the database schema
+    python -m core.manage check-plans    # fail if a service query scans a large table
+    python -m core.manage rebuild-rollups [--company ID]   # backfill the finance rollup
+    python -m core.manage check-rollups [--company ID]     # compare rollup vs ledger
+    python -m core.manage rebuild-search # refill the full-text search index
+    python -m core.manage compact-changes # drop superseded change-log rows
+    python -m core.manage build-assets   # write the hashed, gzipped static files
+"""
+
+import argparse
+import sys
+
+from core.config import configure
+
+
+# --- 1. COMMANDS ---
+# Each command imports what it needs itself: the settings (with .env) are
+# loaded first, in main(), and the database reads them when imported.
+
+def cmd_migrate(args) -> int:
+    from core import database, migrations
+
+    applied = migrations.upgrade(database.engine)
+    if applied:
+        print(f"Applied migrations: {', '.join(str(v) for v in applied)}")
+    else:
+        print("Database schema is up to date.")
+    return 0
+
+
+def cmd_check_plans(args) -> int:
+    # Imported here so `migrate` doesn't pay for the services it never runs
+    from core.query_plans import check_query_plans
+
+    failures = check_query_plans()
+    for failure in failures:
+        print(f"SCAN  {failure}")
+    if failures:
+        print(f"{len(failures)} query plan(s) scan a large table.")
+        return 1
+    print("All service queries use an index.")
+    return 0
+
+
+def cmd_rebuild_rollups(args) -> int:
+    from core import database
+    from core.services import finance as finance_service
+
+    with database.SessionLocal() as db:
+        rows = finance_service.rebuild_rollups(db, args.company)
+    print(f"Rebuilt {rows} daily rollup row(s).")
+    return 0
+
+
+def cmd_check_rollups(args) -> int:
+    from core import database
+    from core.services import finance as finance_service
+
+    with database.SessionLocal() as db:
+        problems = finance_service.check_rollups(db, args.company)
+    for p in problems:
+        print(f"MISMATCH  company={p['company_id']} day={p['day']} {p['type']}/{p['category']}: "
+              f"rollup={p['actual']} ledger={p['expected']}")
+    if problems:
+        print(f"{len(problems)} rollup row(s) disagree with the ledger; run rebuild-rollups.")
+        return 1
+    print("Finance rollups match the ledger.")
+    return 0
+
+
+def cmd_rebuild_search(args) -> int:
+    from core import database
+    from core.services import search as search_service
+
+    with database.SessionLocal() as db:
+        documents = search_service.rebuild_search_index(db)
+    print(f"Indexed {documents} document(s) for search.")
+    return 0
+
+
+def cmd_compact_changes(args) -> int:
+    from core import database
+    from core.services import sync as sync_service
+
+    with database.SessionLocal() as db:
+        deleted = sync_service.compact_change_log(db)
+    print(f"Removed {deleted} superseded change-log row(s).")
+    return 0
+
+
+def cmd_build_assets(args) -> int:
+    from core import assets
+
+    manifest = assets.build()
+    print(f"Built {len(manifest)} static asset(s) into {assets.STATIC_DIR}/{assets.DIST}.")
+    return 0
+
+
+def _company_option(parser):
+    parser.add_argument("--company", type=int, default=None, help="Only this company id")
+
+
+COMMANDS = {
+    "migrate": (cmd_migrate, "Create or upgrade the database schema", None),
+    "check-plans": (cmd_check_plans, "Fail if a service query scans a large table", None),
+    "rebuild-rollups": (cmd_rebuild_rollups, "Recompute the daily finance rollup", _company_option),
+    "check-rollups": (cmd_check_rollups, "Compare the finance rollup with the ledger", _company_option),
+    "rebuild-search": (cmd_rebuild_search, "Refill the full-text search index", None),
+    "compact-changes": (cmd_compact_changes, "Drop change-log rows a later change supersedes", None),
+    "build-assets": (cmd_build_assets, "Write the fingerprinted, precompressed static files", None),
+}
+
+
+# --- 2. ARGUMENT PARSING ---
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.manage")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text, add_options) in COMMANDS.items():
+        command_parser = sub.add_parser(name, help=help_text)
+        if add_options:
+            add_options(command_parser)
+
+    args = parser.parse_args(argv)
+    configure()
+    handler = COMMANDS[args.command][0]
+    return handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+# migrations.py
+
+"""
+Versioned schema migrations.
+
+Every change to the shape of the database is a numbered step in MIGRATIONS.
+`upgrade()` remembers which steps already ran (in the `schema_migrations`
+table) and only applies the new ones, so an old app.db catches up with the
+models instead of silently missing indexes and columns that `create_all`
+would never add to a table that already exists.
+
+Run it with:  python -m core.manage migrate
+"""
+
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, insert, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core import models
+
+# --- 1. BOOKKEEPING TABLE ---
+# Lives outside models.Base on purpose: it describes the schema, not the app.
+_meta = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+# --- 2. THE STEPS ---
+# Each step must be safe to run against a database that already has some of
+# its objects. A step only touches the schema as it was at its own version:
+# it must not read today's models for tables or columns a later step adds,
+# or an old app.db would fail halfway through its upgrade. Steps 1, 2, 6 and
+# 8 therefore spell out their DDL instead of reading it from core/models.py.
+
+# The schema the app shipped with, before there were migrations
+_BASE_TABLES = (
+    """CREATE TABLE IF NOT EXISTS companies (
+        id INTEGER NOT NULL, name VARCHAR NOT NULL, company_code VARCHAR NOT NULL,
+        PRIMARY KEY (id))""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_companies_company_code ON companies (company_code)",
+    "CREATE INDEX IF NOT EXISTS ix_companies_id ON companies (id)",
+    """CREATE TABLE IF NOT EXISTS users (
+        id INTEGER NOT NULL, email VARCHAR NOT NULL, hashed_password VARCHAR NOT NULL,
+        role VARCHAR NOT NULL, company_id INTEGER,
+        PRIMARY KEY (id), FOREIGN KEY(company_id) REFERENCES companies (id))""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+    "CREATE INDEX IF NOT EXISTS ix_users_id ON users (id)",
+    """CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER NOT NULL, title VARCHAR NOT NULL, status VARCHAR(7) NOT NULL,
+        due_date DATETIME NOT NULL, owner_id INTEGER, assignee_id INTEGER, company_id INTEGER,
+        PRIMARY KEY (id), FOREIGN KEY(owner_id) REFERENCES users (id),
+        FOREIGN KEY(assignee_id) REFERENCES users (id), FOREIGN KEY(company_id) REFERENCES companies (id))""",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_id ON tasks (id)",
+    """CREATE TABLE IF NOT EXISTS events (
+        id INTEGER NOT NULL, title VARCHAR, start_time DATETIME, end_time DATETIME,
+        place VARCHAR, notes VARCHAR, calendar_type VARCHAR, company_id INTEGER, owner_id INTEGER,
+        PRIMARY KEY (id), FOREIGN KEY(company_id) REFERENCES companies (id),
+        FOREIGN KEY(owner_id) REFERENCES users (id))""",
+    "CREATE INDEX IF NOT EXISTS ix_events_id ON events (id)",
+    """CREATE TABLE IF NOT EXISTS transactions (
+        id INTEGER NOT NULL, amount NUMERIC(10, 2) NOT NULL, type VARCHAR NOT NULL,
+        category VARCHAR NOT NULL, date DATETIME NOT NULL, notes VARCHAR, company_id INTEGER, user_id INTEGER,
+        PRIMARY KEY (id), FOREIGN KEY(company_id) REFERENCES companies (id),
+        FOREIGN KEY(user_id) REFERENCES users (id))""",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_id ON transactions (id)",
+    """CREATE TABLE IF NOT EXISTS notebooks (
+        id INTEGER NOT NULL, name VARCHAR NOT NULL, cover VARCHAR, company_id INTEGER, owner_id INTEGER,
+        PRIMARY KEY (id), FOREIGN KEY(company_id) REFERENCES companies (id),
+        FOREIGN KEY(owner_id) REFERENCES users (id))""",
+    "CREATE INDEX IF NOT EXISTS ix_notebooks_id ON notebooks (id)",
+    """CREATE TABLE IF NOT EXISTS notes (
+        id INTEGER NOT NULL, title VARCHAR, type VARCHAR, content VARCHAR, color VARCHAR,
+        created_at DATETIME, updated_at DATETIME, notebook_id INTEGER,
+        PRIMARY KEY (id), FOREIGN KEY(notebook_id) REFERENCES notebooks (id))""",
+    "CREATE INDEX IF NOT EXISTS ix_notes_id ON notes (id)",
+)
+
+# (company/user, filter, sort) -- one per service query shape
+_TENANT_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_users_company_role ON users (company_id, role)",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_company_due ON tasks (company_id, due_date)",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_assignee_due ON tasks (assignee_id, due_date)",
+    "CREATE INDEX IF NOT EXISTS ix_events_company_type_end ON events (company_id, calendar_type, end_time)",
+    "CREATE INDEX IF NOT EXISTS ix_events_owner_type_end ON events (owner_id, calendar_type, end_time)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_company_type_date ON transactions (company_id, type, date)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_company_date ON transactions (company_id, date)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_user_date ON transactions (user_id, date)",
+    "CREATE INDEX IF NOT EXISTS ix_notebooks_company ON notebooks (company_id)",
+    "CREATE INDEX IF NOT EXISTS ix_notes_notebook_created ON notes (notebook_id, created_at)",
+)
+
+def _create_base_tables(conn: Connection):
+    """The original tables (users, companies, events, tasks, ...)."""
+    for ddl in _BASE_TABLES:
+        conn.exec_driver_sql(ddl)
+
+
+def _create_tenant_indexes(conn: Connection):
+    """Composite indexes behind every company/user-scoped service query."""
+    for ddl in _TENANT_INDEXES:
+        conn.exec_driver_sql(ddl)
+
+
+def _create_finance_rollups(conn: Connection):
+    """Daily finance rollup table, backfilled from the existing ledger."""
+    from core.services import finance as finance_service
+
+    models.FinanceDailyRollup.__table__.create(bind=conn, checkfirst=True)
+    with Session(bind=conn) as db:
+        finance_service.rebuild_rollups(db)
+
+
+def _create_checklist_items(conn: Connection):
+    """One row per checklist box, converted from the JSON kept in notes.content."""
+    from fastapi import HTTPException
+    from core.services import notebooks as notebook_service
+
+    table = models.ChecklistItem.__table__
+    table.create(bind=conn, checkfirst=True)
+    for index in table.indexes:
+        index.create(bind=conn, checkfirst=True)
+
+    with Session(bind=conn) as db:
+        checklists = db.query(models.Note).filter(
+            models.Note.type == "checklist", models.Note.content.isnot(None)
+        ).all()
+        for note in checklists:
+            try:
+                entries = notebook_service.parse_checklist_content(note.content)
+            except HTTPException:
+                continue  # not valid JSON: leave the text where it is
+            notebook_service.replace_checklist_items(note, entries)
+        db.commit()
+
+
+def _create_resource_versions(conn: Connection):
+    """Per-company change counters behind the ETags on read endpoints."""
+    models.ResourceVersion.__table__.create(bind=conn, checkfirst=True)
+
+
+def _add_transaction_content_hash(conn: Connection):
+    """Statement-import fingerprint column and its per-company unique index."""
+    columns = {column["name"] for column in inspect(conn).get_columns("transactions")}
+    if "content_hash" not in columns:
+        conn.exec_driver_sql("ALTER TABLE transactions ADD COLUMN content_hash VARCHAR")
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_transactions_company_hash ON transactions (company_id, content_hash)"
+    )
+
+
+def _create_search_index(conn: Connection):
+    """FTS5 search index over notes/events/tasks/transactions, its triggers, and a backfill."""
+    from core.services import search as search_service
+
+    search_service.create_search_index(conn)
+
+
+def _add_event_recurrence(conn: Connection):
+    """Recurring event columns, the series indexes, and the exceptions table."""
+    columns = {column["name"] for column in inspect(conn).get_columns("events")}
+    if "rrule" not in columns:
+        conn.exec_driver_sql("ALTER TABLE events ADD COLUMN rrule VARCHAR")
+    if "series_end" not in columns:
+        conn.exec_driver_sql("ALTER TABLE events ADD COLUMN series_end DATETIME")
+    # Partial: only series masters, which the feed reads by start, not end
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_events_company_type_series "
+        "ON events (company_id, calendar_type, start_time) WHERE rrule IS NOT NULL"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_events_owner_type_series "
+        "ON events (owner_id, calendar_type, start_time) WHERE rrule IS NOT NULL"
+    )
+
+    table = models.EventException.__table__
+    table.create(bind=conn, checkfirst=True)
+    for index in table.indexes:
+        index.create(bind=conn, checkfirst=True)
+
+
+def _create_change_log(conn: Connection):
+    """Change log behind /api/sync, backfilled with every existing row."""
+    from core.services import sync as sync_service
+
+    table = models.ChangeLog.__table__
+    table.create(bind=conn, checkfirst=True)
+    for index in table.indexes:
+        index.create(bind=conn, checkfirst=True)
+    sync_service.backfill_change_log(conn)
+
+
+# (version, name, step) -- append only, never renumber
+MIGRATIONS = [
+    (1, "base tables", _create_base_tables),
+    (2, "tenant-scoped composite indexes", _create_tenant_indexes),
+    (3, "daily finance rollups", _create_finance_rollups),
+    (4, "normalized checklist items", _create_checklist_items),
+    (5, "resource versions", _create_resource_versions),
+    (6, "transaction content hashes", _add_transaction_content_hash),
+    (7, "full-text search index", _create_search_index),
+    (8, "recurring events", _add_event_recurrence),
+    (9, "change log", _create_change_log),
+]
+
+
+# --- 3. RUNNER ---
+
+def applied_versions(engine: Engine) -> List[int]:
+    """Versions already recorded in schema_migrations (creating it if needed)."""
+    with engine.begin() as conn:
+        schema_migrations.create(bind=conn, checkfirst=True)
+        return list(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_migrations(engine: Engine):
+    done = set(applied_versions(engine))
+    return [m for m in MIGRATIONS if m[0] not in done]
+
+
+def upgrade(engine: Engine) -> List[int]:
+    """Applies every pending step, each in its own transaction.
+
+    Returns the versions that were applied by this call.
+    """
+    applied = []
+    for version, name, step in pending_migrations(engine):
+        try:
+            with engine.begin() as conn:
+                step(conn)
+                conn.execute(insert(schema_migrations).values(
+                    version=version, name=name, applied_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Another worker booted at the same time and recorded this step first
+            continue
+        applied.append(version)
+    return applied
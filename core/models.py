@@ -1,6 +1,6 @@
 # models.py
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Numeric
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Enum, Numeric, Index, text
 from sqlalchemy.orm import relationship
 from core.database import Base
 import enum
@@ -37,6 +37,11 @@ class User(Base):
     company_id = Column(Integer, ForeignKey("companies.id"))
     
     company = relationship("Company", back_populates="users")
+
+    # "Who works here?" lookups (employee dropdowns)
+    __table_args__ = (
+        Index("ix_users_company_role", "company_id", "role"),
+    )
     
     # --- UPDATED: Personal Events die with the User ---
     events = relationship("Event", back_populates="owner", cascade="all, delete-orphan")
@@ -67,6 +72,12 @@ class Task(Base):
     task_creator = relationship("User", back_populates="created_tasks", foreign_keys=[owner_id])
     assignee = relationship("User", back_populates="assigned_tasks", foreign_keys=[assignee_id])
 
+    # Calendar feed windows: "tasks due between X and Y" for a company / an assignee
+    __table_args__ = (
+        Index("ix_tasks_company_due", "company_id", "due_date"),
+        Index("ix_tasks_assignee_due", "assignee_id", "due_date"),
+    )
+
 
 class Event(Base):
     __tablename__ = "events"
@@ -90,6 +101,53 @@ class Event(Base):
     
     owner = relationship("User", back_populates="events")
 
+    # Recurring events: one row per series (see core/recurrence.py).
+    # start_time/end_time are the first occurrence; series_end is when the
+    # last one ends (NULL = repeats forever).
+    rrule = Column(String, nullable=True)
+    series_end = Column(DateTime, nullable=True)
+
+    # Moved or cancelled occurrences of this series
+    exceptions = relationship("EventException", back_populates="event", cascade="all, delete-orphan")
+
+    # Calendar feed windows: general events per company, personal events per owner.
+    # Series can't be found by end_time (they repeat past it), so they get
+    # their own small partial indexes.
+    __table_args__ = (
+        Index("ix_events_company_type_end", "company_id", "calendar_type", "end_time"),
+        Index("ix_events_owner_type_end", "owner_id", "calendar_type", "end_time"),
+        Index("ix_events_company_type_series", "company_id", "calendar_type", "start_time",
+              sqlite_where=text("rrule IS NOT NULL")),
+        Index("ix_events_owner_type_series", "owner_id", "calendar_type", "start_time",
+              sqlite_where=text("rrule IS NOT NULL")),
+    )
+
+
+class EventException(Base):
+    """One occurrence of a recurring event that was cancelled or changed.
+
+    original_start is where the series put the occurrence; the other
+    columns, when set, override the series' values for it.
+    """
+    __tablename__ = "event_exceptions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    original_start = Column(DateTime, nullable=False)
+    cancelled = Column(Boolean, nullable=False, default=False)
+
+    title = Column(String, nullable=True)
+    start_time = Column(DateTime, nullable=True)
+    end_time = Column(DateTime, nullable=True)
+    place = Column(String, nullable=True)
+    notes = Column(String, nullable=True)
+
+    event = relationship("Event", back_populates="exceptions")
+
+    __table_args__ = (
+        Index("ux_event_exceptions_event_start", "event_id", "original_start", unique=True),
+    )
+
 
 class Transaction(Base):
     __tablename__ = "transactions"
@@ -104,6 +162,11 @@ class Transaction(Base):
     category = Column(String, nullable=False) # e.g., "Food", "Salary"
     date = Column(DateTime, nullable=False)
     notes = Column(String, nullable=True)
+
+    # Set by the statement importer: a fingerprint of the bank's row, so a
+    # re-imported (overlapping) statement skips what is already here.
+    # NULL for transactions entered by hand.
+    content_hash = Column(String, nullable=True)
     
     # --- Relationships ---
     # We link every transaction to a Company AND a User
@@ -113,7 +176,70 @@ class Transaction(Base):
     owner = relationship("User")
     company = relationship("Company")
 
+    # Dashboard sums (company + type), the company ledger and reports (company + date),
+    # and an employee's own expenses (user + date)
+    __table_args__ = (
+        Index("ix_transactions_company_type_date", "company_id", "type", "date"),
+        Index("ix_transactions_company_date", "company_id", "date"),
+        Index("ix_transactions_user_date", "user_id", "date"),
+        Index("ux_transactions_company_hash", "company_id", "content_hash", unique=True),
+    )
+
+
+# --- NEW: Daily Finance Rollup ---
+# One row per company, per day, per type, per category, kept up to date by
+# the finance service in the same DB transaction as the Transaction itself.
+# The dashboard and summary read these (days x categories rows) instead of
+# re-adding every transaction.
+class FinanceDailyRollup(Base):
+    __tablename__ = "finance_daily_rollups"
+
+    company_id = Column(Integer, ForeignKey("companies.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    type = Column(String, primary_key=True) # "income" or "expense"
+    category = Column(String, primary_key=True)
 
+    # Whole cents, so repeated += never drifts the way float sums do
+    total_cents = Column(Integer, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+
+
+# --- CHANGE VERSIONS ---
+# One counter per company and resource ("calendar", "finance", "notebooks"),
+# bumped in the same transaction as every write to that resource. Readers
+# use it as an ETag: same version, same data, nothing to send.
+class ResourceVersion(Base):
+    __tablename__ = "resource_versions"
+
+    company_id = Column(Integer, ForeignKey("companies.id"), primary_key=True)
+    resource = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+
+# --- CHANGE LOG ---
+# One row per write to an event, task, note, notebook or transaction (see
+# core/services/changes.py), numbered by `seq`. SQLite lets one transaction
+# write at a time, so seq order is commit order: a client that has seen
+# everything up to seq N only ever needs the rows after N (/api/sync).
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+
+    seq = Column(Integer, primary_key=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=True)
+    entity = Column(String, nullable=False) # "event", "task", "note", "notebook", "transaction"
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False) # "upsert", or "delete" (a tombstone)
+    # Who may see it: the tokens of core/broker.py, space separated
+    audience = Column(String, nullable=False)
+
+    # A company's changes after a cursor. AUTOINCREMENT: a seq is never
+    # handed out twice, even after compaction deleted the row that had it.
+    __table_args__ = (
+        Index("ix_change_log_company_seq", "company_id", "seq"),
+        {"sqlite_autoincrement": True},
+    )
 
 
 # --- NOTEBOOK AGENT MODELS ---
@@ -137,6 +263,10 @@ class Notebook(Base):
     # Cascade Delete: If you burn the notebook, the notes inside burn too.
     notes = relationship("Note", back_populates="notebook", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_notebooks_company", "company_id"),
+    )
+
 
 class Note(Base):
     __tablename__ = "notes"
@@ -147,7 +277,8 @@ class Note(Base):
     # "type" tells the frontend if it should draw a Text box or a Checklist
     type = Column(String, default="text") # 'text', 'checklist', 'photo'
     
-    # This stores the actual data (simple text or JSON string for checklists)
+    # This stores the actual data for text notes. Checklists keep theirs
+    # in checklist_items (one row per box), not here.
     content = Column(String, nullable=True)
     
     # Visuals
@@ -159,4 +290,43 @@ class Note(Base):
 
     # Links
     notebook_id = Column(Integer, ForeignKey("notebooks.id"))
-    notebook = relationship("Notebook", back_populates="notes")
\ No newline at end of file
+    notebook = relationship("Notebook", back_populates="notes")
+
+    # Checklist boxes, in order. "selectin": whenever notes are loaded, their
+    # items come along in one extra query (never one per note, never lazily
+    # while a response is being serialized).
+    items = relationship(
+        "ChecklistItem", back_populates="note", cascade="all, delete-orphan",
+        order_by="(ChecklistItem.position, ChecklistItem.id)", lazy="selectin"
+    )
+
+    # Notes of a notebook, newest first
+    __table_args__ = (
+        Index("ix_notes_notebook_created", "notebook_id", "created_at"),
+    )
+
+    @property
+    def progress(self):
+        """{"done", "total"} for checklists, None for other notes."""
+        if self.type != "checklist":
+            return None
+        return {"done": sum(1 for item in self.items if item.done), "total": len(self.items)}
+
+
+class ChecklistItem(Base):
+    __tablename__ = "checklist_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    note_id = Column(Integer, ForeignKey("notes.id"), nullable=False)
+
+    # Sort key within the note. Gaps are fine (deleting leaves them); two
+    # items with the same position fall back to id order.
+    position = Column(Integer, nullable=False, default=0)
+    text = Column(String, nullable=False)
+    done = Column(Boolean, nullable=False, default=False)
+
+    note = relationship("Note", back_populates="items")
+
+    __table_args__ = (
+        Index("ix_checklist_items_note_position", "note_id", "position"),
+    )
@@ -0,0 +1,88 @@
+# pages.py
+
+"""
+The HTML pages, rendered once.
+
+The page templates don't depend on the request: who is logged in and what
+they see is fetched by the page's script, and the canvas reads its notebook
+id from the URL. So each page is rendered once, on its first request,
+together with its precompressed variants (gzip, plus brotli/zstd when
+installed); every later request is a dictionary lookup. The Jinja
+environments are only created then too, so a booting worker doesn't pay
+for pages nobody has asked for yet.
+
+Each page has a strong ETag (a hash of its HTML; the compressed variants
+get their own suffixed tag). Pages are sent with Cache-Control: no-cache,
+so the browser checks back every time and gets a 304 while the page hasn't
+changed -- it changes when a deploy changes a template or an asset's hashed
+name, which is when the app restarts and renders again.
+
+Rendering links the hashed asset names, so assets.build() has to have run
+first (create_app does it before serving).
+"""
+
+import hashlib
+from typing import Dict
+
+from fastapi import Request
+from fastapi.responses import Response
+from fastapi.templating import Jinja2Templates
+
+from core import assets
+from core.compression import ENCODINGS, compressor
+
+# Done once per page, so the smallest output is worth the CPU
+PRECOMPRESS_LEVELS = {"zstd": 19, "br": 11, "gzip": 9}
+
+
+class Page:
+    __slots__ = ("etag", "tags", "variants")
+
+    def __init__(self, html: str):
+        body = html.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:20]
+        self.etag = f'"{digest}"'
+        # encoding (None = as is) -> (body, etag)
+        self.variants = {None: (body, self.etag)}
+        for encoding in ENCODINGS:
+            c = compressor(encoding, PRECOMPRESS_LEVELS[encoding])
+            compressed = c.compress(body) + c.finish()
+            if len(compressed) < len(body):
+                self.variants[encoding] = (compressed, f'"{digest}-{encoding}"')
+        # A tag of any variant means the browser has this version of the page
+        self.tags = {etag for _, etag in self.variants.values()}
+
+
+class PageShells:
+    def __init__(self, directories: Dict[str, str]):
+        self._directories = directories  # template name -> its templates directory
+        self._templates: Dict[str, Jinja2Templates] = {}
+        self._pages: Dict[str, Page] = {}
+
+    def render(self, name: str) -> Page:
+        """Renders `name` and keeps the result."""
+        directory = self._directories[name]
+        templates = self._templates.get(directory)
+        if templates is None:
+            templates = self._templates[directory] = Jinja2Templates(directory=directory)
+            assets.install(templates)
+        page = self._pages[name] = Page(templates.get_template(name).render())
+        return page
+
+    def response(self, name: str, request: Request) -> Response:
+        page = self._pages.get(name) or self.render(name)
+        encoding = assets.preferred_encoding(
+            request.headers.get("accept-encoding", ""), [e for e in page.variants if e is not None]
+        )
+        body, etag = page.variants[encoding]
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if "*" in tags or not tags.isdisjoint(page.tags):
+                return Response(status_code=304, headers=headers)
+
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="text/html", headers=headers)
@@ -0,0 +1,119 @@
+# principals.py
+
+"""
+In-process cache of "who is calling".
+
+get_current_user used to verify the JWT (one HMAC) and SELECT the user on
+every single request. Now the first request with a token does that work and
+the result -- the decoded payload plus a small read-only snapshot of the
+user -- is remembered per token, until the earlier of the token's `exp` and
+PRINCIPAL_CACHE_TTL_SECONDS. The cache is bounded (least recently used
+entries go first) and lives in each worker process.
+
+Anything that changes who a user is must call one of the invalidation
+hooks below, so the next request re-reads the user from the database:
+
+    invalidate_user(user_id)        role change, password change, deletion
+    invalidate_company(company_id)  company-wide changes / company deletion
+    forget_token(token)             logout
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from core.config import settings
+
+
+# --- 1. THE PRINCIPAL ---
+# Everything the routers and services read from `current_user`.
+# It is not attached to any DB session, so it is safe to share across requests.
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    role: str
+    company_id: Optional[int]
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(id=user.id, email=user.email, role=user.role, company_id=user.company_id)
+
+
+# --- 2. THE CACHE ---
+class PrincipalCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # token -> (expires_at, payload, principal), oldest first
+        self._entries: "OrderedDict[str, Tuple[float, dict, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Tuple[dict, Principal]]:
+        """(payload, principal) for a token we've already verified, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, payload, principal = entry
+            if expires_at <= now:
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return payload, principal
+
+    def put(self, token: str, payload: dict, principal: Principal):
+        expires_at = time.time() + self.ttl_seconds
+        # Never outlive the token itself
+        if payload.get("exp") is not None:
+            expires_at = min(expires_at, float(payload["exp"]))
+
+        with self._lock:
+            self._entries[token] = (expires_at, payload, principal)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _drop(self, matches):
+        with self._lock:
+            stale = [t for t, (_, _, p) in self._entries.items() if matches(p)]
+            for token in stale:
+                del self._entries[token]
+
+    def invalidate_user(self, user_id: int):
+        self._drop(lambda p: p.id == user_id)
+
+    def invalidate_company(self, company_id: int):
+        self._drop(lambda p: p.company_id == company_id)
+
+    def forget_token(self, token: str):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def configure(config):
+    """Applies `config`'s limits to the cache (the same object: the hooks
+    below are bound to it)."""
+    cache.max_entries = config.PRINCIPAL_CACHE_MAX_ENTRIES
+    cache.ttl_seconds = config.PRINCIPAL_CACHE_TTL_SECONDS
+
+# --- 3. INVALIDATION HOOKS ---
+invalidate_user = cache.invalidate_user
+invalidate_company = cache.invalidate_company
+forget_token = cache.forget_token
@@ -0,0 +1,398 @@
+# query_plans.py
+
+"""
+Query-plan regression guard.
+
+Seeds a throwaway SQLite database, runs every function in core/services/
+against it, and asks SQLite (EXPLAIN QUERY PLAN) how it executed each
+SELECT those functions sent. A full SCAN of one of the large tables means a
+tenant-scoped lookup lost its index, and is reported as a failure.
+
+Run it with:  python -m core.manage check-plans
+"""
+
+import asyncio
+import io
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, List, Tuple
+
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from core import auth, migrations, models, schemas
+from core.services import events as event_service
+from core.services import finance as finance_service
+from core.services import freebusy as freebusy_service
+from core.services import notebooks as notebook_service
+from core.services import search as search_service
+from core.services import sync as sync_service
+from core.services import tasks as task_service
+from core.services import users as user_service
+from core.services import versions
+
+# Tables that grow with a company's lifetime; scanning any of them is a bug.
+LARGE_TABLES = {"users", "events", "tasks", "transactions", "notebooks", "notes",
+                "finance_daily_rollups", "checklist_items", "resource_versions",
+                "event_exceptions", "change_log"}
+
+SEED_COMPANIES = 2
+SEED_EMPLOYEES = 20
+SEED_ROWS = 2000  # per large table, per company
+
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+# FTS5 tables are always "SCAN ... VIRTUAL TABLE"; the index string has an
+# M when the scan is driven by a MATCH, and without one it reads every document.
+FTS_TABLES = {"search_index"}
+_VIRTUAL_SCAN = re.compile(r"^SCAN (\w+) VIRTUAL TABLE INDEX \d+:(\S*)")
+
+
+# --- 1. SEEDING ---
+
+def _seed(db):
+    """Fills the database with a few busy companies and returns their owners/employees."""
+    password = auth.hash_password("password")
+    start = datetime(2020, 1, 1, 9, 0)
+    people = []
+
+    for c in range(SEED_COMPANIES):
+        company = models.Company(name=f"Company {c}", company_code=f"SEED{c:02d}")
+        db.add(company)
+        db.flush()
+
+        owner = models.User(email=f"owner{c}@seed.test", hashed_password=password,
+                            role="owner", company_id=company.id)
+        employees = [
+            models.User(email=f"emp{c}-{e}@seed.test", hashed_password=password,
+                        role="employee", company_id=company.id)
+            for e in range(SEED_EMPLOYEES)
+        ]
+        db.add_all([owner] + employees)
+        db.flush()
+        staff = [owner] + employees
+
+        notebook_rows = [
+            {"name": f"Notebook {i}", "cover": "blue", "company_id": company.id, "owner_id": owner.id}
+            for i in range(SEED_ROWS // 20)
+        ]
+        db.execute(insert(models.Notebook), notebook_rows)
+        notebook_ids = [n.id for n in db.query(models.Notebook.id).filter(
+            models.Notebook.company_id == company.id
+        )]
+
+        db.execute(insert(models.Event), [
+            {
+                "title": f"Event {i}",
+                "start_time": start + timedelta(hours=6 * i),
+                "end_time": start + timedelta(hours=6 * i + 1),
+                "calendar_type": "general" if i % 2 else "personal",
+                "company_id": company.id,
+                "owner_id": None if i % 2 else staff[i % len(staff)].id,
+            }
+            for i in range(SEED_ROWS)
+        ])
+        # Weekly series with a hundred changed occurrences each (every fourth cancelled)
+        db.execute(insert(models.Event), [
+            {
+                "title": f"Series {i}",
+                "start_time": start + timedelta(days=i),
+                "end_time": start + timedelta(days=i, hours=1),
+                "calendar_type": "general" if i % 2 else "personal",
+                "company_id": company.id,
+                "owner_id": None if i % 2 else staff[i % len(staff)].id,
+                "rrule": "FREQ=WEEKLY",
+            }
+            for i in range(SEED_ROWS // 100)
+        ])
+        db.execute(insert(models.EventException), [
+            {"event_id": series.id, "original_start": series.start_time + timedelta(weeks=week),
+             "cancelled": week % 4 == 3, "title": f"Changed {week}"}
+            for series in db.query(models.Event.id, models.Event.start_time).filter(
+                models.Event.company_id == company.id, models.Event.rrule.isnot(None)
+            )
+            for week in range(100)
+        ])
+        db.execute(insert(models.Task), [
+            {
+                "title": f"Task {i}",
+                "status": models.TaskStatus.to_do,
+                "due_date": start + timedelta(hours=6 * i),
+                "owner_id": owner.id,
+                "assignee_id": employees[i % len(employees)].id,
+                "company_id": company.id,
+            }
+            for i in range(SEED_ROWS)
+        ])
+        db.execute(insert(models.Transaction), [
+            {
+                "amount": 10 + i % 90,
+                "type": "income" if i % 5 == 0 else "expense",
+                "category": ["Food", "Transport", "Supplies", "Bills"][i % 4],
+                "date": start + timedelta(hours=6 * i),
+                "company_id": company.id,
+                "user_id": staff[i % len(staff)].id,
+            }
+            for i in range(SEED_ROWS)
+        ])
+        db.execute(insert(models.Note), [
+            {
+                "title": f"Note {i}",
+                "type": "text" if i % 2 else "checklist",
+                "content": "Lorem ipsum",
+                "color": "white",
+                "created_at": start + timedelta(hours=i),
+                "updated_at": start + timedelta(hours=i),
+                "notebook_id": notebook_ids[i % len(notebook_ids)],
+            }
+            for i in range(SEED_ROWS)
+        ])
+        checklist_ids = [n.id for n in db.query(models.Note.id).join(models.Notebook).filter(
+            models.Notebook.company_id == company.id, models.Note.type == "checklist"
+        )]
+        db.execute(insert(models.ChecklistItem), [
+            {
+                "note_id": checklist_ids[i % len(checklist_ids)],
+                "position": i // len(checklist_ids),
+                "text": f"Item {i}",
+                "done": i % 3 == 0,
+            }
+            for i in range(SEED_ROWS)
+        ])
+        people.append((owner, employees[0]))
+
+    sync_service.backfill_change_log(db.connection())
+    db.commit()
+    finance_service.rebuild_rollups(db)
+    db.execute(text("ANALYZE"))
+    db.commit()
+    return people
+
+
+# --- 2. THE SERVICE CALLS WE CHECK ---
+
+def _run_async(async_session, call):
+    """Runs an async service (signup/login take an AsyncSession) to completion."""
+    async def go():
+        async with async_session() as adb:
+            return await call(adb)
+    return asyncio.run(go())
+
+
+def _series(user, db) -> models.Event:
+    return db.query(models.Event).filter(
+        models.Event.company_id == user.company_id, models.Event.calendar_type == "general",
+        models.Event.rrule.isnot(None)
+    ).order_by(models.Event.id).first()
+
+
+def _reversed_items(note_id, db):
+    ids = [row.id for row in db.query(models.ChecklistItem.id).filter(
+        models.ChecklistItem.note_id == note_id
+    )]
+    return schemas.ChecklistReorder(item_ids=ids[::-1])
+
+
+def _service_calls(owner, employee, async_session) -> List[Tuple[str, Callable]]:
+    """(name, fn(db)) for every function in core/services/."""
+    window = (datetime(2020, 3, 1), datetime(2020, 4, 1))
+    new_event = schemas.EventCreate(title="Plan check", start_time=window[0],
+                                    end_time=window[0] + timedelta(hours=1))
+    new_task = schemas.TaskCreate(title="Plan check", due_date=window[0], assignee_id=employee.id)
+    new_series = schemas.EventCreate(title="Plan check", start_time=window[0],
+                                     end_time=window[0] + timedelta(hours=1), rrule="FREQ=WEEKLY;COUNT=10")
+    new_transaction = schemas.TransactionCreate(amount=12.5, type="expense",
+                                                category="Food", date=window[0])
+    page_cursor = finance_service._encode_cursor(window[1], 10 ** 9)
+    statement = b"date,amount,notes\n2020-03-02,-12.50,Coffee\n2020-03-03,900,Refund\n"
+    new_checklist = schemas.NoteCreate(title="Plan", type="checklist",
+                                       content='[{"text": "a"}, {"text": "b", "done": true}]')
+    new_user = schemas.UserCreate(email="new@seed.test", password="password",
+                                  role="employee", companyCode="SEED00")
+
+    return [
+        # events
+        ("events.get_user_events", lambda db: event_service.get_user_events(owner, db)),
+        ("events.get_user_events (window)",
+         lambda db: event_service.get_user_events(owner, db, *window)),
+        ("events.get_user_events (window, rows)",
+         lambda db: event_service.get_user_events(owner, db, *window, as_rows=True)),
+        ("events.create_new_event", lambda db: event_service.create_new_event(new_event, owner, db)),
+        ("events.create_new_event (recurring)",
+         lambda db: event_service.create_new_event(new_series, owner, db)),
+        ("events.save_event_exception",
+         lambda db: event_service.save_event_exception(_series(owner, db).id, schemas.EventExceptionCreate(
+             original_start=_series(owner, db).start_time + timedelta(weeks=1), title="Moved"), owner, db)),
+        ("events.delete_event_exception",
+         lambda db: event_service.delete_event_exception(
+             _series(owner, db).id, _series(owner, db).exceptions[0].id, owner, db)),
+        ("events.delete_event_by_id", lambda db: event_service.delete_event_by_id(1, owner, db)),
+        # free/busy (cleared first, so the index build is checked too)
+        ("freebusy.get_free_busy",
+         lambda db: (freebusy_service.clear(), freebusy_service.get_free_busy(owner, db, *window))),
+        ("freebusy.get_free_busy (some users)",
+         lambda db: freebusy_service.get_free_busy(employee, db, *window, user_ids=[owner.id, employee.id])),
+        # tasks
+        ("tasks.get_user_tasks (owner)", lambda db: task_service.get_user_tasks(owner, db, *window)),
+        ("tasks.get_user_tasks (employee)", lambda db: task_service.get_user_tasks(employee, db, *window)),
+        ("tasks.get_user_tasks (employee, rows)",
+         lambda db: task_service.get_user_tasks(employee, db, *window, as_rows=True)),
+        ("tasks.create_new_task", lambda db: task_service.create_new_task(new_task, owner, db)),
+        ("tasks.update_task_status",
+         lambda db: task_service.update_task_status(1, models.TaskStatus.done, owner, db)),
+        # finance
+        ("finance.create_transaction",
+         lambda db: finance_service.create_transaction(new_transaction, employee, db)),
+        ("finance.bulk_create_transactions",
+         lambda db: finance_service.bulk_create_transactions(
+             [new_transaction.model_dump(), {**new_transaction.model_dump(), "category": "Rent"}], owner, db)),
+        ("finance.import_statement",
+         lambda db: list(finance_service.import_statement(finance_service.read_statement(
+             io.BytesIO(statement), "csv", schemas.StatementMapping()), owner, db))),
+        ("finance.get_transactions_list (owner)",
+         lambda db: finance_service.get_transactions_list(owner, db)),
+        ("finance.get_transactions_list (employee)",
+         lambda db: finance_service.get_transactions_list(employee, db)),
+        ("finance.get_transactions_list (next page)",
+         lambda db: finance_service.get_transactions_list(owner, db, cursor=page_cursor)),
+        ("finance.get_transactions_list (rows)",
+         lambda db: finance_service.get_transactions_list(owner, db, cursor=page_cursor, as_rows=True)),
+        ("finance.export_transactions",
+         lambda db: list(finance_service.export_transactions(owner, db, "ndjson"))),
+        ("finance.get_dashboard_stats", lambda db: finance_service.get_dashboard_stats(owner, db)),
+        ("finance.check_rollups (company)",
+         lambda db: finance_service.check_rollups(db, owner.company_id)),
+        ("finance.generate_summary_report (owner)",
+         lambda db: finance_service.generate_summary_report("2020-03-01", "2020-03-31", owner, db)),
+        ("finance.generate_summary_report (employee)",
+         lambda db: finance_service.generate_summary_report("2020-03-01", "2020-03-31", employee, db)),
+        # notebooks
+        ("notebooks.get_all_notebooks", lambda db: notebook_service.get_all_notebooks(owner, db)),
+        ("notebooks.get_notebook_by_id", lambda db: notebook_service.get_notebook_by_id(1, owner, db)),
+        ("notebooks.create_new_notebook",
+         lambda db: notebook_service.create_new_notebook(schemas.NotebookCreate(name="Plan"), owner, db)),
+        ("notebooks.create_note_in_notebook",
+         lambda db: notebook_service.create_note_in_notebook(1, schemas.NoteCreate(title="Plan"), owner, db)),
+        ("notebooks.get_notes_for_notebook",
+         lambda db: notebook_service.get_notes_for_notebook(1, owner, db)),
+        ("notebooks.get_notes_for_notebook (rows)",
+         lambda db: notebook_service.get_notes_for_notebook(1, owner, db, as_rows=True)),
+        ("notebooks.update_note_content",
+         lambda db: notebook_service.update_note_content(1, schemas.NoteUpdate(title="Plan"), owner, db)),
+        ("notebooks.delete_note_by_id", lambda db: notebook_service.delete_note_by_id(2, owner, db)),
+        ("notebooks.create_note_in_notebook (checklist)",
+         lambda db: notebook_service.create_note_in_notebook(1, new_checklist, owner, db)),
+        ("notebooks.add_checklist_item",
+         lambda db: notebook_service.add_checklist_item(1, schemas.ChecklistItemCreate(text="Plan"), owner, db)),
+        ("notebooks.add_checklist_item (at position)",
+         lambda db: notebook_service.add_checklist_item(
+             1, schemas.ChecklistItemCreate(text="Plan", position=0), owner, db)),
+        ("notebooks.update_checklist_item",
+         lambda db: notebook_service.update_checklist_item(
+             1, schemas.ChecklistItemUpdate(done=True), owner, db)),
+        ("notebooks.reorder_checklist_items",
+         lambda db: notebook_service.reorder_checklist_items(3, _reversed_items(3, db), owner, db)),
+        ("notebooks.delete_checklist_item",
+         lambda db: notebook_service.delete_checklist_item(2, owner, db)),
+        # search
+        ("search.search (owner)", lambda db: search_service.search("event 1", owner, db)),
+        ("search.search (employee, kinds)",
+         lambda db: search_service.search("item", employee, db, kinds=["note", "task"])),
+        # sync
+        # (the owner starts past the backfilled notebooks: the seed has so few
+        # that a page asking for all of them is rightly answered by a scan)
+        ("sync.get_changes_since (owner)",
+         lambda db: sync_service.get_changes_since(SEED_COMPANIES * SEED_ROWS // 20, owner, db)),
+        ("sync.get_changes_since (employee, later page)",
+         lambda db: sync_service.get_changes_since(SEED_ROWS, employee, db, limit=sync_service.SYNC_PAGE_MAX)),
+        # versions
+        ("versions.get_version",
+         lambda db: versions.get_version(db, owner.company_id, versions.CALENDAR)),
+        # users
+        ("users.create_new_user",
+         lambda db: _run_async(async_session, lambda adb: user_service.create_new_user(new_user, adb))),
+        ("users.authenticate_user",
+         lambda db: _run_async(async_session,
+                               lambda adb: user_service.authenticate_user(owner.email, "password", adb))),
+        ("users.get_company_employees", lambda db: user_service.get_company_employees(owner, db)),
+    ]
+
+
+# --- 3. CAPTURE + EXPLAIN ---
+
+@contextmanager
+def _capture_selects(*engines):
+    """Records every SELECT (statement, parameters) sent through the engines."""
+    seen = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            seen.append((statement, parameters))
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield seen
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", _record)
+
+
+def _table_scans(conn, statement, parameters) -> List[str]:
+    plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    scans = []
+    for row in plan:
+        detail = row[-1]
+        virtual = _VIRTUAL_SCAN.match(detail)
+        if virtual:
+            if virtual.group(1) in FTS_TABLES and "M" not in virtual.group(2):
+                scans.append(detail)
+            continue
+        match = _SCAN.match(detail)
+        if match and match.group(1) in LARGE_TABLES:
+            scans.append(detail)
+    return scans
+
+
+def check_query_plans() -> List[str]:
+    """Runs the whole check and returns a list of human-readable failures."""
+    tmp_dir = tempfile.mkdtemp(prefix="karya-plans-")
+    db_path = os.path.join(tmp_dir, "plans.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    # NullPool: every asyncio.run() gets its own event loop, so no pooled connections
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    AsyncSession = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    # expire_on_commit=False keeps the seeded owner/employee usable across sessions
+    Session = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+    failures = []
+
+    try:
+        migrations.upgrade(engine)
+        with Session() as db:
+            people = _seed(db)
+        owner, employee = people[0]
+
+        for name, call in _service_calls(owner, employee, AsyncSession):
+            with Session() as db, _capture_selects(engine, async_engine.sync_engine) as selects:
+                try:
+                    call(db)
+                except Exception as exc:  # permission errors etc. still ran their queries
+                    if not getattr(exc, "status_code", None):
+                        raise
+            with engine.connect() as conn:
+                for statement, parameters in selects:
+                    for scan in _table_scans(conn, statement, parameters):
+                        failures.append(f"{name}: {scan}\n    {' '.join(statement.split())}")
+    finally:
+        engine.dispose()
+        asyncio.run(async_engine.dispose())
+        for name in os.listdir(tmp_dir):
+            os.remove(os.path.join(tmp_dir, name))
+        os.rmdir(tmp_dir)
+
+    return failures
@@ -0,0 +1,215 @@
+# recurrence.py
+
+"""
+Recurring events: the RRULE subset we store, and its expansion.
+
+A series is one row in `events` with an `rrule` (RFC 5545 syntax, e.g.
+"FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20251231T000000"). Its occurrences are never
+stored: the calendar feed expands each series only inside the window it was
+asked for, so the cost follows the number of series and the size of the
+window, not how many occurrences a series has had since it started.
+
+Supported parts:
+  FREQ      DAILY, WEEKLY, MONTHLY or YEARLY (required)
+  INTERVAL  every n days/weeks/months/years (default 1)
+  COUNT     stop after n occurrences
+  UNTIL     last possible start (YYYYMMDD or YYYYMMDDTHHMMSS, local time)
+  BYDAY     WEEKLY only: MO,TU,WE,TH,FR,SA,SU (default: DTSTART's weekday)
+  BYMONTHDAY MONTHLY only: days of the month, e.g. 1,15 (default: DTSTART's
+            day; months without that day are skipped, as RFC 5545 says)
+
+Anything else is rejected (ValueError), rather than silently misread.
+"""
+
+import calendar
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Iterator, Optional, Tuple
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# Expanded windows kept per process, keyed by (rule, series start, duration,
+# window): a series that is edited gets a new key, so nothing goes stale.
+EXPANSION_CACHE_SIZE = 4096
+# Safety valve for one series in one window (a DAILY rule over a decade)
+MAX_OCCURRENCES = 1000
+MAX_COUNT = 10000
+
+
+@dataclass(frozen=True)
+class Rule:
+    freq: str
+    interval: int = 1
+    count: Optional[int] = None
+    until: Optional[datetime] = None
+    byday: Tuple[int, ...] = ()
+    bymonthday: Tuple[int, ...] = ()
+
+
+# --- 1. PARSING ---
+
+def _parse_until(value: str) -> datetime:
+    value = value.rstrip("Z")
+    for pattern in ("%Y%m%dT%H%M%S", "%Y%m%d"):
+        try:
+            until = datetime.strptime(value, pattern)
+        except ValueError:
+            continue
+        # A bare date means "through that whole day"
+        return until + timedelta(days=1, microseconds=-1) if pattern == "%Y%m%d" else until
+    raise ValueError(f"Invalid UNTIL: {value}")
+
+
+def _positive_int(name: str, value: str) -> int:
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError(f"{name} must be a positive integer")
+    return int(value)
+
+
+@lru_cache(maxsize=1024)
+def parse(text: str) -> Rule:
+    """Parses an RRULE value ("FREQ=...;..."); raises ValueError on anything unsupported."""
+    parts = {}
+    for part in text.strip().removeprefix("RRULE:").split(";"):
+        name, found, value = part.partition("=")
+        if not found or not value:
+            raise ValueError(f"Invalid rule part: {part!r}")
+        parts[name.strip().upper()] = value.strip().upper()
+
+    freq = parts.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+    interval = _positive_int("INTERVAL", parts.pop("INTERVAL", "1"))
+    count = _positive_int("COUNT", parts.pop("COUNT")) if "COUNT" in parts else None
+    if count is not None and count > MAX_COUNT:
+        raise ValueError(f"COUNT can be at most {MAX_COUNT}")
+    until = _parse_until(parts.pop("UNTIL")) if "UNTIL" in parts else None
+    if count is not None and until is not None:
+        raise ValueError("COUNT and UNTIL can't both be set")
+
+    byday: Tuple[int, ...] = ()
+    if "BYDAY" in parts:
+        if freq != "WEEKLY":
+            raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+        days = parts.pop("BYDAY").split(",")
+        if not all(day in WEEKDAYS for day in days):
+            raise ValueError("BYDAY takes MO,TU,WE,TH,FR,SA,SU")
+        byday = tuple(sorted({WEEKDAYS.index(day) for day in days}))
+
+    bymonthday: Tuple[int, ...] = ()
+    if "BYMONTHDAY" in parts:
+        if freq != "MONTHLY":
+            raise ValueError("BYMONTHDAY is only supported with FREQ=MONTHLY")
+        bymonthday = tuple(sorted({_positive_int("BYMONTHDAY", day) for day in parts.pop("BYMONTHDAY").split(",")}))
+        if bymonthday[-1] > 31:
+            raise ValueError("BYMONTHDAY must be between 1 and 31")
+
+    if parts:
+        raise ValueError(f"Unsupported rule parts: {', '.join(sorted(parts))}")
+    return Rule(freq, interval, count, until, byday, bymonthday)
+
+
+# --- 2. EXPANSION ---
+
+def _add_months(dtstart: datetime, months: int, day: int) -> Optional[datetime]:
+    month_index = dtstart.month - 1 + months
+    year, month = dtstart.year + month_index // 12, month_index % 12 + 1
+    if day > calendar.monthrange(year, month)[1]:
+        return None  # e.g. the 31st in a 30-day month: no occurrence that month
+    return dtstart.replace(year=year, month=month, day=day)
+
+
+def _starts(rule: Rule, dtstart: datetime, not_before: datetime) -> Iterator[Tuple[int, datetime]]:
+    """(occurrence number, start) in order, beginning near `not_before`.
+
+    DAILY and WEEKLY jump straight to the period containing `not_before`
+    (the numbering is worked out arithmetically, so COUNT still holds);
+    MONTHLY/YEARLY step from DTSTART, which is at most 12 steps a year.
+    """
+    if rule.freq == "DAILY":
+        step = timedelta(days=rule.interval)
+        k = max(0, (not_before - dtstart) // step)
+        while True:
+            yield k, dtstart + k * step
+            k += 1
+
+    elif rule.freq == "WEEKLY":
+        days = rule.byday or (dtstart.weekday(),)
+        week0 = dtstart - timedelta(days=dtstart.weekday())
+        step = timedelta(weeks=rule.interval)
+        first_week = [d for d in days if d >= dtstart.weekday()]
+        k = max(0, (not_before - week0) // step)
+        number = 0 if k == 0 else len(first_week) + (k - 1) * len(days)
+        while True:
+            for day in (first_week if k == 0 else days):
+                yield number, week0 + k * step + timedelta(days=day)
+                number += 1
+            k += 1
+
+    elif rule.freq == "MONTHLY":
+        days = rule.bymonthday or (dtstart.day,)
+        number, k = 0, 0
+        while True:
+            for day in days:
+                start = _add_months(dtstart, k * rule.interval, day)
+                if start is not None and start >= dtstart:
+                    yield number, start
+                    number += 1
+            k += 1
+
+    else:  # YEARLY
+        number, k = 0, 0
+        while True:
+            start = _add_months(dtstart, 12 * k * rule.interval, dtstart.day)
+            if start is not None:
+                yield number, start
+                number += 1
+            k += 1
+
+
+@lru_cache(maxsize=EXPANSION_CACHE_SIZE)
+def expand(rrule: str, dtstart: datetime, duration: timedelta,
+           window_start: datetime, window_end: datetime) -> Tuple[datetime, ...]:
+    """Starts of the occurrences that overlap [window_start, window_end)."""
+    rule = parse(rrule)
+    found = []
+    for number, start in _starts(rule, dtstart, window_start - duration):
+        if rule.count is not None and number >= rule.count:
+            break
+        if rule.until is not None and start > rule.until:
+            break
+        if start >= window_end or len(found) >= MAX_OCCURRENCES:
+            break
+        if start + duration > window_start:
+            found.append(start)
+    return tuple(found)
+
+
+def last_start(rrule: str, dtstart: datetime) -> Optional[datetime]:
+    """Start of the series' final occurrence, or None if it never ends.
+
+    Raises ValueError if the rule has no occurrence at all (UNTIL before DTSTART).
+    """
+    rule = parse(rrule)
+    if rule.count is None and rule.until is None:
+        return None
+    # With UNTIL, DAILY/WEEKLY can skip to the last period before it
+    not_before = dtstart if rule.until is None else \
+        max(dtstart, rule.until - timedelta(days=7 * rule.interval + 1))
+    last = None
+    for number, start in _starts(rule, dtstart, not_before):
+        if rule.count is not None and number >= rule.count:
+            break
+        if rule.until is not None and start > rule.until:
+            break
+        last = start
+    if last is None:
+        raise ValueError("The rule has no occurrences")
+    return last
+
+
+def is_occurrence(rrule: str, dtstart: datetime, start: datetime) -> bool:
+    """Whether the series has an occurrence starting exactly at `start`."""
+    return start in expand(rrule, dtstart, timedelta(microseconds=1), start, start + timedelta(microseconds=1))
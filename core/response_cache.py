@@ -0,0 +1,278 @@
+# response_cache.py
+
+"""
+Server-side cache of finished JSON responses.
+
+The busiest read endpoints (calendar feed, finance dashboard, notebook
+listings) are recomputed and re-validated through their response_model on
+every call, while a company's data changes far less often than it is read.
+This keeps the final response bytes instead.
+
+Entries are keyed by company, resource, resource version (see
+core/services/versions.py), role, user (only for endpoints whose answer is
+personal) and the request path + query. The service functions that change a
+resource invalidate that company's entries for it after their commit (the
+hook at the bottom), and because the version is part of the key, a worker
+holding an entry another worker already invalidated can never serve it.
+
+Backends:
+  memory -- per-process LRU, bounded by entries, bytes and TTL (default)
+  sqlite -- a shared file (RESPONSE_CACHE_PATH) for multi-worker deployments
+  off    -- no caching, endpoints just serialize
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from core.config import settings
+from core.services import versions
+
+
+# --- 1. BACKENDS ---
+# All backends: get(key) -> bytes | None, set(key, body, company_id, resource),
+# invalidate(company_id, resource) -> entries dropped, clear(), size(),
+# and an `evictions` counter (capacity + TTL, not invalidations).
+
+class MemoryBackend:
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        # key -> (body, expires_at, company_id, resource), oldest first
+        self._entries: "OrderedDict[str, Tuple[bytes, float, int, str]]" = OrderedDict()
+        # (company_id, resource) -> keys, so invalidation doesn't scan everything
+        self._by_resource: Dict[Tuple[int, str], Set[str]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _drop(self, key: str):
+        body, _, company_id, resource = self._entries.pop(key)
+        self._bytes -= len(body)
+        keys = self._by_resource.get((company_id, resource))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_resource[(company_id, resource)]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._drop(key)
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, body: bytes, company_id: int, resource: str):
+        if len(body) > self.max_bytes:
+            return  # would evict everything else; not worth it
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (body, time.monotonic() + self.ttl_seconds, company_id, resource)
+            self._by_resource.setdefault((company_id, resource), set()).add(key)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, company_id: int, resource: str) -> int:
+        with self._lock:
+            keys = list(self._by_resource.get((company_id, resource), ()))
+            for key in keys:
+                self._drop(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_resource.clear()
+            self._bytes = 0
+
+    def size(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
+
+
+class SQLiteBackend:
+    # One small table in its own file, shared by every worker on the host.
+    # It is only a cache: WAL + synchronous=OFF, and losing it is harmless.
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float, busy_timeout_ms: int = 5000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            " key TEXT PRIMARY KEY, company_id INTEGER NOT NULL, resource TEXT NOT NULL,"
+            " body BLOB NOT NULL, expires_at REAL NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_response_cache_resource"
+            " ON response_cache (company_id, resource)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_response_cache_stored ON response_cache (stored_at)"
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self.evictions += 1
+                return None
+            return row[0]
+
+    def set(self, key: str, body: bytes, company_id: int, resource: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, company_id, resource, body, now + self.ttl_seconds, now),
+            )
+            # Oldest-stored first (entries are not re-stamped on hits: a hit
+            # stays a read, so workers don't contend on the file for it)
+            over = self._conn.execute("SELECT count(*) FROM response_cache").fetchone()[0] - self.max_entries
+            if over > 0:
+                self._conn.execute(
+                    "DELETE FROM response_cache WHERE key IN"
+                    " (SELECT key FROM response_cache ORDER BY stored_at LIMIT ?)", (over,)
+                )
+                self.evictions += over
+
+    def invalidate(self, company_id: int, resource: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM response_cache WHERE company_id = ? AND resource = ?",
+                (company_id, resource),
+            ).rowcount
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+
+    def size(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT count(*), coalesce(sum(length(body)), 0) FROM response_cache"
+            ).fetchone()
+            return {"entries": entries, "bytes": size}
+
+
+# --- 2. THE CACHE ---
+
+class ResponseCache:
+    def __init__(self, backend=None):
+        self.backend = backend  # None = caching off
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(company_id: int, resource: str, version: int, role: str,
+                 user_id: Optional[int], path: str, query: str) -> str:
+        scope = "*" if user_id is None else user_id
+        return f"{company_id}|{resource}|{version}|{role}|{scope}|{path}?{query}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        if self.backend is None:
+            return None
+        body = self.backend.get(key)
+        if body is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return body
+
+    def set(self, key: str, body: bytes, company_id: int, resource: str):
+        if self.backend is not None:
+            self.backend.set(key, body, company_id, resource)
+
+    def invalidate(self, company_id: int, resource: str):
+        if self.backend is not None:
+            self.invalidations += self.backend.invalidate(company_id, resource)
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> Dict:
+        """Counters since this worker started (entries/bytes are the backend's)."""
+        lookups = self.hits + self.misses
+        stats = {
+            "backend": settings.RESPONSE_CACHE_BACKEND if self.backend is not None else "off",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.backend.evictions if self.backend is not None else 0,
+            "invalidations": self.invalidations,
+            "entries": 0,
+            "bytes": 0,
+        }
+        if self.backend is not None:
+            stats.update(self.backend.size())
+        return stats
+
+
+# The settings that shape the backend; configure() rebuilds it when they change
+BACKEND_SETTINGS = (
+    "RESPONSE_CACHE_BACKEND", "RESPONSE_CACHE_PATH", "RESPONSE_CACHE_MAX_ENTRIES",
+    "RESPONSE_CACHE_MAX_BYTES", "RESPONSE_CACHE_TTL_SECONDS", "SQLITE_BUSY_TIMEOUT_MS",
+)
+
+
+def _make_backend(config):
+    name = config.RESPONSE_CACHE_BACKEND
+    if name == "memory":
+        return MemoryBackend(config.RESPONSE_CACHE_MAX_ENTRIES, config.RESPONSE_CACHE_MAX_BYTES,
+                             config.RESPONSE_CACHE_TTL_SECONDS)
+    if name == "sqlite":
+        return SQLiteBackend(config.RESPONSE_CACHE_PATH, config.RESPONSE_CACHE_MAX_ENTRIES,
+                             config.RESPONSE_CACHE_TTL_SECONDS, config.SQLITE_BUSY_TIMEOUT_MS)
+    if name == "off":
+        return None
+    raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND: {name!r} (memory, sqlite or off)")
+
+
+# The one cache every endpoint uses (per worker process)
+cache = ResponseCache()
+_configured_with = None
+
+
+def configure(config) -> bool:
+    """Gives the cache the backend `config` asks for. Returns False (and keeps
+    the current backend, entries and all) when its BACKEND_SETTINGS haven't
+    changed. The cache object itself stays: commit hooks are bound to it."""
+    global _configured_with
+    wanted = tuple(getattr(config, name) for name in BACKEND_SETTINGS)
+    if wanted == _configured_with:
+        return False
+    cache.backend = _make_backend(config)
+    _configured_with = wanted
+    return True
+
+
+configure(settings)
+
+
+# --- 3. INVALIDATION ---
+# versions.bump() is called by every create/update/delete in core/services;
+# once its transaction commits, the company's cached responses for that
+# resource go.
+versions.on_commit(cache.invalidate)
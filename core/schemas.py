@@ -2,7 +2,7 @@
 from .models import TaskStatus
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional, List # Optional is for fields that can be empty (nullable)
+from typing import Any, Dict, Optional, List # Optional is for fields that can be empty (nullable)
 
 # --- Event Schemas ---
 
@@ -15,6 +15,8 @@ class EventBase(BaseModel):
     place: Optional[str] = None # This field is optional, defaults to None
     notes: Optional[str] = None # Also optional
     calendar_type: str = "general" # Default to 'general'
+    # Repeats: an RRULE like "FREQ=WEEKLY;BYDAY=MO,WE" (see core/recurrence.py)
+    rrule: Optional[str] = None
 
 # 2. Create Schema: This is the "form" our user
 #    will fill out to *create* a new event.
@@ -27,12 +29,58 @@ class EventCreate(EventBase):
 #    that the database generates.
 class Event(EventBase):
     id: int
+    # Occurrences of a recurring event share the series' id; this is the
+    # start the series gave the occurrence (None for one-off events).
+    recurrence_id: Optional[datetime] = None
     
     # This tells Pydantic to read the data even
     # if it's a database model (an "ORM" object)
     class Config:
         from_attributes = True
 
+# 4. One occurrence of a recurring event, cancelled or changed.
+#    original_start picks the occurrence (its recurrence_id in the feed);
+#    the other fields, when given, replace the series' values for it.
+class EventExceptionCreate(BaseModel):
+    original_start: datetime
+    cancelled: bool = False
+    title: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    place: Optional[str] = None
+    notes: Optional[str] = None
+
+class EventException(EventExceptionCreate):
+    id: int
+    event_id: int
+
+    class Config:
+        from_attributes = True
+
+# --- Free/Busy Schemas ---
+class BusyPeriod(BaseModel):
+    start: datetime
+    end: datetime
+
+class FreeBusy(BaseModel):
+    user_id: int
+    email: str
+    free: bool
+    busy: List[BusyPeriod] # Merged, and clipped to the requested window
+
+# Something already booked when an event/task is created. General events
+# and the caller's own events come with event_id and title; someone else's
+# personal event only says who is busy (user_id) and when.
+class Conflict(BaseModel):
+    start: datetime
+    end: datetime
+    user_id: Optional[int] = None # None = a general (company-wide) event
+    event_id: Optional[int] = None
+    title: Optional[str] = None
+
+class EventCreated(Event):
+    conflicts: List[Conflict] = []
+
 
 
 class TaskBase(BaseModel):
@@ -52,6 +100,9 @@ class Task(TaskBase):
     class Config:
         from_attributes = True
 
+class TaskCreated(Task):
+    conflicts: List[Conflict] = [] # The assignee's events at the due date
+
 
 
 
@@ -116,6 +167,36 @@ class Transaction(TransactionBase):
     class Config:
         from_attributes = True
 
+# One page of the ledger; pass next_cursor back to get the following page
+class TransactionPage(BaseModel):
+    items: List[Transaction]
+    next_cursor: Optional[str] = None
+
+# Bulk import: `row` is the 1-based position in the upload (CSV: the data
+# row, not counting the header)
+class TransactionRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class TransactionBulkResult(BaseModel):
+    created: int
+    errors: List[TransactionRowError]
+
+# Bank statement import: which CSV column holds each transaction field.
+# type/category/notes may be None (or name a column the file doesn't have):
+# then the type comes from the sign of the amount and the category is
+# default_category. date_format is a strptime pattern ("%d/%m/%Y"); without
+# it dates must be ISO. OFX files only use default_category.
+class StatementMapping(BaseModel):
+    amount: str = "amount"
+    type: Optional[str] = "type"
+    category: Optional[str] = "category"
+    date: str = "date"
+    notes: Optional[str] = "notes"
+    date_format: Optional[str] = None
+    default_category: str = "Uncategorized"
+    delimiter: str = ","
+
 # 4. Dashboard Schema (The calculated totals)
 class DashboardData(BaseModel):
     total_income: float
@@ -142,11 +223,49 @@ class SummaryReport(BaseModel):
 
 # --- NOTEBOOK AGENT SCHEMAS ---
 
+# 0. CHECKLIST ITEM SCHEMAS (The Boxes)
+class ChecklistItemCreate(BaseModel):
+    text: str
+    done: bool = False
+    position: Optional[int] = None # None = add at the bottom
+
+class ChecklistItemUpdate(BaseModel):
+    # PATCH: send only what changed (usually just "done")
+    text: Optional[str] = None
+    done: Optional[bool] = None
+
+class ChecklistItem(BaseModel):
+    id: int
+    note_id: int
+    position: int
+    text: str
+    done: bool
+
+    class Config:
+        from_attributes = True
+
+class ChecklistReorder(BaseModel):
+    item_ids: List[int] # Every item of the note, in the new order
+
+class ChecklistProgress(BaseModel):
+    done: int
+    total: int
+
+class ChecklistItemResult(BaseModel):
+    item: ChecklistItem
+    progress: ChecklistProgress
+
+class ChecklistState(BaseModel):
+    items: List[ChecklistItem]
+    progress: ChecklistProgress
+
 # 1. NOTE SCHEMAS (The Cards)
 class NoteBase(BaseModel):
     title: Optional[str] = None
     type: str = "text"   # "text", "checklist", "photo"
-    content: Optional[str] = None # Stores text or JSON string
+    # Text notes: the text. Checklists: accepted as a JSON list of
+    # {"text", "done"} on create/update and stored as items instead.
+    content: Optional[str] = None
     color: str = "white"
 
 class NoteCreate(NoteBase):
@@ -158,6 +277,10 @@ class Note(NoteBase):
     updated_at: datetime
     notebook_id: int # Link back to the parent shelf
 
+    # Checklists only
+    items: List[ChecklistItem] = []
+    progress: Optional[ChecklistProgress] = None
+
     class Config:
         from_attributes = True # Allows reading from ORM model
 
@@ -180,8 +303,39 @@ class Notebook(NotebookBase):
     class Config:
         from_attributes = True
 
+class NotebookSummary(NotebookBase):
+    # What the shelf needs: no notes, just how many and when last touched
+    id: int
+    note_count: int = 0
+    last_updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 
 
 class NoteUpdate(BaseModel):
     title: Optional[str] = None
-    content: Optional[str] = None
\ No newline at end of file
+    content: Optional[str] = None
+
+# --- Sync (/api/sync) ---
+class SyncChange(BaseModel):
+    seq: int
+    entity: str # "event", "task", "note", "notebook" or "transaction"
+    id: int
+    op: str # "upsert", or "delete" (a tombstone: the row is gone)
+    data: Optional[Dict[str, Any]] = None # the row as its read endpoint shows it
+
+class SyncPage(BaseModel):
+    changes: List[SyncChange]
+    cursor: int # pass it back as ?since= for the next page (or the next sync)
+    has_more: bool
+
+# --- Search ---
+# title and snippet are HTML-escaped, with the matched words in <mark> tags
+class SearchResult(BaseModel):
+    kind: str # "note", "event", "task" or "transaction"
+    id: int
+    title: str
+    snippet: str
+    score: float
@@ -0,0 +1,128 @@
+# core/services/changes.py
+
+"""
+What a write changed, for the clients that show it.
+
+The write functions in core/services call record() before their commit,
+next to versions.bump(): one change per row they created, updated or
+deleted, as (entity, id, op, payload). Each change is
+
+  * logged in `change_log` in the same transaction, which is what
+    /api/sync reads (core/services/sync.py), and
+  * published to the live-update broker (core/broker.py) once the commit
+    went through; a rolled-back write publishes nothing.
+
+    entity   "event", "event_exception", "task", "transaction", "notebook",
+             "note" or "checklist_item"
+    op       "create", "update" or "delete"; also "bulk" (a transaction
+             import: id None, payload {"created": n}) and "reorder" (a
+             checklist's items in their new order)
+    payload  the row as its read endpoint shows it (schemas.*), or None for
+             a delete; the client patches its view with it
+    audience who may see it -- company(), owners() and user() tokens, the
+             same rules as the read endpoints
+
+The log only knows the five synced entities (SYNC_ENTITIES): an exception
+is logged as an update of its event, a checklist item as one of its note.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event, insert, literal, select
+from sqlalchemy.orm import Session
+
+from core import models
+from core.broker import broker
+
+logger = logging.getLogger(__name__)
+
+SYNC_ENTITIES = ("event", "task", "note", "notebook", "transaction")
+
+
+# --- 1. AUDIENCES ---
+# The tokens of core/broker.py (and of the search index's acl column)
+
+def company(company_id: int) -> str:
+    return f"c{company_id}"
+
+def owners(company_id: int) -> str:
+    return f"k{company_id}"
+
+def user(user_id: int) -> str:
+    return f"u{user_id}"
+
+def event_audience(db_event) -> tuple:
+    # Personal events are their owner's business only
+    if db_event.calendar_type == "personal":
+        return (user(db_event.owner_id),)
+    return (company(db_event.company_id),)
+
+
+# --- 2. RECORDING ---
+
+def payload(schema, obj) -> Dict:
+    """`obj` (an ORM row or dict) as `schema` would send it, JSON-ready."""
+    return schema.model_validate(obj, from_attributes=True).model_dump(mode="json")
+
+def record(
+    db: Session,
+    company_id: Optional[int],
+    entity: str,
+    op: str,
+    entity_id: Optional[int],
+    audience: Iterable[str],
+    payload: Optional[Dict] = None,
+    logged_as: Optional[Tuple[str, int]] = None,
+):
+    """Logs the change and queues it for publishing after the commit.
+
+    logged_as=(entity, id) logs it as an update of that row instead (an
+    exception -> its event). With entity_id None (a bulk write) nothing is
+    logged: the caller logs the rows itself (log_inserted_transactions).
+    """
+    audience = tuple(audience)
+    change = {"seq": None, "entity": entity, "id": entity_id, "op": op, "payload": payload}
+    if entity_id is not None:
+        log_entity, log_id = logged_as or (entity, entity_id)
+        change["seq"] = db.execute(insert(models.ChangeLog).values(
+            company_id=company_id, entity=log_entity, entity_id=log_id,
+            op="delete" if op == "delete" and logged_as is None else "upsert",
+            audience=" ".join(audience),
+        ).returning(models.ChangeLog.seq)).scalar_one()
+    # The payload is copied now: the commit expires the objects it was read from
+    db.info.setdefault("pending_changes", []).append((company_id, audience, change))
+
+def log_inserted_transactions(db: Session, company_id: Optional[int], user_id: int, after_id: int):
+    """Logs every transaction of this user inserted with an id above `after_id`.
+
+    For the bulk paths (one executemany, no ids in hand): one INSERT ...
+    SELECT over the primary key range, still in the caller's transaction.
+    """
+    audience = f"{owners(company_id)} {user(user_id)}"
+    rows = select(
+        models.Transaction.company_id, literal("transaction"), models.Transaction.id,
+        literal("upsert"), literal(audience),
+    ).where(
+        models.Transaction.id > after_id,
+        models.Transaction.user_id == user_id,
+    ).order_by(models.Transaction.id)
+    db.execute(insert(models.ChangeLog).from_select(
+        ["company_id", "entity", "entity_id", "op", "audience"], rows
+    ))
+
+
+# --- 3. PUBLISHING ---
+
+@event.listens_for(Session, "after_commit")
+def _publish(session):
+    for company_id, audience, change in session.info.pop("pending_changes", ()):
+        try:
+            broker.publish(company_id, audience, change)
+        except Exception:
+            # Same as the version hooks: the write already committed
+            logger.exception("publishing a %s change failed", change["entity"])
+
+@event.listens_for(Session, "after_rollback")
+def _forget(session):
+    session.info.pop("pending_changes", None)
@@ -1,14 +1,50 @@
 # core/services/events.py
 
 from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, null, or_
 from fastapi import HTTPException
-from core import models, schemas
+from core import models, recurrence, schemas
+from core.fast_json import rows_to_dicts, schema_columns
+from core.services import changes, versions
+from datetime import datetime, timedelta
+from heapq import merge
+from operator import attrgetter, itemgetter
+from typing import Dict, List, Optional
+
+# Columns of schemas.Event, for trusted (row tuple) output. recurrence_id
+# isn't a column: stored rows have none, occurrences fill it in.
+EVENT_KEYS, EVENT_COLUMNS = schema_columns(schemas.Event, models.Event, exclude=("recurrence_id",))
+EVENT_KEYS.append("recurrence_id")
+EVENT_COLUMNS.append(null().label("recurrence_id"))
+
+# A feed without an end still has to stop expanding a series that never
+# does: this far past the start (or today, if later)
+OPEN_WINDOW_HORIZON = timedelta(days=365)
+
+EXCEPTION_COLUMNS = (
+    models.EventException.event_id, models.EventException.original_start, models.EventException.cancelled,
+    models.EventException.title, models.EventException.start_time, models.EventException.end_time,
+    models.EventException.place, models.EventException.notes,
+)
 
 # --- 1. CREATE EVENT ---
+def _series_fields(event: schemas.EventCreate):
+    """(normalized rrule, series_end) for a recurring event; 400 on a bad rule."""
+    rrule = event.rrule.strip().upper().removeprefix("RRULE:")
+    try:
+        last = recurrence.last_start(rrule, event.start_time)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid rrule: {e}")
+    return rrule, (None if last is None else last + (event.end_time - event.start_time))
+
 def create_new_event(event: schemas.EventCreate, user: models.User, db: Session):
     # Prepare the DB object
     db_event = models.Event(**event.dict())
     db_event.company_id = user.company_id
+    if event.rrule:
+        db_event.rrule, db_event.series_end = _series_fields(event)
+    else:
+        db_event.rrule = None
     
     # Logic: Personal vs General
     if event.calendar_type == "personal":
@@ -23,52 +59,238 @@ def create_new_event(event: schemas.EventCreate, user: models.User, db: Session)
         raise HTTPException(status_code=400, detail="Invalid calendar_type")
 
     db.add(db_event)
+    db.flush()  # for the id
+    changes.record(db, user.company_id, "event", "create", db_event.id, changes.event_audience(db_event),
+                   changes.payload(schemas.Event, db_event))
+    versions.bump(db, user.company_id, versions.CALENDAR)
     db.commit()
     db.refresh(db_event)
+
+    # Saved either way; the caller is just told what it overlaps
+    from core.services import freebusy
+    db_event.conflicts = freebusy.event_conflicts(db_event, user, db)
     return db_event
 
 # --- 2. DELETE EVENT ---
-def delete_event_by_id(event_id: int, user: models.User, db: Session):
-    event_to_delete = db.query(models.Event).filter(
+def _get_editable_event(event_id: int, user: models.User, db: Session) -> models.Event:
+    """The event, if this user may delete or change it (404/403 otherwise)."""
+    event = db.query(models.Event).filter(
         models.Event.id == event_id
     ).first()
 
-    if not event_to_delete:
+    if not event:
         raise HTTPException(status_code=404, detail="Event not found")
         
     # Permission Logic
-    if event_to_delete.calendar_type == "personal":
-        if event_to_delete.owner_id != user.id:
+    if event.calendar_type == "personal":
+        if event.owner_id != user.id:
             raise HTTPException(
                 status_code=403, detail="Not authorized to delete this event"
             )
-    elif event_to_delete.calendar_type == "general":
+    elif event.calendar_type == "general":
         if user.role != "owner":
             raise HTTPException(
                 status_code=403, detail="Not authorized to delete general events"
             )
         # Extra safety check:
-        if event_to_delete.company_id != user.company_id:
+        if event.company_id != user.company_id:
             raise HTTPException(status_code=403, detail="Not authorized")
+    return event
+
+def delete_event_by_id(event_id: int, user: models.User, db: Session):
+    # Deleting a series deletes all of its occurrences (and their exceptions)
+    event_to_delete = _get_editable_event(event_id, user, db)
 
+    changes.record(db, event_to_delete.company_id, "event", "delete", event_to_delete.id,
+                   changes.event_audience(event_to_delete))
     db.delete(event_to_delete)
+    versions.bump(db, event_to_delete.company_id, versions.CALENDAR)
     db.commit()
     return {"message": "Event deleted successfully"}
 
 # --- 3. GET EVENTS (For the Feed) ---
-def get_user_events(user: models.User, db: Session):
-    """Fetches both General (Company) and Personal events for the user"""
-    
+def get_user_events(
+    user: models.User,
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    include_general: bool = True,
+    include_personal: bool = True,
+    as_rows: bool = False,
+):
+    """Fetches the General (Company) and Personal events the user can see.
+
+    When a [start, end) window is given, only events overlapping it are
+    returned, so the cost follows what is on screen, not the company history.
+    as_rows=True returns plain dicts of the schemas.Event columns instead
+    of ORM objects (see core/fast_json.py).
+    """
+    visible = []
+
     # 1. General Events (Company-wide)
-    general_events = db.query(models.Event).filter(
-        models.Event.calendar_type == "general",
-        models.Event.company_id == user.company_id
-    ).all()
-    
+    if include_general:
+        visible.append(and_(
+            models.Event.calendar_type == "general",
+            models.Event.company_id == user.company_id
+        ))
+
     # 2. Personal Events (User-specific)
-    personal_events = db.query(models.Event).filter(
-        models.Event.calendar_type == "personal",
-        models.Event.owner_id == user.id
-    ).all()
-    
-    return general_events + personal_events
\ No newline at end of file
+    if include_personal:
+        visible.append(and_(
+            models.Event.calendar_type == "personal",
+            models.Event.owner_id == user.id
+        ))
+
+    if not visible:
+        return []
+
+    # One query for both calendars instead of one per calendar
+    query = db.query(models.Event).filter(or_(*visible), models.Event.rrule.is_(None))
+
+    # 3. Window: the event ends after the window opens and starts before it closes.
+    # The end_time bound rides the (company/owner, calendar_type, end_time) indexes,
+    # which skips the years of history that ended before the window.
+    if start is not None:
+        query = query.filter(models.Event.end_time > start)
+    if end is not None:
+        query = query.filter(models.Event.start_time < end)
+
+    query = query.order_by(models.Event.start_time)
+
+    # 4. Recurring events: their occurrences in the window, merged in by start
+    occurrences = _series_occurrences(visible, start, end, db)
+    if as_rows:
+        events = rows_to_dicts(EVENT_KEYS, query.with_entities(*EVENT_COLUMNS))
+        return list(merge(events, occurrences, key=itemgetter("start_time"))) if occurrences else events
+    events = query.all()
+    if not occurrences:
+        return events
+    return list(merge(events, (schemas.Event(**row) for row in occurrences), key=attrgetter("start_time")))
+
+# --- 4. RECURRING EVENTS ---
+def _series_occurrences(visible, start: Optional[datetime], end: Optional[datetime], db: Session) -> List[Dict]:
+    """Every occurrence of the visible series overlapping [start, end), as
+    EVENT_KEYS dicts sorted by start_time, with their exceptions applied.
+
+    Only series that have begun by `end` and not finished by `start` are
+    read (the partial rrule indexes keep that to the few series rows), and
+    each is expanded inside the window only.
+    """
+    # rrule IS NOT NULL inside each branch, so each can use its partial index
+    query = db.query(models.Event).filter(or_(*(and_(v, models.Event.rrule.isnot(None)) for v in visible)))
+    if end is not None:
+        query = query.filter(models.Event.start_time < end)
+    if start is not None:
+        query = query.filter(or_(models.Event.series_end.is_(None), models.Event.series_end > start))
+    series = rows_to_dicts(EVENT_KEYS, query.with_entities(*EVENT_COLUMNS))
+    if not series:
+        return []
+
+    exceptions = _series_exceptions(series, start, end, db)
+    occurrences = []
+    for row in series:
+        occurrences.extend(_expand_series(row, exceptions.get(row["id"], {}), start, end))
+    occurrences.sort(key=itemgetter("start_time"))
+    return occurrences
+
+def _series_exceptions(series: List[Dict], start: Optional[datetime], end: Optional[datetime],
+                       db: Session) -> Dict[int, Dict[datetime, tuple]]:
+    """{event id: {original_start: exception row}} for the exceptions that
+    can matter in the window: the original occurrence is in it, or the
+    occurrence was moved into it."""
+    query = db.query(models.EventException).filter(
+        models.EventException.event_id.in_([row["id"] for row in series])
+    )
+    if start is not None and end is not None:
+        longest = max(row["end_time"] - row["start_time"] for row in series)
+        moved_start = func.coalesce(models.EventException.start_time, models.EventException.original_start)
+        query = query.filter(or_(
+            and_(models.EventException.original_start < end,
+                 models.EventException.original_start > start - longest),
+            and_(moved_start < end,
+                 or_(models.EventException.end_time > start, moved_start > start - longest)),
+        ))
+    found: Dict[int, Dict[datetime, tuple]] = {}
+    for row in query.with_entities(*EXCEPTION_COLUMNS):
+        found.setdefault(row[0], {})[row[1]] = row
+    return found
+
+def _expand_series(series: Dict, exceptions: Dict[datetime, tuple],
+                   start: Optional[datetime], end: Optional[datetime]) -> List[Dict]:
+    duration = series["end_time"] - series["start_time"]
+    window_start = start if start is not None else series["start_time"]
+    window_end = end if end is not None else max(window_start, datetime.now()) + OPEN_WINDOW_HORIZON
+
+    starts = set(recurrence.expand(series["rrule"], series["start_time"], duration, window_start, window_end))
+    # Moved into the window from an occurrence outside it
+    starts.update(original for original in exceptions if original not in starts)
+
+    occurrences = []
+    for original in starts:
+        occurrence = dict(series, start_time=original, end_time=original + duration, recurrence_id=original)
+        exception = exceptions.get(original)
+        if exception is not None:
+            _, _, cancelled, title, new_start, new_end, place, notes = exception
+            if cancelled:
+                continue
+            if new_start is not None:
+                occurrence["start_time"] = new_start
+                occurrence["end_time"] = new_start + duration
+            if new_end is not None:
+                occurrence["end_time"] = new_end
+            for key, value in (("title", title), ("place", place), ("notes", notes)):
+                if value is not None:
+                    occurrence[key] = value
+            if occurrence["start_time"] >= window_end or occurrence["end_time"] <= window_start:
+                continue
+        occurrences.append(occurrence)
+    return occurrences
+
+def save_event_exception(event_id: int, exception: schemas.EventExceptionCreate, user: models.User, db: Session):
+    """Cancels or changes one occurrence of a recurring event.
+
+    The occurrence is picked by its original start (recurrence_id in the
+    feed); saving again for the same occurrence replaces the change.
+    """
+    event = _get_editable_event(event_id, user, db)
+    if not event.rrule:
+        raise HTTPException(status_code=400, detail="Event is not recurring")
+    if not recurrence.is_occurrence(event.rrule, event.start_time, exception.original_start):
+        raise HTTPException(status_code=400, detail="original_start is not an occurrence of this event")
+
+    db_exception = db.query(models.EventException).filter(
+        models.EventException.event_id == event.id,
+        models.EventException.original_start == exception.original_start
+    ).first()
+    op = "update"
+    if db_exception is None:
+        db_exception = models.EventException(event_id=event.id)
+        db.add(db_exception)
+        op = "create"
+    for key, value in exception.dict().items():
+        setattr(db_exception, key, value)
+
+    db.flush()
+    changes.record(db, event.company_id, "event_exception", op, db_exception.id, changes.event_audience(event),
+                   changes.payload(schemas.EventException, db_exception), logged_as=("event", event.id))
+    versions.bump(db, event.company_id, versions.CALENDAR)
+    db.commit()
+    db.refresh(db_exception)
+    return db_exception
+
+def delete_event_exception(event_id: int, exception_id: int, user: models.User, db: Session):
+    """Puts an occurrence back the way the series has it."""
+    event = _get_editable_event(event_id, user, db)
+    db_exception = db.query(models.EventException).filter(
+        models.EventException.id == exception_id,
+        models.EventException.event_id == event.id
+    ).first()
+    if not db_exception:
+        raise HTTPException(status_code=404, detail="Exception not found")
+
+    changes.record(db, event.company_id, "event_exception", "delete", db_exception.id,
+                   changes.event_audience(event), {"event_id": event.id}, logged_as=("event", event.id))
+    db.delete(db_exception)
+    versions.bump(db, event.company_id, versions.CALENDAR)
+    db.commit()
+    return {"message": "Exception deleted successfully"}
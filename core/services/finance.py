@@ -1,10 +1,24 @@
 # core/services/finance.py
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select, cast, insert, Integer, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from fastapi import HTTPException
+from pydantic import ValidationError
 from core import models, schemas
-from typing import List, Dict
+from core.fast_json import rows_to_dicts, schema_columns
+from core.services import changes, versions
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from itertools import islice
+import base64
+import binascii
+import csv
+import hashlib
+import html
+import io
+import json
 
 # --- 1. CREATE TRANSACTION ---
 def create_transaction(transaction: schemas.TransactionCreate, user: models.User, db: Session):
@@ -18,60 +32,572 @@ def create_transaction(transaction: schemas.TransactionCreate, user: models.User
         company_id=user.company_id
     )
     db.add(db_transaction)
+    # Same DB transaction: the ledger and its rollup commit (or fail) together
+    apply_to_rollup(db_transaction, db)
+    db.flush()
+    # The ledger shows a row to the company's owner and to whoever entered it
+    changes.record(db, user.company_id, "transaction", "create", db_transaction.id,
+                   (changes.owners(user.company_id), changes.user(user.id)),
+                   changes.payload(schemas.Transaction, db_transaction))
+    versions.bump(db, user.company_id, versions.FINANCE)
     db.commit()
     db.refresh(db_transaction)
     return db_transaction
 
+# --- 1b. BULK CREATE ---
+# For importing history: thousands of rows in one request and ONE database
+# transaction (one commit, one fsync), instead of one call per row.
+BULK_MAX_ROWS = 50_000
+BULK_CSV_FIELDS = ["amount", "type", "category", "date", "notes"]
+TRANSACTION_TYPES = ("income", "expense")
+
+
+def _validation_messages(exc: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+        for error in exc.errors()
+    ]
+
+
+def validate_transaction_rows(
+    entries: Iterable[Tuple[int, Any]], user: models.User
+) -> Tuple[List[Tuple[int, schemas.TransactionCreate]], List[Dict]]:
+    """Validates numbered raw rows against schemas.TransactionCreate in one pass.
+
+    `entries` are (row number, raw row) pairs. Returns the valid rows as
+    (row number, TransactionCreate) and the errors as {"row", "errors"}.
+    The owner-only income rule is decided once for the whole upload.
+    """
+    may_add_income = user.role == "owner"
+    valid, errors = [], []
+    for number, entry in entries:
+        try:
+            transaction = schemas.TransactionCreate.model_validate(entry)
+        except ValidationError as exc:
+            errors.append({"row": number, "errors": _validation_messages(exc)})
+            continue
+        if transaction.type not in TRANSACTION_TYPES:
+            errors.append({"row": number, "errors": ["type: must be income or expense"]})
+        elif transaction.type == "income" and not may_add_income:
+            errors.append({"row": number, "errors": ["Only owners can add income"]})
+        else:
+            valid.append((number, transaction))
+    return valid, errors
+
+
+def parse_transactions_csv(text: str) -> Iterator[Dict]:
+    """Yields one dict per CSV data row (header row required, extra columns ignored).
+
+    The header must name BULK_CSV_FIELDS (notes is optional), so a file from
+    /transactions/export can be imported again as it is.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    header = reader.fieldnames or []
+    missing = [name for name in BULK_CSV_FIELDS if name != "notes" and name not in header]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"CSV is missing columns: {', '.join(missing)}")
+    for record in reader:
+        yield {
+            "amount": record["amount"],
+            "type": record["type"],
+            "category": record["category"],
+            "date": record["date"],
+            "notes": record.get("notes") or None
+        }
+
+
+def insert_transactions(
+    transactions: List[schemas.TransactionCreate],
+    user: models.User,
+    db: Session,
+    content_hashes: Optional[List[str]] = None,
+) -> int:
+    """Writes already-validated rows and their rollups; the caller commits.
+
+    One executemany for the ledger rows, and the rollup deltas are added up
+    per (day, type, category) first, so the rollup gets one upsert per
+    group instead of one per row.
+    """
+    if not transactions:
+        return 0
+
+    rows = [
+        {**t.model_dump(), "user_id": user.id, "company_id": user.company_id}
+        for t in transactions
+    ]
+    if content_hashes is not None:
+        for row, content_hash in zip(rows, content_hashes):
+            row["content_hash"] = content_hash
+    last_id = db.scalar(select(func.max(models.Transaction.id))) or 0
+    db.execute(insert(models.Transaction), rows)
+
+    if user.company_id is not None:
+        deltas: Dict[Tuple, List[int]] = {}
+        for row in rows:
+            key = (row["date"].date(), row["type"], row["category"])
+            delta = deltas.setdefault(key, [0, 0])
+            delta[0] += _to_cents(row["amount"])
+            delta[1] += 1
+        db.execute(_rollup_upsert(), [
+            {"company_id": user.company_id, "day": day, "type": t_type, "category": category,
+             "total_cents": cents, "count": count}
+            for (day, t_type, category), (cents, count) in deltas.items()
+        ])
+
+    # Synced row by row, but pushed live as one change for the whole batch:
+    # clients re-read their ledger page
+    changes.log_inserted_transactions(db, user.company_id, user.id, last_id)
+    changes.record(db, user.company_id, "transaction", "bulk", None,
+                   (changes.owners(user.company_id), changes.user(user.id)), {"created": len(rows)})
+    versions.bump(db, user.company_id, versions.FINANCE)
+    return len(rows)
+
+
+def bulk_create_transactions(entries: List[Any], user: models.User, db: Session, atomic: bool = False):
+    """Validates and inserts a whole upload in one transaction.
+
+    Rows that fail validation are reported back and skipped; with
+    atomic=True any failing row means nothing is written.
+    """
+    if len(entries) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ROWS} rows per request")
+
+    valid, errors = validate_transaction_rows(enumerate(entries, start=1), user)
+    if atomic and errors:
+        return {"created": 0, "errors": errors}
+
+    created = insert_transactions([t for _, t in valid], user, db)
+    db.commit()
+    return {"created": created, "errors": errors}
+
 # --- 2. GET TRANSACTIONS (List) ---
-def get_transactions_list(user: models.User, db: Session):
+PAGE_SIZE_DEFAULT = 50
+PAGE_SIZE_MAX = 200
+EXPORT_CHUNK_SIZE = 1000
+
+
+def _encode_cursor(t_date: datetime, t_id: int) -> str:
+    raw = f"{t_date.isoformat()}|{t_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        t_date, t_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(t_date), int(t_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# Columns of schemas.Transaction, for trusted (row tuple) output
+TRANSACTION_KEYS, TRANSACTION_COLUMNS = schema_columns(schemas.Transaction, models.Transaction)
+
+
+def _ledger_query(user: models.User, db: Session, query=None, t_type: Optional[str] = None):
+    """The rows this user may see, newest first (date, then id as tie-breaker)."""
+    if query is None:
+        query = db.query(models.Transaction)
+
     if user.role == "owner":
         # Owners see ALL transactions for the company
-        return db.query(models.Transaction).filter(
-            models.Transaction.company_id == user.company_id
-        ).order_by(models.Transaction.date.desc()).all()
+        query = query.filter(models.Transaction.company_id == user.company_id)
     else:
         # Employees see only THEIR OWN expenses
-        return db.query(models.Transaction).filter(
-            models.Transaction.user_id == user.id
-        ).order_by(models.Transaction.date.desc()).all()
+        query = query.filter(models.Transaction.user_id == user.id)
+
+    if t_type is not None:
+        query = query.filter(models.Transaction.type == t_type)
+
+    return query.order_by(models.Transaction.date.desc(), models.Transaction.id.desc())
+
+
+def get_transactions_list(
+    user: models.User,
+    db: Session,
+    limit: int = PAGE_SIZE_DEFAULT,
+    cursor: Optional[str] = None,
+    t_type: Optional[str] = None,
+    as_rows: bool = False,
+):
+    """One page of the ledger.
+
+    Keyset pagination: the cursor is the (date, id) of the last row the
+    client has, so every page is an index range read no matter how deep
+    into the ledger it is (no OFFSET).
+    as_rows=True returns the items as plain dicts of the schemas.Transaction
+    columns instead of ORM objects (see core/fast_json.py).
+    """
+    limit = max(1, min(limit, PAGE_SIZE_MAX))
+    columns = db.query(*TRANSACTION_COLUMNS) if as_rows else None
+    query = _ledger_query(user, db, columns, t_type=t_type)
+
+    if cursor:
+        c_date, c_id = _decode_cursor(cursor)
+        query = query.filter(
+            tuple_(models.Transaction.date, models.Transaction.id) < tuple_(c_date, c_id)
+        )
+
+    # Ask for one extra row to know whether there is a next page
+    rows = query.limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = _encode_cursor(last.date, last.id)
+
+    if as_rows:
+        items = rows_to_dicts(TRANSACTION_KEYS, items)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+# --- 2b. STREAMING EXPORT ---
+EXPORT_COLUMNS = ["id", "date", "type", "category", "amount", "notes", "user_id", "company_id"]
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def export_transactions(user: models.User, db: Session, fmt: str = "csv"):
+    """Yields the whole visible ledger as CSV or NDJSON text, chunk by chunk.
+
+    Rows come off the database cursor EXPORT_CHUNK_SIZE at a time, so
+    memory stays flat however large the ledger is. `fmt` is one of
+    EXPORT_FORMATS (the router checks it before the response starts).
+    """
+    columns = [getattr(models.Transaction, name) for name in EXPORT_COLUMNS]
+    query = _ledger_query(user, db, query=db.query(*columns))
+    result = db.execute(
+        query.statement.execution_options(stream_results=True, yield_per=EXPORT_CHUNK_SIZE)
+    )
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
+
+    for chunk in result.partitions():
+        buffer = io.StringIO()
+        if fmt == "csv":
+            writer = csv.writer(buffer)
+            for row in chunk:
+                writer.writerow([
+                    row.id, row.date.isoformat(), row.type, row.category,
+                    f"{row.amount:.2f}", row.notes or "", row.user_id, row.company_id
+                ])
+        else:
+            for row in chunk:
+                buffer.write(json.dumps({
+                    "id": row.id,
+                    "date": row.date.isoformat(),
+                    "type": row.type,
+                    "category": row.category,
+                    "amount": float(row.amount),
+                    "notes": row.notes,
+                    "user_id": row.user_id,
+                    "company_id": row.company_id
+                }))
+                buffer.write("\n")
+        yield buffer.getvalue()
+
+# --- 2c. BANK STATEMENT IMPORT (streamed) ---
+# Bank exports can be tens of MB. The upload is read as it is parsed (a line
+# of CSV or a chunk of OFX at a time) and written IMPORT_BATCH_SIZE rows per
+# transaction, with a progress report after each batch.
+# Every imported row carries a content hash (unique per company), so rows
+# already in the ledger -- from an overlapping statement, or from an import
+# that stopped halfway -- are skipped, and importing twice is harmless.
+IMPORT_BATCH_SIZE = 500
+IMPORT_FORMATS = ("csv", "ofx")
+OFX_READ_SIZE = 64 * 1024
+_OFX_FIELDS = {"DTPOSTED", "TRNAMT", "FITID", "NAME", "MEMO"}
+_DEBIT_CREDIT = {"debit": "expense", "dr": "expense", "credit": "income", "cr": "income"}
+
+
+def _parse_amount(raw: Optional[str]):
+    """Decimal from a bank's amount text ("1,234.50", "-12", "(12.50)").
+
+    Anything unreadable is returned as it is, for validation to report.
+    """
+    if raw is None:
+        return None
+    cleaned = raw.replace(",", "").replace(" ", "")
+    if cleaned.startswith("(") and cleaned.endswith(")"):
+        cleaned = "-" + cleaned[1:-1]
+    try:
+        return Decimal(cleaned)
+    except InvalidOperation:
+        return raw
+
+
+def _statement_entry(amount, t_type: Optional[str], category: Optional[str], day,
+                     notes: Optional[str], mapping: schemas.StatementMapping) -> Dict:
+    """One statement line as a TransactionCreate-shaped dict.
+
+    Without a type, a negative amount is an expense and a positive one
+    income; the stored amount is always positive.
+    """
+    if t_type:
+        t_type = t_type.lower()
+        t_type = _DEBIT_CREDIT.get(t_type, t_type)
+    elif isinstance(amount, Decimal):
+        t_type = "income" if amount > 0 else "expense"
+    if isinstance(amount, Decimal):
+        amount = abs(amount)
+    return {
+        "amount": amount,
+        "type": t_type,
+        "category": category or mapping.default_category,
+        "date": day,
+        "notes": notes or None
+    }
+
+
+def read_statement(stream: BinaryIO, fmt: str, mapping: schemas.StatementMapping):
+    """Opens an uploaded statement; returns a lazy iterator over its lines.
+
+    Each item is (row number, raw transaction dict, bank id or None). A CSV
+    header that lacks the mapped columns is a 400 raised here, before
+    anything is imported.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    if fmt == "ofx":
+        return _ofx_records(text, mapping)
+
+    reader = csv.reader(text, delimiter=mapping.delimiter)
+    header = [name.strip() for name in next(reader, [])]
+    missing = [column for column in (mapping.amount, mapping.date) if column not in header]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"CSV is missing columns: {', '.join(missing)}")
+    positions = {
+        field: header.index(column)
+        for field, column in (("amount", mapping.amount), ("type", mapping.type),
+                              ("category", mapping.category), ("date", mapping.date),
+                              ("notes", mapping.notes))
+        if column in header
+    }
+    return _csv_records(reader, positions, mapping)
+
+
+def _csv_records(reader, positions: Dict[str, int], mapping: schemas.StatementMapping):
+    for number, values in enumerate(reader, start=1):
+        if not any(value.strip() for value in values):
+            continue  # blank line
+
+        def get(field):
+            position = positions.get(field)
+            if position is None or position >= len(values):
+                return None
+            return values[position].strip()
+
+        day = get("date")
+        if day and mapping.date_format:
+            try:
+                day = datetime.strptime(day, mapping.date_format)
+            except ValueError:
+                pass  # left as text, validation reports it
+        yield number, _statement_entry(
+            _parse_amount(get("amount")), get("type"), get("category"), day, get("notes"), mapping
+        ), None
+
+
+def _ofx_tokens(text) -> Iterator[Tuple[str, str]]:
+    """(TAG, value) pairs of an OFX file, read OFX_READ_SIZE characters at a time.
+
+    Handles both OFX 1.x (SGML: closing tags optional) and 2.x (XML); a
+    value is whatever follows a tag up to the next "<".
+    """
+    tail = ""
+    while True:
+        chunk = text.read(OFX_READ_SIZE)
+        if not chunk:
+            break
+        parts = (tail + chunk).split("<")
+        tail = parts.pop()  # may be cut off mid-tag: wait for the next chunk
+        for part in parts:
+            tag, found, value = part.partition(">")
+            if found:
+                yield tag.strip().upper(), value.strip()
+    tag, found, value = tail.partition(">")
+    if found:
+        yield tag.strip().upper(), value.strip()
+
+
+def _ofx_date(value: str):
+    # YYYYMMDD[HHMMSS[.XXX]][[+-H:TZ]] -- the time zone is dropped, like
+    # every other date in the ledger
+    digits = value[:14]
+    for pattern in ("%Y%m%d%H%M%S", "%Y%m%d"):
+        try:
+            return datetime.strptime(digits, pattern)
+        except ValueError:
+            continue
+    return value
+
+
+def _ofx_records(text, mapping: schemas.StatementMapping):
+    account = ""
+    current = None
+    number = 0
+    for tag, value in _ofx_tokens(text):
+        if tag == "ACCTID":
+            account = value
+        elif tag == "STMTTRN":
+            current = {}
+        elif tag == "/STMTTRN" and current is not None:
+            number += 1
+            notes = " - ".join(dict.fromkeys(v for v in (current.get("NAME"), current.get("MEMO")) if v))
+            bank_id = f"{account}|{current['FITID']}" if current.get("FITID") else None
+            yield number, _statement_entry(
+                _parse_amount(current.get("TRNAMT")), None, None,
+                _ofx_date(current.get("DTPOSTED", "")), notes, mapping
+            ), bank_id
+            current = None
+        elif current is not None and tag in _OFX_FIELDS:
+            current[tag] = html.unescape(value)
+
+
+def _content_hash(transaction: schemas.TransactionCreate, bank_id: Optional[str],
+                  seen: Dict[str, int]) -> str:
+    """The row's fingerprint for deduplication.
+
+    OFX rows have the bank's own id (account + FITID). CSV rows are hashed
+    from what they say, numbered per file: two identical coffees on the same
+    day are :1 and :2, and stay :1 and :2 when the statement is imported again.
+    """
+    if bank_id is not None:
+        return hashlib.sha1(f"ofx|{bank_id}".encode()).hexdigest()
+    key = "|".join((transaction.date.isoformat(), str(_to_cents(transaction.amount)),
+                    transaction.type, transaction.notes or ""))
+    digest = hashlib.sha1(key.encode()).hexdigest()
+    seen[digest] = seen.get(digest, 0) + 1
+    return f"{digest}:{seen[digest]}"
+
+
+def import_statement(records: Iterable[Tuple[int, Dict, Optional[str]]], user: models.User, db: Session):
+    """Imports read_statement() records, yielding a progress dict after every batch.
+
+    Each batch is validated, stripped of rows the company already has (by
+    content hash), inserted with insert_transactions and committed. The last
+    dict has "done": True and the totals.
+    """
+    totals = {"rows": 0, "created": 0, "duplicates": 0, "errors": 0}
+    seen: Dict[str, int] = {}
+    records = iter(records)
+    while True:
+        batch = list(islice(records, IMPORT_BATCH_SIZE))
+        if not batch:
+            break
+        bank_ids = {number: bank_id for number, _, bank_id in batch}
+        valid, errors = validate_transaction_rows(((number, entry) for number, entry, _ in batch), user)
+
+        hashes = [_content_hash(t, bank_ids[number], seen) for number, t in valid]
+        known = set(db.scalars(select(models.Transaction.content_hash).where(
+            models.Transaction.company_id == user.company_id,
+            models.Transaction.content_hash.in_(hashes)
+        )))
+        new, new_hashes = [], []
+        for (_, transaction), content_hash in zip(valid, hashes):
+            if content_hash not in known:
+                known.add(content_hash)  # the same bank id twice in one file
+                new.append(transaction)
+                new_hashes.append(content_hash)
+
+        created = insert_transactions(new, user, db, content_hashes=new_hashes)
+        db.commit()
+
+        totals["rows"] += len(batch)
+        totals["created"] += created
+        totals["duplicates"] += len(valid) - created
+        totals["errors"] += len(errors)
+        yield {**totals, "row_errors": errors}
+
+    yield {**totals, "done": True}
+
 
 # --- 3. CALCULATE DASHBOARD STATS ---
 def get_dashboard_stats(user: models.User, db: Session):
     if user.role != "owner":
         raise HTTPException(status_code=403, detail="Not authorized to view company financials")
 
-    # Sum Income
-    income = db.query(func.sum(models.Transaction.amount)).filter(
-        models.Transaction.company_id == user.company_id,
-        models.Transaction.type == "income"
-    ).scalar() or 0.0
+    # Sum Income and Expense from the daily rollup (days x categories rows)
+    totals = dict(db.query(
+        models.FinanceDailyRollup.type,
+        func.sum(models.FinanceDailyRollup.total_cents)
+    ).filter(
+        models.FinanceDailyRollup.company_id == user.company_id
+    ).group_by(models.FinanceDailyRollup.type).all())
 
-    # Sum Expense
-    expense = db.query(func.sum(models.Transaction.amount)).filter(
-        models.Transaction.company_id == user.company_id,
-        models.Transaction.type == "expense"
-    ).scalar() or 0.0
+    income = (totals.get("income") or 0) / 100
+    expense = (totals.get("expense") or 0) / 100
 
     return {
-        "total_income": float(income),
-        "total_expense": float(expense),
-        "balance": float(income) - float(expense)
+        "total_income": income,
+        "total_expense": expense,
+        "balance": income - expense
     }
 
 # --- 4. GENERATE SUMMARY REPORT ---
+def _parse_report_bound(value: str, is_end: bool) -> datetime:
+    """Turns a report bound into a datetime.
+
+    A bare date ("2025-11-18") means the whole day, so as an end bound it
+    becomes the next midnight (the range is [start, end)). A full ISO
+    datetime is used exactly as given.
+    """
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        try:
+            return datetime.fromisoformat(value).replace(tzinfo=None)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid date: {value}")
+
+    bound = datetime.combine(day, time.min)
+    return bound + timedelta(days=1) if is_end else bound
+
+
 def generate_summary_report(start_date: str, end_date: str, user: models.User, db: Session):
-    # Base Query
-    query = db.query(models.Transaction).filter(
-        models.Transaction.date >= start_date,
-        models.Transaction.date <= end_date
-    )
+    start = _parse_report_bound(start_date, is_end=False)
+    end = _parse_report_bound(end_date, is_end=True)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end_date must be after start_date")
 
-    if user.role == "owner":
-        query = query.filter(models.Transaction.company_id == user.company_id)
+    whole_days = start.time() == time.min and end.time() == time.min
+
+    if user.role == "owner" and whole_days:
+        # Company-wide, day-aligned: add up the daily rollup rows
+        rollup = models.FinanceDailyRollup
+        rows = [
+            (t_type, category, cents / 100)
+            for t_type, category, cents in db.query(
+                rollup.type, rollup.category, func.sum(rollup.total_cents)
+            ).filter(
+                rollup.company_id == user.company_id,
+                rollup.day >= start.date(),
+                rollup.day < end.date()
+            ).group_by(rollup.type, rollup.category).order_by(rollup.category).all()
+        ]
     else:
-        query = query.filter(models.Transaction.user_id == user.id)
+        # One GROUP BY query: the database adds up the amounts and we only
+        # receive one row per (type, category), however many transactions match.
+        query = db.query(
+            models.Transaction.type,
+            models.Transaction.category,
+            func.sum(models.Transaction.amount)
+        ).filter(
+            models.Transaction.date >= start,
+            models.Transaction.date < end
+        )
+
+        if user.role == "owner":
+            query = query.filter(models.Transaction.company_id == user.company_id)
+        else:
+            # Employees only see their own rows, which the company rollup can't split out
+            query = query.filter(models.Transaction.user_id == user.id)
 
-    transactions = query.all()
+        rows = query.group_by(
+            models.Transaction.type, models.Transaction.category
+        ).order_by(models.Transaction.category).all()
 
     # Calculate Totals
     total_inc = 0.0
@@ -79,14 +605,14 @@ def generate_summary_report(start_date: str, end_date: str, user: models.User, d
     inc_cats: Dict[str, float] = {} 
     exp_cats: Dict[str, float] = {} 
 
-    for t in transactions:
-        amt = float(t.amount)
-        if t.type == "income":
+    for t_type, category, amount in rows:
+        amt = float(amount or 0)
+        if t_type == "income":
             total_inc += amt
-            inc_cats[t.category] = inc_cats.get(t.category, 0) + amt
+            inc_cats[category] = inc_cats.get(category, 0) + amt
         else:
             total_exp += amt
-            exp_cats[t.category] = exp_cats.get(t.category, 0) + amt
+            exp_cats[category] = exp_cats.get(category, 0) + amt
 
     # Format for Schema
     expense_list = [schemas.CategoryStat(category=c, total=t) for c, t in exp_cats.items()]
@@ -98,4 +624,114 @@ def generate_summary_report(start_date: str, end_date: str, user: models.User, d
         "balance": total_inc - total_exp,
         "expense_by_category": expense_list,
         "income_by_category": income_list
-    }
\ No newline at end of file
+    }
+
+
+# --- 5. DAILY ROLLUP MAINTENANCE ---
+
+def _to_cents(amount) -> int:
+    return int((Decimal(str(amount)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def apply_to_rollup(transaction: models.Transaction, db: Session, sign: int = 1):
+    """Adds (sign=1) or removes (sign=-1) one transaction from its daily rollup row.
+
+    Call it in the same DB transaction as the ledger write; an edit is a
+    remove of the old values followed by an add of the new ones.
+    """
+    if transaction.company_id is None:
+        return
+
+    db.execute(_rollup_upsert(), {
+        "company_id": transaction.company_id,
+        "day": transaction.date.date(),
+        "type": transaction.type,
+        "category": transaction.category,
+        "total_cents": sign * _to_cents(transaction.amount),
+        "count": sign
+    })
+
+
+def _rollup_upsert():
+    """INSERT ... ON CONFLICT that adds its values onto the rollup row.
+
+    Upsert, so two writers creating the first row of a day can't collide.
+    Execute it with one parameter dict, or a list of them (executemany).
+    """
+    rollup = models.FinanceDailyRollup
+    stmt = sqlite_insert(rollup)
+    return stmt.on_conflict_do_update(
+        index_elements=[rollup.company_id, rollup.day, rollup.type, rollup.category],
+        set_={
+            "total_cents": rollup.total_cents + stmt.excluded.total_cents,
+            "count": rollup.count + stmt.excluded.count
+        }
+    )
+
+
+def _rollup_source(company_id: Optional[int] = None):
+    """The rollup rows as they should be, computed from the raw ledger."""
+    t = models.Transaction
+    day = func.date(t.date)
+    query = select(
+        t.company_id,
+        day.label("day"),
+        t.type,
+        t.category,
+        func.sum(cast(func.round(t.amount * 100), Integer)).label("total_cents"),
+        func.count().label("count")
+    ).where(t.company_id.isnot(None))
+    if company_id is not None:
+        query = query.where(t.company_id == company_id)
+    return query.group_by(t.company_id, day, t.type, t.category)
+
+
+def rebuild_rollups(db: Session, company_id: Optional[int] = None) -> int:
+    """Recomputes the rollup from the ledger (backfill / repair). Returns the row count."""
+    delete = db.query(models.FinanceDailyRollup)
+    if company_id is not None:
+        delete = delete.filter(models.FinanceDailyRollup.company_id == company_id)
+    delete.delete(synchronize_session=False)
+
+    rollup = models.FinanceDailyRollup.__table__
+    db.execute(rollup.insert().from_select(
+        ["company_id", "day", "type", "category", "total_cents", "count"],
+        _rollup_source(company_id)
+    ))
+    db.commit()
+
+    count = db.query(func.count()).select_from(models.FinanceDailyRollup)
+    if company_id is not None:
+        count = count.filter(models.FinanceDailyRollup.company_id == company_id)
+    return count.scalar()
+
+
+def check_rollups(db: Session, company_id: Optional[int] = None) -> List[Dict]:
+    """Compares the rollup with the ledger and returns every row that disagrees."""
+    expected = {
+        (row.company_id, str(row.day), row.type, row.category): (row.total_cents, row.count)
+        for row in db.execute(_rollup_source(company_id))
+    }
+
+    query = db.query(models.FinanceDailyRollup)
+    if company_id is not None:
+        query = query.filter(models.FinanceDailyRollup.company_id == company_id)
+    actual = {
+        (r.company_id, r.day.isoformat(), r.type, r.category): (r.total_cents, r.count)
+        for r in query
+        if r.count != 0 or r.total_cents != 0  # emptied by deletes, harmless
+    }
+
+    problems = []
+    for key in sorted(expected.keys() | actual.keys(), key=str):
+        if expected.get(key) != actual.get(key):
+            company, day, t_type, category = key
+            problems.append({
+                "company_id": company,
+                "day": day,
+                "type": t_type,
+                "category": category,
+                "expected": expected.get(key),
+                "actual": actual.get(key)
+            })
+    return problems
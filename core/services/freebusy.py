@@ -0,0 +1,331 @@
+# core/services/freebusy.py
+
+"""
+Free/busy lookups and scheduling conflicts.
+
+Who is busy when: a general event makes everyone in the company busy, a
+personal event makes its owner busy. Tasks only have a due date, so they
+don't block anyone.
+
+Each company's one-off events are held in an IntervalIndex (core/intervals.py)
+so "what overlaps Tuesday 2-4pm" costs O(log n + k) instead of a pass over
+the company's whole calendar per person. Recurring series (few rows) are
+kept next to it and expanded per lookup, exceptions included, by the same
+code as the feed.
+
+Freshness: an index remembers the calendar version it reflects. Event writes
+committed through this process's sessions patch it in place (the session
+hooks in section 2), and its version moves along with them. Any write it
+didn't see (another worker, a bulk insert, a version bumped twice in one
+transaction) leaves it behind the version in the database, and the next
+lookup rebuilds it.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from core import models, recurrence
+from core.intervals import IntervalIndex
+from core.services import events as event_service
+from core.services import versions
+
+# Companies whose index is kept (least recently used are dropped)
+MAX_COMPANIES = 256
+# Longest window /calendar/freebusy answers for
+FREEBUSY_MAX_DAYS = 62
+# A new recurring event is checked against this many of its occurrences
+CONFLICT_OCCURRENCES = 50
+CONFLICT_HORIZON = timedelta(days=365)
+
+_SERIES_COLUMNS = (models.Event.id, models.Event.title, models.Event.start_time, models.Event.end_time,
+                   models.Event.calendar_type, models.Event.owner_id, models.Event.rrule)
+
+
+def _item(event_id: int, start: datetime, end: datetime, calendar_type: str,
+          owner_id: Optional[int], title: Optional[str]) -> Tuple:
+    """Index item: (start, end, event id, busy user or None for everyone, title)."""
+    return (start, end, event_id, owner_id if calendar_type == "personal" else None, title)
+
+
+# --- 1. PER-COMPANY INDEX ---
+
+class _CompanyCalendar:
+    def __init__(self, version: int, index: IntervalIndex):
+        self.version = version
+        self.index = index
+        self.series: List[Dict] = []
+        self.series_exceptions: Dict[int, Dict] = {}
+        self.series_stale = True  # reload the series on the next lookup
+        self.lock = threading.Lock()
+
+
+_calendars: "OrderedDict[int, _CompanyCalendar]" = OrderedDict()
+_calendars_lock = threading.Lock()
+
+
+def _load(company_id: int, version: int, db: Session) -> _CompanyCalendar:
+    rows = db.query(
+        models.Event.id, models.Event.start_time, models.Event.end_time,
+        models.Event.calendar_type, models.Event.owner_id, models.Event.title
+    ).filter(models.Event.company_id == company_id, models.Event.rrule.is_(None))
+    return _CompanyCalendar(version, IntervalIndex(_item(*row) for row in rows))
+
+
+def _load_series(calendar: _CompanyCalendar, company_id: int, db: Session):
+    series = [dict(row._mapping) for row in db.query(*_SERIES_COLUMNS).filter(
+        models.Event.company_id == company_id, models.Event.rrule.isnot(None)
+    )]
+    calendar.series_exceptions = {}
+    if series:
+        rows = db.query(*event_service.EXCEPTION_COLUMNS).filter(
+            models.EventException.event_id.in_([row["id"] for row in series])
+        )
+        for row in rows:
+            calendar.series_exceptions.setdefault(row[0], {})[row[1]] = row
+    calendar.series = series
+    calendar.series_stale = False
+
+
+def _calendar(company_id: int, db: Session) -> _CompanyCalendar:
+    """The company's index, (re)built if it is missing or behind the database."""
+    version = versions.get_version(db, company_id, versions.CALENDAR)
+    with _calendars_lock:
+        calendar = _calendars.get(company_id)
+        if calendar is not None:
+            _calendars.move_to_end(company_id)
+    if calendar is None or calendar.version != version:
+        calendar = _load(company_id, version, db)
+        with _calendars_lock:
+            _calendars[company_id] = calendar
+            while len(_calendars) > MAX_COMPANIES:
+                _calendars.popitem(last=False)
+    with calendar.lock:
+        if calendar.series_stale:
+            _load_series(calendar, company_id, db)
+    return calendar
+
+
+def _busy_items(calendar: _CompanyCalendar, start: datetime, end: datetime) -> List[Tuple]:
+    """Index items (occurrences included) overlapping [start, end), by start."""
+    with calendar.lock:
+        found = calendar.index.overlapping(start, end)
+        series, exceptions = calendar.series, calendar.series_exceptions
+    for row in series:
+        for occurrence in event_service._expand_series(row, exceptions.get(row["id"], {}), start, end):
+            found.append(_item(row["id"], occurrence["start_time"], occurrence["end_time"],
+                               row["calendar_type"], row["owner_id"], occurrence["title"]))
+    if series:
+        found.sort(key=lambda item: item[0])
+    return found
+
+
+def clear():
+    with _calendars_lock:
+        _calendars.clear()
+
+
+# --- 2. KEEPING THE INDEX CURRENT ---
+# Flushes note which events changed; just before the commit we read the
+# version the transaction is about to commit; after it, the cached index
+# applies the changes if that version is the one right after its own.
+
+def _changes(session: Session) -> Dict[Optional[int], List[Tuple]]:
+    return session.info.setdefault("freebusy_changes", {})
+
+
+@event.listens_for(Session, "after_flush")
+def _record_changes(session, flush_context):
+    if not _calendars:
+        return
+    for obj in session.new:
+        if isinstance(obj, models.Event):
+            _changes(session).setdefault(obj.company_id, []).append(("add", obj))
+        elif isinstance(obj, models.EventException):
+            _changes(session).setdefault(None, []).append(("series", obj.event_id))
+    for obj in session.dirty:
+        if isinstance(obj, models.Event) and session.is_modified(obj):
+            _changes(session).setdefault(obj.company_id, []).append(("update", obj))
+        elif isinstance(obj, models.EventException) and session.is_modified(obj):
+            _changes(session).setdefault(None, []).append(("series", obj.event_id))
+    for obj in session.deleted:
+        if isinstance(obj, models.Event):
+            _changes(session).setdefault(obj.company_id, []).append(("remove", obj))
+        elif isinstance(obj, models.EventException):
+            _changes(session).setdefault(None, []).append(("series", obj.event_id))
+
+
+def _as_changes(kind: str, obj) -> List[Tuple]:
+    """What to do to the index: ("add", item), ("remove", event id) or
+    ("series", None) = reload the series. Copied now: commit expires `obj`."""
+    if kind == "add":
+        if obj.rrule is not None:
+            return [("series", None)]
+        return [("add", _item(obj.id, obj.start_time, obj.end_time, obj.calendar_type, obj.owner_id, obj.title))]
+    if kind == "remove":
+        return [("remove", obj.id), ("series", None)] if obj.rrule is not None else [("remove", obj.id)]
+    # update: it may have become, or stopped being, a series
+    changes = [("remove", obj.id), ("series", None)]
+    if obj.rrule is None:
+        changes += _as_changes("add", obj)
+    return changes
+
+
+@event.listens_for(Session, "before_commit")
+def _read_versions(session):
+    if _calendars:
+        session.flush()  # commit's own flush comes after this hook
+    changes = session.info.pop("freebusy_changes", None)
+    if not changes:
+        return
+    # Exceptions only know their event: find its company
+    series_ids = [event_id for kind, event_id in changes.pop(None, ())]
+    by_company: Dict[int, List[Tuple]] = {
+        company_id: [change for kind, obj in ops for change in _as_changes(kind, obj)]
+        for company_id, ops in changes.items()
+    }
+    if series_ids:
+        for (company_id,) in session.execute(
+            select(models.Event.company_id).where(models.Event.id.in_(series_ids)).distinct()
+        ):
+            by_company.setdefault(company_id, []).append(("series", None))
+
+    bumped = session.info.get("bumped_resources", set())
+    pending = {}
+    for company_id, ops in by_company.items():
+        if company_id is None:
+            continue
+        version = versions.get_version(session, company_id, versions.CALENDAR)
+        # One bump by this transaction = the index can catch up by itself
+        pending[company_id] = (version if (company_id, versions.CALENDAR) in bumped else None, ops)
+    session.info["freebusy_pending"] = pending
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    for company_id, (version, ops) in session.info.pop("freebusy_pending", {}).items():
+        with _calendars_lock:
+            calendar = _calendars.get(company_id)
+        if calendar is None:
+            continue
+        with calendar.lock:
+            if version is None or calendar.version != version - 1:
+                continue  # behind anyway: the next lookup rebuilds it
+            for kind, value in ops:
+                if kind == "add":
+                    calendar.index.add(value)
+                elif kind == "remove":
+                    calendar.index.remove(value)
+                else:
+                    calendar.series_stale = True
+            calendar.version = version
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changes(session):
+    session.info.pop("freebusy_changes", None)
+    session.info.pop("freebusy_pending", None)
+
+
+# --- 3. FREE/BUSY ---
+
+def _merged(periods: Iterable[Tuple[datetime, datetime]]) -> List[Dict]:
+    merged: List[List[datetime]] = []
+    for start, end in sorted(periods):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [{"start": start, "end": end} for start, end in merged]
+
+
+def get_free_busy(
+    user: models.User,
+    db: Session,
+    start: datetime,
+    end: datetime,
+    user_ids: Optional[List[int]] = None,
+) -> List[Dict]:
+    """Busy periods in [start, end) for each member of the user's company
+    (or just `user_ids`), and whether they are free for all of it.
+
+    Only times are returned, never what the events are.
+    """
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if end - start > timedelta(days=FREEBUSY_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"The window can be at most {FREEBUSY_MAX_DAYS} days")
+    if user.company_id is None:
+        raise HTTPException(status_code=400, detail="User is not in a company")
+
+    members = db.query(models.User.id, models.User.email).filter(models.User.company_id == user.company_id)
+    if user_ids:
+        members = members.filter(models.User.id.in_(user_ids))
+    members = sorted(members)  # by id; ORDER BY would walk the primary key instead of the company index
+
+    everyone, personal = [], {}
+    for item_start, item_end, _, owner_id, _ in _busy_items(_calendar(user.company_id, db), start, end):
+        period = (max(item_start, start), min(item_end, end))
+        if owner_id is None:
+            everyone.append(period)
+        else:
+            personal.setdefault(owner_id, []).append(period)
+
+    result = []
+    for member_id, email in members:
+        busy = _merged(everyone + personal.get(member_id, []))
+        result.append({"user_id": member_id, "email": email, "free": not busy, "busy": busy})
+    return result
+
+
+# --- 4. CONFLICTS ---
+
+def _conflicts(user: models.User, items: Iterable[Tuple], user_ids: Optional[Set[int]],
+               skip_event: Optional[int] = None) -> List[Dict]:
+    """Items that block anyone in `user_ids` (None = anyone at all)."""
+    conflicts = []
+    for item_start, item_end, event_id, owner_id, title in items:
+        if event_id == skip_event:
+            continue
+        if owner_id is not None and user_ids is not None and owner_id not in user_ids:
+            continue
+        shown = owner_id is None or owner_id == user.id
+        conflicts.append({
+            "start": item_start, "end": item_end, "user_id": owner_id,
+            "event_id": event_id if shown else None, "title": title if shown else None,
+        })
+    return conflicts
+
+
+def event_conflicts(db_event: models.Event, user: models.User, db: Session) -> List[Dict]:
+    """What the (saved) event overlaps: everything in the company for a
+    general event, general events and the user's own for a personal one.
+    Recurring events are checked occurrence by occurrence (the first
+    CONFLICT_OCCURRENCES of them)."""
+    calendar = _calendar(db_event.company_id, db)
+    duration = db_event.end_time - db_event.start_time
+    if db_event.rrule:
+        starts = recurrence.expand(db_event.rrule, db_event.start_time, duration,
+                                   db_event.start_time, db_event.start_time + CONFLICT_HORIZON)
+        starts = starts[:CONFLICT_OCCURRENCES]
+    else:
+        starts = (db_event.start_time,)
+    user_ids = None if db_event.calendar_type == "general" else {db_event.owner_id}
+
+    conflicts = []
+    for start in starts:
+        items = _busy_items(calendar, start, start + max(duration, timedelta(microseconds=1)))
+        conflicts.extend(_conflicts(user, items, user_ids, skip_event=db_event.id))
+    return conflicts
+
+
+def task_conflicts(task: models.Task, user: models.User, db: Session) -> List[Dict]:
+    """The assignee's events (general or personal) at the task's due date."""
+    items = _busy_items(_calendar(task.company_id, db), task.due_date,
+                        task.due_date + timedelta(microseconds=1))
+    return _conflicts(user, items, {task.assignee_id})
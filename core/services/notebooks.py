@@ -1,8 +1,25 @@
 # core/services/notebooks.py
 
-from sqlalchemy.orm import Session
+import json
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import Integer, cast, delete, func, update
+from sqlalchemy.orm import Session, lazyload, selectinload
 from fastapi import HTTPException
 from core import models, schemas
+from core.fast_json import rows_to_dicts, schema_columns
+from core.services import changes, versions
+
+# Columns of schemas.Note / schemas.ChecklistItem, for trusted (row tuple) output
+NOTE_KEYS, NOTE_COLUMNS = schema_columns(schemas.Note, models.Note, exclude=("items", "progress"))
+ITEM_KEYS, ITEM_COLUMNS = schema_columns(schemas.ChecklistItem, models.ChecklistItem)
+
+def _record(db: Session, company_id: int, entity: str, op: str, entity_id: int, payload=None, note_id=None):
+    # Everyone in the company sees every notebook. Checklist items are
+    # synced as part of their note (note_id).
+    changes.record(db, company_id, entity, op, entity_id, (changes.company(company_id),), payload,
+                   logged_as=None if note_id is None else ("note", note_id))
 
 # --- 1. NOTEBOOK LOGIC (The Shelves) ---
 
@@ -14,19 +31,39 @@ def create_new_notebook(notebook: schemas.NotebookCreate, user: models.User, db:
         owner_id=user.id
     )
     db.add(db_notebook)
+    db.flush()
+    _record(db, user.company_id, "notebook", "create", db_notebook.id,
+            changes.payload(schemas.NotebookSummary, db_notebook))
+    versions.bump(db, user.company_id, versions.NOTEBOOKS)
     db.commit()
-    db.refresh(db_notebook)
+    # Load the (empty) notes list here too, since the response includes it
+    db.refresh(db_notebook, ["id", "name", "cover", "company_id", "owner_id", "notes"])
     return db_notebook
 
 def get_all_notebooks(user: models.User, db: Session):
-    # Logic: Show all notebooks in the user's company
-    return db.query(models.Notebook).filter(
+    # Logic: Show all notebooks in the user's company.
+    # The shelf only draws covers, so instead of loading every note we ask
+    # for one summary row per notebook (note count + last edit) in a single
+    # grouped query.
+    return db.query(
+        models.Notebook.id,
+        models.Notebook.name,
+        models.Notebook.cover,
+        func.count(models.Note.id).label("note_count"),
+        func.max(models.Note.updated_at).label("last_updated_at"),
+    ).outerjoin(
+        models.Note, models.Note.notebook_id == models.Notebook.id
+    ).filter(
         models.Notebook.company_id == user.company_id
-    ).all()
+    ).group_by(models.Notebook.id).order_by(models.Notebook.id).all()
 
-def get_notebook_by_id(notebook_id: int, user: models.User, db: Session):
+def get_notebook_by_id(notebook_id: int, user: models.User, db: Session, with_notes: bool = False):
     # Logic: Find the notebook and ensure it belongs to the user's company
-    notebook = db.query(models.Notebook).filter(
+    query = db.query(models.Notebook)
+    if with_notes:
+        # The caller is going to return the notebook with its notes: load them now
+        query = query.options(selectinload(models.Notebook.notes))
+    notebook = query.filter(
         models.Notebook.id == notebook_id,
         models.Notebook.company_id == user.company_id
     ).first()
@@ -49,19 +86,49 @@ def create_note_in_notebook(notebook_id: int, note: schemas.NoteCreate, user: mo
         **note.dict(),
         notebook_id=notebook_id
     )
+    if db_note.type == "checklist":
+        # The list arrives as JSON text; it is stored as one row per item
+        replace_checklist_items(db_note, parse_checklist_content(db_note.content))
     db.add(db_note)
+    db.flush()
+    _record(db, user.company_id, "note", "create", db_note.id, changes.payload(schemas.Note, db_note))
+    versions.bump(db, user.company_id, versions.NOTEBOOKS)
     db.commit()
     db.refresh(db_note)
     return db_note
 
-def get_notes_for_notebook(notebook_id: int, user: models.User, db: Session):
+def get_notes_for_notebook(notebook_id: int, user: models.User, db: Session, as_rows: bool = False):
     # Security Check first
     get_notebook_by_id(notebook_id, user, db)
     
     # Fetch notes (newest first usually looks better)
-    return db.query(models.Note).filter(
+    query = db.query(models.Note).filter(
+        models.Note.notebook_id == notebook_id
+    ).order_by(models.Note.created_at.desc())
+    if not as_rows:
+        return query.all()
+
+    # Trusted output (core/fast_json.py): the same shape as schemas.Note,
+    # built from two column queries (notes, then all their items) as dicts
+    notes = rows_to_dicts(NOTE_KEYS, query.with_entities(*NOTE_COLUMNS))
+    item_rows = db.query(*ITEM_COLUMNS).join(models.Note).filter(
         models.Note.notebook_id == notebook_id
-    ).order_by(models.Note.created_at.desc()).all()
+    ).order_by(models.ChecklistItem.note_id, models.ChecklistItem.position, models.ChecklistItem.id)
+    return attach_checklist_items(notes, item_rows)
+
+def attach_checklist_items(notes: List[dict], item_rows) -> List[dict]:
+    """Fills in "items" and "progress" of note dicts from their ordered item rows."""
+    items_by_note = {}
+    for item in rows_to_dicts(ITEM_KEYS, item_rows):
+        items_by_note.setdefault(item["note_id"], []).append(item)
+    for note in notes:
+        items = items_by_note.get(note["id"], [])
+        note["items"] = items
+        note["progress"] = (
+            {"done": sum(1 for item in items if item["done"]), "total": len(items)}
+            if note["type"] == "checklist" else None
+        )
+    return notes
 
 
 
@@ -84,7 +151,9 @@ def delete_note_by_id(note_id: int, user: models.User, db: Session):
         raise HTTPException(status_code=403, detail="Not authorized to delete this note")
 
     # 3. Delete it
+    _record(db, user.company_id, "note", "delete", note.id, {"notebook_id": note.notebook_id})
     db.delete(note)
+    versions.bump(db, user.company_id, versions.NOTEBOOKS)
     db.commit()
     return {"message": "Note deleted"}
 
@@ -110,8 +179,169 @@ def update_note_content(note_id: int, note_update: schemas.NoteUpdate, user: mod
     if note_update.title is not None:
         db_note.title = note_update.title
     if note_update.content is not None:
-        db_note.content = note_update.content
+        if db_note.type == "checklist":
+            replace_checklist_items(db_note, parse_checklist_content(note_update.content))
+        else:
+            db_note.content = note_update.content
     
+    db.flush()
+    _record(db, user.company_id, "note", "update", db_note.id, changes.payload(schemas.Note, db_note))
+    versions.bump(db, user.company_id, versions.NOTEBOOKS)
     db.commit()
     db.refresh(db_note)
-    return db_note
\ No newline at end of file
+    return db_note
+
+
+# --- 3. CHECKLIST LOGIC (The Boxes) ---
+# Each box is its own row, so ticking one is one small UPDATE of one row:
+# two people working down the same list no longer overwrite each other's
+# ticks the way re-saving the whole JSON list did.
+
+def parse_checklist_content(content) -> List[dict]:
+    """Reads the old-style checklist JSON: [{"text": ..., "done": ...}, ...]."""
+    if not content:
+        return []
+    try:
+        entries = json.loads(content)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Checklist content must be a JSON list")
+    if not isinstance(entries, list):
+        raise HTTPException(status_code=400, detail="Checklist content must be a JSON list")
+
+    items = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"text": entry}
+        if not isinstance(entry, dict) or not str(entry.get("text") or "").strip():
+            continue
+        items.append({"text": str(entry["text"]), "done": entry.get("done")})
+    return items
+
+def replace_checklist_items(db_note: models.Note, entries: List[dict]):
+    # Bulk edit (the textarea in the note modal): line i updates box i, so
+    # unchanged lines keep their tick; extra lines are added, missing ones removed.
+    existing = list(db_note.items)
+    for position, entry in enumerate(entries):
+        if position < len(existing):
+            item = existing[position]
+            if item.text != entry["text"]:
+                item.text = entry["text"]
+            item.position = position
+        else:
+            item = models.ChecklistItem(text=entry["text"], position=position, done=False)
+            db_note.items.append(item)
+        if entry["done"] is not None:
+            item.done = bool(entry["done"])
+    for item in existing[len(entries):]:
+        db_note.items.remove(item)
+    db_note.content = None
+
+def _checklist_progress(note_id: int, db: Session) -> dict:
+    total, done = db.query(
+        func.count(models.ChecklistItem.id),
+        func.coalesce(func.sum(cast(models.ChecklistItem.done, Integer)), 0),
+    ).filter(models.ChecklistItem.note_id == note_id).one()
+    return {"done": done, "total": total}
+
+def _touch_note(note_id: int, db: Session):
+    # A box changing is the note changing: keeps Note.updated_at (and so the
+    # notebook list's last_updated_at) honest. Same transaction as the box.
+    db.execute(update(models.Note).where(models.Note.id == note_id).values(updated_at=datetime.utcnow()))
+
+def _get_checklist_note(note_id: int, user: models.User, db: Session) -> models.Note:
+    # Note + company check in one query (items only if the caller asks for them)
+    note = db.query(models.Note).options(lazyload(models.Note.items)).join(models.Notebook).filter(
+        models.Note.id == note_id,
+        models.Notebook.company_id == user.company_id
+    ).first()
+    if not note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    if note.type != "checklist":
+        raise HTTPException(status_code=400, detail="Note is not a checklist")
+    return note
+
+def _get_checklist_item(item_id: int, user: models.User, db: Session) -> models.ChecklistItem:
+    item = db.query(models.ChecklistItem).join(models.Note).join(models.Notebook).filter(
+        models.ChecklistItem.id == item_id,
+        models.Notebook.company_id == user.company_id
+    ).first()
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return item
+
+def add_checklist_item(note_id: int, item: schemas.ChecklistItemCreate, user: models.User, db: Session):
+    _get_checklist_note(note_id, user, db)
+
+    if item.position is None:
+        # Bottom of the list
+        last = db.query(func.max(models.ChecklistItem.position)).filter(
+            models.ChecklistItem.note_id == note_id
+        ).scalar()
+        position = 0 if last is None else last + 1
+    else:
+        # Make room: everything from `position` down moves one place
+        position = max(item.position, 0)
+        db.execute(update(models.ChecklistItem).where(
+            models.ChecklistItem.note_id == note_id,
+            models.ChecklistItem.position >= position
+        ).values(position=models.ChecklistItem.position + 1))
+
+    db_item = models.ChecklistItem(note_id=note_id, position=position, text=item.text, done=item.done)
+    db.add(db_item)
+    db.flush()
+    _touch_note(note_id, db)
+    progress = _checklist_progress(note_id, db)
+    _record(db, user.company_id, "checklist_item", "create", db_item.id,
+            changes.payload(schemas.ChecklistItemResult, {"item": db_item, "progress": progress}), note_id=note_id)
+    versions.bump(db, user.company_id, versions.NOTEBOOKS)
+    db.commit()
+    return {"item": db_item, "progress": progress}
+
+def update_checklist_item(item_id: int, item_update: schemas.ChecklistItemUpdate, user: models.User, db: Session):
+    db_item = _get_checklist_item(item_id, user, db)
+
+    if item_update.text is not None:
+        db_item.text = item_update.text
+    if item_update.done is not None:
+        db_item.done = item_update.done
+
+    db.flush()
+    _touch_note(db_item.note_id, db)
+    progress = _checklist_progress(db_item.note_id, db)
+    _record(db, user.company_id, "checklist_item", "update", db_item.id,
+            changes.payload(schemas.ChecklistItemResult, {"item": db_item, "progress": progress}),
+            note_id=db_item.note_id)
+    versions.bump(db, user.company_id, versions.NOTEBOOKS)
+    db.commit()
+    return {"item": db_item, "progress": progress}
+
+def reorder_checklist_items(note_id: int, order: schemas.ChecklistReorder, user: models.User, db: Session):
+    note = _get_checklist_note(note_id, user, db)
+
+    if sorted(order.item_ids) != sorted(item.id for item in note.items):
+        raise HTTPException(status_code=400, detail="item_ids must list every item of the note exactly once")
+
+    # One executemany UPDATE ... WHERE id = ? for the whole list
+    db.execute(update(models.ChecklistItem), [
+        {"id": item_id, "position": position} for position, item_id in enumerate(order.item_ids)
+    ])
+    _touch_note(note_id, db)
+    _record(db, user.company_id, "checklist_item", "reorder", note_id,
+            {"note_id": note_id, "item_ids": order.item_ids}, note_id=note_id)
+    versions.bump(db, user.company_id, versions.NOTEBOOKS)
+    db.commit()
+    db.refresh(note, ["items"])
+    return {"items": note.items, "progress": note.progress}
+
+def delete_checklist_item(item_id: int, user: models.User, db: Session):
+    db_item = _get_checklist_item(item_id, user, db)
+    note_id = db_item.note_id
+
+    db.execute(delete(models.ChecklistItem).where(models.ChecklistItem.id == item_id))
+    _touch_note(note_id, db)
+    progress = _checklist_progress(note_id, db)
+    _record(db, user.company_id, "checklist_item", "delete", item_id, {"note_id": note_id, "progress": progress},
+            note_id=note_id)
+    versions.bump(db, user.company_id, versions.NOTEBOOKS)
+    db.commit()
+    return {"message": "Item deleted", "progress": progress}
@@ -0,0 +1,268 @@
+# core/services/search.py
+
+"""
+Full-text search over notes, events, tasks and transactions.
+
+One SQLite FTS5 table, `search_index`, holds a document per row of those
+tables. It is kept up to date by triggers on the source tables (created by
+migration 7), so every write path -- services, bulk import, the statement
+importer, raw SQL -- updates it in the same transaction as the row itself.
+
+Documents:
+  rowid  the source row's id * 4 + the kind's code, so a trigger can replace
+         or delete one document by primary key
+  title  note/event/task title, transaction category
+  body   note content + checklist item texts, event place + notes,
+         transaction notes
+  kind   "note", "event", "task" or "transaction"
+  acl    who may see it, as tokens: c<company> (everyone in the company),
+         k<company> (the company's owner only), u<user> (that user)
+
+The caller's visibility is part of the MATCH expression (acl : (c1 OR u5)),
+so FTS5 intersects it inside the index instead of us filtering matches from
+every company afterwards.
+"""
+
+import html
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from core import models
+
+SEARCH_LIMIT_DEFAULT = 20
+SEARCH_LIMIT_MAX = 50
+MAX_TERMS = 8
+
+# Ranking (see search()): bm25, with a word in the title weighing
+# TITLE_WEIGHT times a word in the body.
+TITLE_WEIGHT = 10.0
+SNIPPET_WORDS = 12
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+_COMBINING = re.compile(r"[\u0300-\u036f]")
+
+
+# --- 1. THE INDEX ---
+
+# kind -> (code, source table, columns whose change re-indexes the row,
+#          SELECT of (rowid, title, body, kind, acl) with a {where} slot)
+KINDS = {
+    "note": (0, "notes", "title, content, notebook_id", """
+        SELECT n.id * 4, n.title,
+               coalesce(n.content, '') || ' ' || coalesce(
+                   (SELECT group_concat(i.text, ' ') FROM checklist_items i WHERE i.note_id = n.id), ''),
+               'note', 'c' || b.company_id
+        FROM notes n JOIN notebooks b ON b.id = n.notebook_id {where}"""),
+    "event": (1, "events", "title, place, notes, calendar_type, company_id, owner_id", """
+        SELECT e.id * 4 + 1, e.title, coalesce(e.place, '') || ' ' || coalesce(e.notes, ''),
+               'event',
+               CASE WHEN e.calendar_type = 'personal' THEN 'u' || e.owner_id ELSE 'c' || e.company_id END
+        FROM events e {where}"""),
+    "task": (2, "tasks", "title, company_id, assignee_id", """
+        SELECT t.id * 4 + 2, t.title, '', 'task',
+               trim(coalesce('k' || t.company_id, '') || coalesce(' u' || t.assignee_id, ''))
+        FROM tasks t {where}"""),
+    "transaction": (3, "transactions", "category, notes, company_id, user_id", """
+        SELECT x.id * 4 + 3, x.category, coalesce(x.notes, ''), 'transaction',
+               trim(coalesce('k' || x.company_id, '') || coalesce(' u' || x.user_id, ''))
+        FROM transactions x {where}"""),
+}
+
+_ALIASES = {"note": "n", "event": "e", "task": "t", "transaction": "x"}
+
+_CREATE_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    " title, body, kind, acl,"
+    " tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+
+def _insert_sql(kind: str, where: str) -> str:
+    return ("INSERT INTO search_index (rowid, title, body, kind, acl)"
+            + KINDS[kind][3].format(where=where))
+
+
+def _trigger_sql(kind: str) -> List[str]:
+    code, table, columns, _ = KINDS[kind]
+    key = f"{_ALIASES[kind]}.id"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS search_{table}_ai AFTER INSERT ON {table} BEGIN "
+        f"{_insert_sql(kind, f'WHERE {key} = NEW.id')}; END",
+        f"CREATE TRIGGER IF NOT EXISTS search_{table}_au AFTER UPDATE OF {columns} ON {table} BEGIN "
+        f"DELETE FROM search_index WHERE rowid = OLD.id * 4 + {code}; "
+        f"{_insert_sql(kind, f'WHERE {key} = NEW.id')}; END",
+        f"CREATE TRIGGER IF NOT EXISTS search_{table}_ad AFTER DELETE ON {table} BEGIN "
+        f"DELETE FROM search_index WHERE rowid = OLD.id * 4 + {code}; END",
+    ]
+
+
+def _checklist_trigger_sql() -> List[str]:
+    # A checklist's item texts are part of its note's document
+    reindex = ("DELETE FROM search_index WHERE rowid = {row}.note_id * 4; "
+               + _insert_sql("note", "WHERE n.id = {row}.note_id") + ";")
+    return [
+        "CREATE TRIGGER IF NOT EXISTS search_checklist_items_ai AFTER INSERT ON checklist_items BEGIN "
+        + reindex.format(row="NEW") + " END",
+        "CREATE TRIGGER IF NOT EXISTS search_checklist_items_au AFTER UPDATE OF text ON checklist_items BEGIN "
+        + reindex.format(row="NEW") + " END",
+        "CREATE TRIGGER IF NOT EXISTS search_checklist_items_ad AFTER DELETE ON checklist_items BEGIN "
+        + reindex.format(row="OLD") + " END",
+    ]
+
+
+def create_search_index(conn: Connection):
+    """Creates the FTS table and its triggers (if missing) and fills it."""
+    conn.exec_driver_sql(_CREATE_TABLE)
+    for kind in KINDS:
+        for statement in _trigger_sql(kind):
+            conn.exec_driver_sql(statement)
+    for statement in _checklist_trigger_sql():
+        conn.exec_driver_sql(statement)
+    _fill(conn)
+
+
+def _fill(conn):
+    conn.exec_driver_sql("DELETE FROM search_index")
+    for kind in KINDS:
+        conn.exec_driver_sql(_insert_sql(kind, ""))
+    conn.exec_driver_sql("INSERT INTO search_index (search_index) VALUES ('optimize')")
+
+
+def rebuild_search_index(db: Session) -> int:
+    """Re-fills the index from the source tables (repair). Returns the document count."""
+    _fill(db.connection())
+    db.commit()
+    return db.execute(text("SELECT count(*) FROM search_index")).scalar()
+
+
+# --- 2. SEARCH ---
+# Every match is ranked, inside SQLite: ORDER BY bm25() ... LIMIT keeps only
+# the best `limit` rows while FTS5 walks the matches, so nothing is loaded
+# into Python that isn't returned. The acl and kind columns get weight 0:
+# they only filter, and the acl token (in every document of the company)
+# would otherwise add the same noise to every score. A search costs about
+# as much as there are matches, which the acl phrase already bounds to the
+# caller's own documents.
+
+def _fold(value: str) -> str:
+    """Lower case without accents, like the index's unicode61 tokenizer."""
+    return _COMBINING.sub("", unicodedata.normalize("NFKD", value)).casefold()
+
+
+def _scope(user: models.User) -> str:
+    tokens = [f"u{user.id}"]
+    if user.company_id is not None:
+        tokens.append(f"c{user.company_id}")
+        if user.role == "owner":
+            tokens.append(f"k{user.company_id}")
+    return " OR ".join(f'"{token}"' for token in tokens)
+
+
+def _match_expression(terms: List[str], user: models.User, kinds: Optional[List[str]]) -> str:
+    """The FTS5 query for the user's words (quoted, so never a syntax error).
+
+    Every word must match, in the title or the body; the last word also
+    matches as a prefix, for search-as-you-type.
+    """
+    words = [f'"{term}"' for term in terms]
+    words[-1] += "*"
+    expression = f"acl : ({_scope(user)}) AND {{title body}} : ({' '.join(words)})"
+    if kinds:
+        expression += " AND kind : (" + " OR ".join(f'"{kind}"' for kind in kinds) + ")"
+    return expression
+
+
+class _Matcher:
+    """Finds the query's words in a title/body the way the index matched them."""
+
+    def __init__(self, terms: List[str]):
+        folded = [_fold(term) for term in terms]
+        self.exact = set(folded[:-1])
+        self.prefix = folded[-1]
+        words = [re.escape(term) for term in folded[:-1]] + [re.escape(self.prefix) + r"\w*"]
+        self._pattern = re.compile(r"(?<!\w)(?:" + "|".join(words) + r")(?!\w)")
+
+    def hits(self, value: str) -> List[Tuple[int, int, bool]]:
+        """(start, end, matched) for every word of `value`."""
+        spans = []
+        for word in _TERM.finditer(value):
+            folded = _fold(word.group())
+            spans.append((word.start(), word.end(),
+                          folded in self.exact or folded.startswith(self.prefix)))
+        return spans
+
+
+def _marked(value: str, spans: List[Tuple[int, int, bool]], start: int = 0, end: Optional[int] = None) -> str:
+    """value[start:end], HTML-escaped, with the matched words in <mark> tags."""
+    end = len(value) if end is None else end
+    out, position = [], start
+    for word_start, word_end, matched in spans:
+        if not matched or word_start < start or word_end > end:
+            continue
+        out.append(html.escape(value[position:word_start]))
+        out.append(f"<mark>{html.escape(value[word_start:word_end])}</mark>")
+        position = word_end
+    out.append(html.escape(value[position:end]))
+    return "".join(out)
+
+
+def _snippet(body: str, matcher: _Matcher) -> str:
+    """About SNIPPET_WORDS words of the body around its first match."""
+    spans = matcher.hits(body)
+    if not spans:
+        return ""
+    first = next((i for i, span in enumerate(spans) if span[2]), 0)
+    lo = max(0, first - 3)
+    hi = min(len(spans), lo + SNIPPET_WORDS)
+    start = spans[lo][0] if lo > 0 else 0
+    end = spans[hi - 1][1] if hi < len(spans) else len(body)
+    return ("…" if start else "") + _marked(body, spans, start, end) + ("…" if end < len(body) else "")
+
+
+def search(
+    query: str,
+    user: models.User,
+    db: Session,
+    kinds: Optional[List[str]] = None,
+    limit: int = SEARCH_LIMIT_DEFAULT,
+) -> List[Dict]:
+    """The best-ranked documents this user may see, best first.
+
+    Scored by FTS5's bm25 (title words weigh TITLE_WEIGHT times body words;
+    higher is better), newest first on a tie. Titles and snippets come back
+    HTML-escaped with the matched words in <mark> tags. `kinds` limits the
+    results to some of KINDS.
+    """
+    if kinds and not set(kinds) <= KINDS.keys():
+        raise HTTPException(status_code=400, detail=f"kind must be one of: {', '.join(KINDS)}")
+    terms = _TERM.findall(query)[:MAX_TERMS]
+    if not terms:
+        return []
+
+    rows = db.execute(text(
+        "SELECT rowid, kind, title, body, -bm25(search_index, :title_weight, 1.0, 0.0, 0.0)"
+        " FROM search_index WHERE search_index MATCH :expression"
+        " ORDER BY bm25(search_index, :title_weight, 1.0, 0.0, 0.0), rowid DESC LIMIT :limit"
+    ), {
+        "expression": _match_expression(terms, user, kinds),
+        "title_weight": TITLE_WEIGHT,
+        "limit": max(1, min(limit, SEARCH_LIMIT_MAX)),
+    }).all()
+
+    matcher = _Matcher(terms)
+    return [
+        {
+            "kind": kind,
+            "id": rowid >> 2,
+            "title": _marked(title or "", matcher.hits(title or "")),
+            "snippet": _snippet((body or "").strip(), matcher),
+            "score": float(score)
+        }
+        for rowid, kind, title, body, score in rows
+    ]
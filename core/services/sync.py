@@ -0,0 +1,160 @@
+# core/services/sync.py
+
+"""
+"What changed since I last looked?" for clients that keep a copy.
+
+Every write logs the rows it touched in `change_log` (core/services/
+changes.py), numbered by a company-wide-increasing `seq`. A client keeps the
+cursor of its last sync and asks for the changes after it; it gets the
+current state of each changed row (the same dict the read endpoints return)
+or, for a row that is gone, a tombstone. Cost follows what changed, not
+how much data the company has.
+
+One page reads at most `limit` log rows. A row changed several times in
+that range is sent once, at its latest position. Rows the caller may not
+see (someone else's personal event, ...) are skipped but still move the
+cursor forward.
+"""
+
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from core import models, schemas
+from core.broker import audience_tokens
+from core.fast_json import rows_to_dicts, schema_columns
+from core.services import events as event_service
+from core.services import finance as finance_service
+from core.services import notebooks as notebook_service
+from core.services import tasks as task_service
+
+SYNC_PAGE_DEFAULT = 500
+SYNC_PAGE_MAX = 1000
+
+NOTEBOOK_KEYS, NOTEBOOK_COLUMNS = schema_columns(schemas.Notebook, models.Notebook, exclude=("notes",))
+
+
+# --- 1. CURRENT ROWS ---
+# entity -> fn(ids, db) returning {id: row dict} for the ids that still exist
+
+def _load_events(ids, db: Session) -> Dict[int, Dict]:
+    rows = db.query(*event_service.EVENT_COLUMNS).filter(models.Event.id.in_(ids))
+    return {row["id"]: row for row in rows_to_dicts(event_service.EVENT_KEYS, rows)}
+
+def _load_tasks(ids, db: Session) -> Dict[int, Dict]:
+    rows = db.query(*task_service.TASK_COLUMNS).filter(models.Task.id.in_(ids))
+    return {row["id"]: row for row in rows_to_dicts(task_service.TASK_KEYS, rows)}
+
+def _load_transactions(ids, db: Session) -> Dict[int, Dict]:
+    rows = db.query(*finance_service.TRANSACTION_COLUMNS).filter(models.Transaction.id.in_(ids))
+    return {row["id"]: row for row in rows_to_dicts(finance_service.TRANSACTION_KEYS, rows)}
+
+def _load_notebooks(ids, db: Session) -> Dict[int, Dict]:
+    rows = db.query(*NOTEBOOK_COLUMNS).filter(models.Notebook.id.in_(ids))
+    return {row["id"]: row for row in rows_to_dicts(NOTEBOOK_KEYS, rows)}
+
+def _load_notes(ids, db: Session) -> Dict[int, Dict]:
+    notes = rows_to_dicts(notebook_service.NOTE_KEYS,
+                          db.query(*notebook_service.NOTE_COLUMNS).filter(models.Note.id.in_(ids)))
+    item_rows = db.query(*notebook_service.ITEM_COLUMNS).filter(
+        models.ChecklistItem.note_id.in_(ids)
+    ).order_by(models.ChecklistItem.note_id, models.ChecklistItem.position, models.ChecklistItem.id)
+    return {note["id"]: note for note in notebook_service.attach_checklist_items(notes, item_rows)}
+
+_LOADERS = {
+    "event": _load_events,
+    "task": _load_tasks,
+    "transaction": _load_transactions,
+    "notebook": _load_notebooks,
+    "note": _load_notes,
+}
+
+
+# --- 2. CHANGES SINCE A CURSOR ---
+
+def get_changes_since(since: int, user: models.User, db: Session, limit: int = SYNC_PAGE_DEFAULT) -> Dict:
+    """One page of changes after `since` (0 = from the beginning).
+
+    Returns {"changes": [...], "cursor": seq to pass next time, "has_more"}.
+    Each change is {"seq", "entity", "id", "op": "upsert"|"delete", "data"}.
+    """
+    limit = max(1, min(limit, SYNC_PAGE_MAX))
+    company_filter = (models.ChangeLog.company_id == user.company_id) if user.company_id is not None \
+        else models.ChangeLog.company_id.is_(None)
+    log = db.query(
+        models.ChangeLog.seq, models.ChangeLog.entity, models.ChangeLog.entity_id,
+        models.ChangeLog.op, models.ChangeLog.audience,
+    ).filter(
+        company_filter, models.ChangeLog.seq > since
+    ).order_by(models.ChangeLog.seq).limit(limit).all()
+
+    # Latest visible log row per (entity, id)
+    tokens = audience_tokens(user)
+    latest = {}
+    for seq, entity, entity_id, op, audience in log:
+        if tokens.isdisjoint(audience.split()):
+            continue
+        latest.pop((entity, entity_id), None)
+        latest[(entity, entity_id)] = (seq, op)
+
+    upserts: Dict[str, List[int]] = {}
+    for (entity, entity_id), (seq, op) in latest.items():
+        if op != "delete":
+            upserts.setdefault(entity, []).append(entity_id)
+    current = {entity: _LOADERS[entity](ids, db) for entity, ids in upserts.items()}
+
+    changes = []
+    for (entity, entity_id), (seq, op) in latest.items():
+        data = current.get(entity, {}).get(entity_id) if op != "delete" else None
+        # Logged as changed but gone now (deleted by a cascade): a tombstone too
+        changes.append({"seq": seq, "entity": entity, "id": entity_id,
+                        "op": "upsert" if data is not None else "delete", "data": data})
+
+    return {
+        "changes": changes,
+        "cursor": log[-1].seq if log else since,
+        "has_more": len(log) == limit,
+    }
+
+
+# --- 3. MAINTENANCE ---
+
+# Every existing row, logged once (migration 9): a client syncing from 0
+# gets the whole dataset, including what was written before the log existed.
+# The audiences are the search index's acl expressions.
+_BACKFILL = {
+    "notebook": "SELECT company_id, id, 'c' || company_id AS audience FROM notebooks",
+    "note": "SELECT b.company_id AS company_id, n.id AS id, 'c' || b.company_id AS audience"
+            " FROM notes n JOIN notebooks b ON b.id = n.notebook_id",
+    "event": "SELECT company_id, id, CASE WHEN calendar_type = 'personal' THEN 'u' || owner_id"
+             " ELSE 'c' || company_id END AS audience FROM events",
+    "task": "SELECT company_id, id,"
+            " trim(coalesce('k' || company_id, '') || coalesce(' u' || assignee_id, '')) AS audience FROM tasks",
+    "transaction": "SELECT company_id, id,"
+                   " trim(coalesce('k' || company_id, '') || coalesce(' u' || user_id, '')) AS audience"
+                   " FROM transactions",
+}
+
+def backfill_change_log(conn):
+    """Logs every existing row as an upsert, unless the log already has rows."""
+    if conn.exec_driver_sql("SELECT 1 FROM change_log LIMIT 1").first():
+        return
+    for entity, rows in _BACKFILL.items():
+        conn.exec_driver_sql(
+            "INSERT INTO change_log (company_id, entity, entity_id, op, audience)"
+            f" SELECT company_id, '{entity}', id, 'upsert', coalesce(audience, '') FROM ({rows}) ORDER BY id"
+        )
+
+def compact_change_log(db: Session) -> int:
+    """Deletes log rows superseded by a later one for the same row.
+
+    A sync only ever sends a row's latest change, so the answer for every
+    cursor stays the same. Returns the number of rows deleted.
+    """
+    deleted = db.execute(text(
+        "DELETE FROM change_log WHERE seq NOT IN"
+        " (SELECT max(seq) FROM change_log GROUP BY entity, entity_id)"
+    )).rowcount
+    db.commit()
+    return deleted
@@ -3,6 +3,19 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from core import models, schemas
+from core.fast_json import rows_to_dicts, schema_columns
+from core.services import changes, versions
+from datetime import datetime
+from typing import Optional
+
+# Columns of schemas.Task, for trusted (row tuple) output
+TASK_KEYS, TASK_COLUMNS = schema_columns(schemas.Task, models.Task)
+
+def _record_task(db: Session, op: str, task: models.Task):
+    # Tasks show on the owner's feed and the assignee's
+    changes.record(db, task.company_id, "task", op, task.id,
+                   (changes.owners(task.company_id), changes.user(task.assignee_id)),
+                   changes.payload(schemas.Task, task))
 
 # --- 1. CREATE TASK ---
 def create_new_task(task: schemas.TaskCreate, user: models.User, db: Session):
@@ -25,8 +38,15 @@ def create_new_task(task: schemas.TaskCreate, user: models.User, db: Session):
     )
     
     db.add(new_task)
+    db.flush()
+    _record_task(db, "create", new_task)
+    versions.bump(db, user.company_id, versions.CALENDAR)
     db.commit()
     db.refresh(new_task)
+
+    # Is the assignee already booked at the deadline? (a warning, not an error)
+    from core.services import freebusy
+    new_task.conflicts = freebusy.task_conflicts(new_task, user, db)
     return new_task
 
 # --- 2. UPDATE TASK STATUS ---
@@ -47,20 +67,43 @@ def update_task_status(task_id: int, status: schemas.TaskStatus, user: models.Us
             raise HTTPException(status_code=403, detail="Not authorized")
         
     task.status = status
+    _record_task(db, "update", task)
+    versions.bump(db, task.company_id, versions.CALENDAR)
     db.commit()
     db.refresh(task)
     return task
 
 # --- 3. GET TASKS (For the Feed) ---
-def get_user_tasks(user: models.User, db: Session):
-    """Fetches tasks based on whether the user is an Owner or Employee"""
+def get_user_tasks(
+    user: models.User,
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    as_rows: bool = False,
+):
+    """Fetches tasks based on whether the user is an Owner or Employee.
+
+    When a [start, end) window is given, only tasks due inside it are returned.
+    as_rows=True returns plain dicts of the schemas.Task columns.
+    """
     if user.role == "owner":
         # Owners see all tasks for their company
-        return db.query(models.Task).filter(
+        query = db.query(models.Task).filter(
             models.Task.company_id == user.company_id
-        ).all()
+        )
     else:
         # Employees get only tasks assigned to them
-        return db.query(models.Task).filter(
+        query = db.query(models.Task).filter(
             models.Task.assignee_id == user.id
-        ).all()
\ No newline at end of file
+        )
+
+    # Range-bounded on the (company_id / assignee_id, due_date) indexes
+    if start is not None:
+        query = query.filter(models.Task.due_date >= start)
+    if end is not None:
+        query = query.filter(models.Task.due_date < end)
+
+    query = query.order_by(models.Task.due_date)
+    if as_rows:
+        return rows_to_dicts(TASK_KEYS, query.with_entities(*TASK_COLUMNS))
+    return query.all()
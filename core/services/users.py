@@ -1,18 +1,52 @@
 # core/services/users.py
 
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from core import models, schemas, auth
 
+# Signup and login are async so that, while bcrypt runs in the password pool
+# (core/auth.py), they don't hold one of the shared request threads.
+# They take the AsyncSession; their quick DB steps are the sync helpers
+# below, awaited through db.run_sync.
+
+def _get_user_by_email(email: str, db: Session):
+    """Looks the user up and ends the read transaction in the same step, so we
+    never sit on a pooled DB connection while waiting for bcrypt. The returned
+    user is detached but fully loaded."""
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if user is not None:
+        db.expunge(user)
+    db.rollback()
+    return user
+
+
+def _save_password_hash(user_id: int, new_hash: str, db: Session):
+    db.query(models.User).filter(models.User.id == user_id).update(
+        {models.User.hashed_password: new_hash}
+    )
+    db.commit()
+
+
+async def _password_job(job, *args):
+    try:
+        return await job(*args)
+    except auth.PasswordPoolBusy:
+        raise HTTPException(status_code=503, detail="Server is busy, please try again")
+
+
 # --- 1. SIGNUP LOGIC ---
-def create_new_user(user: schemas.UserCreate, db: Session):
+async def create_new_user(user: schemas.UserCreate, db: AsyncSession):
     # Check if email exists
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+    db_user = await db.run_sync(lambda s: _get_user_by_email(user.email, s))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = auth.hash_password(user.password)
-    
+    hashed_password = await _password_job(auth.hash_password_async, user.password)
+    return await db.run_sync(lambda s: _save_new_user(user, hashed_password, s))
+
+
+def _save_new_user(user: schemas.UserCreate, hashed_password: str, db: Session):
     # Handle Roles
     if user.role == "owner":
         if not user.companyName:
@@ -57,12 +91,21 @@ def create_new_user(user: schemas.UserCreate, db: Session):
     return new_user
 
 # --- 2. AUTHENTICATION LOGIC ---
-def authenticate_user(email: str, password: str, db: Session):
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def authenticate_user(email: str, password: str, db: AsyncSession):
+    user = await db.run_sync(lambda s: _get_user_by_email(email, s))
     if not user:
         return None
-    if not auth.verify_password(password, user.hashed_password):
+
+    verified, new_hash = await _password_job(
+        auth.verify_and_update_password_async, password, user.hashed_password
+    )
+    if not verified:
         return None
+
+    # The stored hash uses old cost settings: upgrade it while we have the password
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.run_sync(lambda s: _save_password_hash(user.id, new_hash, s))
     return user
 
 # --- 3. FETCH EMPLOYEES ---
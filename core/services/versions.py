@@ -0,0 +1,65 @@
+# core/services/versions.py
+
+import logging
+from typing import Callable, List
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from core import models
+
+logger = logging.getLogger(__name__)
+
+# --- 1. RESOURCES ---
+# What a version covers. A write to any of these tables changes what the
+# matching read endpoints return.
+CALENDAR = "calendar"    # events + tasks      -> /calendar/feed
+FINANCE = "finance"      # transactions        -> ledger, dashboard, summary
+NOTEBOOKS = "notebooks"  # notebooks + notes + checklist items
+
+# --- 2. WRITE SIDE ---
+def bump(db: Session, company_id: int, resource: str):
+    # Called by the service that changes the data, before its commit, so the
+    # new version and the new data become visible together.
+    stmt = sqlite_insert(models.ResourceVersion).values(
+        company_id=company_id, resource=resource, version=1
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["company_id", "resource"],
+        set_={"version": models.ResourceVersion.version + 1},
+    ))
+    # Remembered on the session until it commits (see section 4)
+    db.info.setdefault("bumped_resources", set()).add((company_id, resource))
+
+# --- 3. READ SIDE ---
+def get_version(db: Session, company_id: int, resource: str) -> int:
+    # One primary-key lookup. 0 = never written.
+    return db.execute(
+        select(models.ResourceVersion.version).where(
+            models.ResourceVersion.company_id == company_id,
+            models.ResourceVersion.resource == resource,
+        )
+    ).scalar() or 0
+
+# --- 4. AFTER-COMMIT HOOKS ---
+# Things that mirror the data (the response cache, ...) register here and
+# are told (company_id, resource) once a write to that resource has really
+# committed. A rolled-back write tells nobody.
+_commit_hooks: List[Callable[[int, str], None]] = []
+
+def on_commit(hook: Callable[[int, str], None]):
+    _commit_hooks.append(hook)
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_hooks(session):
+    for company_id, resource in session.info.pop("bumped_resources", ()):
+        for hook in _commit_hooks:
+            try:
+                hook(company_id, resource)
+            except Exception:
+                # The write itself already committed; don't turn it into a 500
+                logger.exception("after-commit hook %r failed", hook)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_bumps(session):
+    session.info.pop("bumped_resources", None)
@@ -4,6 +4,7 @@ document.addEventListener('DOMContentLoaded', function() {
     
     let editingNoteId = null;
     let isEditMode = false;
+    let currentNotes = []; // What the grid shows, newest first
 
 
     // 1. SETUP
@@ -13,7 +14,8 @@ document.addEventListener('DOMContentLoaded', function() {
         error => { if (error.response?.status === 401) window.location.href = '/login'; return Promise.reject(error); }
     );
 
-    const notebookId = document.getElementById('notebookId').value;
+    // The page is the same for every notebook (rendered once on the server): the id is in the URL, /notebooks/<id>
+    const notebookId = window.location.pathname.split('/').filter(Boolean).pop();
     const grid = document.getElementById('masonryGrid');
     const titleEl = document.getElementById('notebookTitle');
 
@@ -42,14 +44,16 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // 3. RENDER LOGIC
     function renderNotes(notes) {
+        currentNotes = notes;
         grid.innerHTML = '';
         notes.forEach(note => {
             const card = document.createElement('div');
             card.className = 'note-card';
 
             card.onclick = (e) => {
-                // Ignore clicks on the delete button
+                // Ignore clicks on the delete button and on the tick boxes
                 if (e.target.classList.contains('delete-note-btn')) return;
+                if (e.target.classList.contains('checklist-toggle')) return;
                 openEditModal(note);
             };
             
@@ -64,31 +68,50 @@ document.addEventListener('DOMContentLoaded', function() {
 
             if (note.title) html += `<div class="note-title">${note.title}</div>`;
             
-            // (The rest of your Body/Checklist logic stays the same...)
             if (note.type === 'checklist') {
-                // ... existing checklist code ...
-                try {
-                    const items = JSON.parse(note.content);
-                    html += `<div class="checklist-container">`;
-                    items.forEach(item => {
-                        const checked = item.done ? 'checked' : '';
-                        html += `
-                            <div class="checklist-item ${checked}">
-                                <input type="checkbox" ${checked} disabled> 
-                                <span>${item.text}</span>
-                            </div>`;
-                    });
-                    html += `</div>`;
-                } catch(e) { html += '<p class="error">Error loading list</p>'; }
+                // Each box is its own item on the server: ticking one sends
+                // just that item (see toggleItem below), not the whole list.
+                html += `<div class="checklist-container">`;
+                (note.items || []).forEach(item => {
+                    const checked = item.done ? 'checked' : '';
+                    html += `
+                        <div class="checklist-item ${checked}">
+                            <input type="checkbox" class="checklist-toggle" data-item-id="${item.id}" ${checked}> 
+                            <span>${item.text}</span>
+                        </div>`;
+                });
+                html += `</div>`;
+                if (note.progress) {
+                    html += `<div class="checklist-progress">${note.progress.done}/${note.progress.total} done</div>`;
+                }
             } else {
                 html += `<div class="note-body">${note.content || ''}</div>`;
             }
 
             card.innerHTML = html;
+            card.querySelectorAll('.checklist-toggle').forEach(box => {
+                box.onchange = () => toggleItem(note, box, card);
+            });
             grid.appendChild(card);
         });
     }
 
+    function toggleItem(note, box, card) {
+        const item = note.items.find(i => i.id === Number(box.dataset.itemId));
+        api.patch(`/api/notebooks/items/${item.id}`, { done: box.checked })
+            .then(res => {
+                item.done = res.data.item.done;
+                note.progress = res.data.progress;
+                box.closest('.checklist-item').classList.toggle('checked', item.done);
+                const progressEl = card.querySelector('.checklist-progress');
+                if (progressEl) progressEl.textContent = `${note.progress.done}/${note.progress.total} done`;
+            })
+            .catch(err => {
+                box.checked = !box.checked; // put the box back
+                alert("Error updating item");
+            });
+    }
+
     // 4. CREATE LOGIC
     
     // Open Modals
@@ -113,10 +136,11 @@ document.addEventListener('DOMContentLoaded', function() {
     // Submit Checklist
     document.getElementById('listForm').onsubmit = function(e) {
         e.preventDefault();
-        // Convert textarea lines into JSON
+        // Convert textarea lines into JSON. No "done" here: when editing an
+        // existing list the server keeps the ticks of unchanged lines.
         const rawText = document.getElementById('listContent').value;
         const lines = rawText.split('\n').filter(line => line.trim() !== '');
-        const jsonItems = lines.map(line => ({ text: line, done: false }));
+        const jsonItems = lines.map(line => ({ text: line }));
         
         saveNote({
             title: document.getElementById('listTitle').value,
@@ -138,11 +162,11 @@ document.addEventListener('DOMContentLoaded', function() {
         }
 
         promise
-            .then(() => {
+            .then(res => {
                 activeModal.style.display = 'none';
                 activeModal.querySelector('form').reset();
                 editingNoteId = null; // Clear the ID so next time we create new
-                loadNotes(); // Refresh the grid
+                applyChange({ entity: 'note', op: 'update', id: res.data.id, payload: res.data }); // Patch the grid
             })
             .catch(err => alert("Error saving note"));
     }
@@ -177,11 +201,8 @@ document.addEventListener('DOMContentLoaded', function() {
 
             titleInput.value = note.title || '';
             
-            // Convert JSON to text for the textarea
-            try {
-                const items = JSON.parse(note.content);
-                contentInput.value = items.map(i => i.text).join('\n');
-            } catch(e) { contentInput.value = ''; }
+            // One line per item in the textarea
+            contentInput.value = (note.items || []).map(i => i.text).join('\n');
 
             // Set to View Mode
             setEditMode(false, [titleInput, contentInput], saveBtn, editBtn);
@@ -224,6 +245,57 @@ document.addEventListener('DOMContentLoaded', function() {
         title.focus();
     };
 
+    // --- LIVE UPDATES ---
+    // Every note change in the company is pushed to us (/api/stream), our
+    // own included; we patch the grid with it instead of reloading it.
+    function applyChange(change) {
+        const p = change.payload;
+        if (change.entity === 'note') {
+            if (String(p.notebook_id) !== String(notebookId)) return; // another notebook
+            const others = currentNotes.filter(n => n.id !== change.id);
+            if (change.op !== 'delete') {
+                others.push(p);
+                others.sort((a, b) => (a.created_at < b.created_at) - (a.created_at > b.created_at));
+            }
+            renderNotes(others);
+        } else if (change.entity === 'checklist_item') {
+            const note = currentNotes.find(n => n.id === (p.note_id || (p.item && p.item.note_id)));
+            if (!note) return; // not on this page
+            let items = (note.items || []).filter(i => i.id !== change.id);
+            if (change.op === 'create') {
+                // The server made room at its position
+                items.forEach(i => { if (i.position >= p.item.position) i.position += 1; });
+            }
+            if (change.op === 'create' || change.op === 'update') items.push(p.item);
+            if (change.op === 'reorder') {
+                items = note.items.slice();
+                items.forEach(i => { i.position = p.item_ids.indexOf(i.id); });
+            }
+            items.sort((a, b) => a.position - b.position || a.id - b.id);
+            note.items = items;
+            if (p.progress) note.progress = p.progress;
+            renderNotes(currentNotes);
+        }
+    }
+
+    const changeStream = new EventSource('/api/stream');
+    let streamOpenedBefore = false;
+    changeStream.addEventListener('change', e => applyChange(JSON.parse(e.data)));
+    // Dropped for falling behind, or reconnected after a drop: re-read
+    changeStream.addEventListener('resync', loadNotes);
+    changeStream.onopen = () => {
+        if (streamOpenedBefore) loadNotes();
+        streamOpenedBefore = true;
+    };
+
+    window.deleteNote = function(noteId) {
+        if(!confirm("Are you sure you want to delete this note?")) return;
+
+        api.delete(`/api/notebooks/notes/${noteId}`)
+            .then(() => applyChange({ entity: 'note', op: 'delete', id: noteId, payload: { notebook_id: notebookId } }))
+            .catch(err => alert("Error deleting note"));
+    };
+
     // --- CREATE NEW LOGIC (Step 5 - Force Edit Mode) ---
     document.getElementById('addTextBtn').onclick = () => {
         editingNoteId = null;
@@ -252,21 +324,3 @@ document.addEventListener('DOMContentLoaded', function() {
     };
 });
 
-
-// Add this OUTSIDE the DOMContentLoaded block
-window.deleteNote = function(noteId) {
-    if(!confirm("Are you sure you want to delete this note?")) return;
-
-    // We need axios (it's loaded globally via CDN so this works)
-    axios.delete(`/api/notebooks/notes/${noteId}`)
-        .then(() => {
-            // Reload the notes to show it's gone
-            // We need to trigger the loadNotes function inside the scope.
-            // A cleaner way is to just reload the page for MVP, 
-            // OR we can make loadNotes global. 
-            // Let's just reload the list by finding the grid and removing the item visually 
-            // strictly speaking, but reloading is safer for sync.
-            location.reload(); 
-        })
-        .catch(err => alert("Error deleting note"));
-}
\ No newline at end of file
@@ -63,42 +63,50 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     // --- NEW GLOBAL VARIABLE ---
-    let allTransactions = []; // Stores the raw data from the server
-
-    function loadTransactions() {
-        api.get('/api/finance/transactions')
+    let allTransactions = []; // The pages we have loaded so far
+    let nextCursor = null;    // Where the next page starts (null = no more pages)
+    let currentFilter = 'all';
+    const loadMoreBtn = document.getElementById('loadMoreBtn');
+
+    // Loads one page from the server. `reset` starts again from the newest row.
+    function loadTransactions(reset = true) {
+        const params = { limit: 50 };
+        if (currentFilter !== 'all') params.type = currentFilter;
+        if (!reset && nextCursor) params.cursor = nextCursor;
+
+        api.get('/api/finance/transactions', { params: params })
             .then(res => {
-                allTransactions = res.data; // 1. Save the data
-                renderList('all');          // 2. Show everything by default
+                allTransactions = reset ? res.data.items : allTransactions.concat(res.data.items);
+                nextCursor = res.data.next_cursor;
+                renderList();
+                loadMoreBtn.classList.toggle('hidden', !nextCursor);
             })
             .catch(err => console.error(err));
     }
 
+    loadMoreBtn.onclick = () => loadTransactions(false);
+
     // --- NEW RENDER FUNCTION (Handles Filtering) ---
     // We attach this to the 'window' object so the HTML buttons can find it
+    // The server does the filtering, so switching tabs reloads from page one.
     window.filterTransactions = function(type) {
-        renderList(type);
+        currentFilter = type;
+        loadTransactions(true);
         updateActiveButton(type);
     }
 
-    function renderList(filterType) {
+    function renderList() {
         transactionListEl.innerHTML = ''; // Clear list
 
-        // 1. Filter the data locally
-        let filteredList = allTransactions;
-        if (filterType !== 'all') {
-            filteredList = allTransactions.filter(t => t.type === filterType);
-        }
-
-        if (filteredList.length === 0) {
+        if (allTransactions.length === 0) {
             transactionListEl.innerHTML = '<p class="no-data">No transactions found.</p>';
             return;
         }
 
         let lastDate = '';
 
-        // 2. Loop through the FILTERED list
-        filteredList.forEach(t => {
+        // Loop through the loaded pages
+        allTransactions.forEach(t => {
             const dateObj = new Date(t.date);
             const dateString = dateObj.toLocaleDateString(); 
             
@@ -67,7 +67,9 @@ document.addEventListener('DOMContentLoaded', function() {
     var detailsPlace = document.getElementById('detailsPlace');
     var detailsNotes = document.getElementById('detailsNotes');
     var deleteButton = document.getElementById('deleteButton');
+    var skipOccurrenceButton = document.getElementById('skipOccurrenceButton');
     var currentEventId = null;
+    var currentRecurrenceId = null; // Set when the clicked event is one occurrence of a series
 
     // Header Navigation
     var navGeneral = document.getElementById('navGeneral');
@@ -97,6 +99,43 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Server rows -> FullCalendar items (null when not shown in this view).
+    // Used by the feed and by the live updates below.
+    function toCalendarEvent(event) {
+        // Only show events that match our current view
+        if (event.calendar_type !== currentView) return null;
+        return {
+            start: event.start_time, 
+            end: event.end_time,     
+            title: event.title,
+            id: event.id,
+            color: (event.calendar_type === 'general') ? '#3788d8' : '#33a00e', // Blue/Green
+            extendedProps: {
+                type: 'event', 
+                place: event.place,
+                notes: event.notes,
+                calendar_type: event.calendar_type,
+                recurrence_id: event.recurrence_id
+            }
+        };
+    }
+
+    function toCalendarTask(task) {
+        // Only show tasks if we are on the "general" view
+        if (currentView !== 'general') return null;
+        return {
+            start: task.due_date, 
+            title: task.title,
+            id: task.id,
+            color: '#f0ad4e', // Yellow for tasks
+            extendedProps: {
+                type: 'task',
+                status: task.status,
+                assignee_id: task.assignee_id
+            }
+        };
+    }
+
     // --- 6. FULLCALENDAR SETUP ---
     var calendarEl = document.getElementById('calendar');
     var calendar = new FullCalendar.Calendar(calendarEl, {
@@ -111,56 +150,28 @@ document.addEventListener('DOMContentLoaded', function() {
         // --- NEW: Smarter Events Function ---
         events: function(fetchInfo, successCallback, failureCallback) {
             
-            // We only care about the *currentView* to toggle permissions,
-            // not to fetch data. This one endpoint gets everything.
-            api.get('/calendar/feed') // <-- Our new "super" endpoint
+            // Only ask for what is on screen: the visible date window,
+            // and only the calendars that belong to the current view.
+            let params = new URLSearchParams();
+            params.append('start', fetchInfo.startStr);
+            params.append('end', fetchInfo.endStr);
+            params.append('view', currentView);
+            if (currentView === 'general') {
+                params.append('view', 'tasks');
+            }
+
+            api.get('/calendar/feed', { params: params }) // <-- Our new "super" endpoint
                 .then(function(response) {
                     
                     // 1. Get the two lists from the response
                     let events = response.data.events;
                     let tasks = response.data.tasks;
 
-                    // 2. Translate Events (This code is the same as before)
-                    let translatedEvents = events.map(function(event) {
-                        // Only show events that match our current view
-                        if (event.calendar_type === currentView) {
-                            return {
-                                start: event.start_time, 
-                                end: event.end_time,     
-                                title: event.title,
-                                id: event.id,
-                                color: (event.calendar_type === 'general') ? '#3788d8' : '#33a00e', // Blue/Green
-                                extendedProps: {
-                                    type: 'event', 
-                                    place: event.place,
-                                    notes: event.notes,
-                                    calendar_type: event.calendar_type
-                                }
-                            };
-                        }
-                        return null; // Return null if it doesn't match the view
-                    }).filter(Boolean); // .filter(Boolean) removes all the nulls
+                    // 2. Translate Events and Tasks (see toCalendarEvent / toCalendarTask)
+                    let translatedEvents = events.map(toCalendarEvent).filter(Boolean); // .filter(Boolean) removes all the nulls
+                    let translatedTasks = tasks.map(toCalendarTask).filter(Boolean);
                     
-                    // 3. Translate Tasks (This code is the same as before)
-                    let translatedTasks = tasks.map(function(task) {
-                        // Only show tasks if we are on the "general" view
-                        if (currentView === 'general') {
-                            return {
-                                start: task.due_date, 
-                                title: task.title,
-                                id: task.id,
-                                color: '#f0ad4e', // Yellow for tasks
-                                extendedProps: {
-                                    type: 'task',
-                                    status: task.status,
-                                    assignee_id: task.assignee_id
-                                }
-                            };
-                        }
-                        return null;
-                    }).filter(Boolean); // Removes nulls
-                    
-                    // 4. Send all items to the calendar
+                    // 3. Send all items to the calendar
                     successCallback(translatedEvents.concat(translatedTasks));
                 })
                 .catch(function(error) {
@@ -221,6 +232,7 @@ document.addEventListener('DOMContentLoaded', function() {
             // (We will upgrade this later to show task-specific info)
             
             currentEventId = event.id;
+            currentRecurrenceId = event.extendedProps.recurrence_id || null;
             detailsTitle.textContent = event.title;
             
             if (event.extendedProps.type === 'task') {
@@ -231,6 +243,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 detailsNotes.textContent = "Status: " + event.extendedProps.status;
                 // We'll hide the delete button for tasks for now
                 deleteButton.style.display = 'none';
+                skipOccurrenceButton.style.display = 'none';
             } else {
                 // This is an Event
                 detailsStart.textContent = new Date(event.start).toLocaleString();
@@ -238,6 +251,9 @@ document.addEventListener('DOMContentLoaded', function() {
                 detailsPlace.textContent = event.extendedProps.place || 'N/A';
                 detailsNotes.textContent = event.extendedProps.notes || 'N/A';
                 deleteButton.style.display = 'block';
+                // Repeating events: delete one date, or (Delete Event) the whole series
+                deleteButton.textContent = currentRecurrenceId ? 'Delete All Occurrences' : 'Delete Event';
+                skipOccurrenceButton.style.display = currentRecurrenceId ? 'block' : 'none';
             }
 
             detailsModal.style.display = 'block';
@@ -273,6 +289,17 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // --- 9. FORM & BUTTON LOGIC ---
 
+    // Saving never fails on a clash; the server just lists what it overlaps
+    function warnConflicts(conflicts) {
+        if (!conflicts || conflicts.length === 0) return;
+        var lines = conflicts.slice(0, 5).map(function(c) {
+            var when = new Date(c.start).toLocaleString() + ' - ' + new Date(c.end).toLocaleString();
+            return (c.title || 'Busy') + ' (' + when + ')';
+        });
+        if (conflicts.length > 5) lines.push('...and ' + (conflicts.length - 5) + ' more');
+        alert('Saved, but it overlaps:\n' + lines.join('\n'));
+    }
+
     // Create Event Form
     eventForm.onsubmit = function(event) {
         event.preventDefault(); 
@@ -282,10 +309,11 @@ document.addEventListener('DOMContentLoaded', function() {
             end_time: document.getElementById('eventEnd').value,
             place: document.getElementById('eventPlace').value,
             notes: document.getElementById('eventNotes').value,
-            calendar_type: calendarTypeSelect.value // Use the dropdown's value
+            calendar_type: calendarTypeSelect.value, // Use the dropdown's value
+            rrule: document.getElementById('eventRepeat').value || null
         };
         api.post('/calendar/general/events', newEvent)
-            .then(function() { createModal.style.display = 'none'; calendar.refetchEvents(); })
+            .then(function(response) { createModal.style.display = 'none'; applyChange({ entity: 'event', op: 'create', id: response.data.id, payload: response.data }); warnConflicts(response.data.conflicts); })
             .catch(function(error) { console.error('Error creating event:', error); alert('Error: ' + error.response.data.detail); });
     }
     
@@ -299,7 +327,7 @@ document.addEventListener('DOMContentLoaded', function() {
             assignee_id: taskAssigneeSelect.value
         };
         api.post('/api/tasks', newTask)
-            .then(function() { createModal.style.display = 'none'; calendar.refetchEvents(); })
+            .then(function(response) { createModal.style.display = 'none'; applyChange({ entity: 'task', op: 'create', id: response.data.id, payload: response.data }); warnConflicts(response.data.conflicts); })
             .catch(function(error) { console.error('Error creating task:', error); alert('Error: ' + error.response.data.detail); });
     }
 
@@ -308,10 +336,63 @@ document.addEventListener('DOMContentLoaded', function() {
         if (currentEventId === null) return; 
         if (!confirm('Are you sure you want to delete this event?')) return;
         api.delete('/events/' + currentEventId)
-            .then(function() { detailsModal.style.display = 'none'; calendar.refetchEvents(); currentEventId = null; })
+            .then(function() { detailsModal.style.display = 'none'; applyChange({ entity: 'event', op: 'delete', id: Number(currentEventId) }); currentEventId = null; })
             .catch(function(error) { console.error('Error deleting event:', error); alert('Error: ' + error.response.data.detail); });
     }
 
+    // Delete one occurrence of a repeating event (the rest of the series stays)
+    skipOccurrenceButton.onclick = function() {
+        if (currentEventId === null || currentRecurrenceId === null) return;
+        if (!confirm('Delete only this occurrence?')) return;
+        api.post('/events/' + currentEventId + '/exceptions', { original_start: currentRecurrenceId, cancelled: true })
+            .then(function() { detailsModal.style.display = 'none'; calendar.refetchEvents(); currentEventId = null; })
+            .catch(function(error) { console.error('Error deleting occurrence:', error); alert('Error: ' + error.response.data.detail); });
+    }
+
+    // --- 10. LIVE UPDATES ---
+    // The server pushes every change we are allowed to see (/api/stream),
+    // including our own, so the calendar is patched in place instead of
+    // re-reading the whole feed. Our own writes are applied from the HTTP
+    // response straight away; the pushed copy then just replaces them.
+    function removeItems(type, id) {
+        calendar.getEvents().forEach(function(item) {
+            // Every occurrence of a series shares its id
+            if (item.extendedProps.type === type && Number(item.id) === id) item.remove();
+        });
+    }
+
+    function applyChange(change) {
+        // Added to the feed's source, so the next refetch replaces them too
+        var source = calendar.getEventSources()[0];
+        if (change.entity === 'event') {
+            removeItems('event', change.id);
+            if (change.op === 'delete') return;
+            if (change.payload.rrule) {
+                calendar.refetchEvents(); // occurrences are expanded by the server
+                return;
+            }
+            var item = toCalendarEvent(change.payload);
+            if (item) calendar.addEvent(item, source);
+        } else if (change.entity === 'task') {
+            removeItems('task', change.id);
+            var taskItem = toCalendarTask(change.payload);
+            if (taskItem) calendar.addEvent(taskItem, source);
+        } else if (change.entity === 'event_exception') {
+            calendar.refetchEvents(); // one occurrence of a series moved or went away
+        }
+    }
+
+    var changeStream = new EventSource('/api/stream');
+    var streamOpenedBefore = false;
+    changeStream.addEventListener('change', function(e) { applyChange(JSON.parse(e.data)); });
+    // We fell behind and were dropped: start over from the feed
+    changeStream.addEventListener('resync', function() { calendar.refetchEvents(); });
+    changeStream.onopen = function() {
+        // Reconnected after a drop: changes made in between were missed
+        if (streamOpenedBefore) calendar.refetchEvents();
+        streamOpenedBefore = true;
+    };
+
     // Logout Button
     logoutButton.onclick = function() { 
         api.post('/logout')
@@ -0,0 +1,100 @@
+# tests/conftest.py
+
+"""
+Shared setup. The engines are first built from the environment when
+core.database is imported, so it points at a throwaway database before any
+test imports the app.
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp_dir = tempfile.mkdtemp(prefix="karya-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir}/app.db"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ["PASSWORD_POOL_WORKERS"] = "0"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["RESPONSE_CACHE_BACKEND"] = "memory"
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def _migrated():
+    from core import database, migrations
+
+    migrations.upgrade(database.engine)
+    yield database
+    database.engine.dispose()
+
+
+@pytest.fixture
+def db(_migrated):
+    with _migrated.SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def company(db):
+    """A new company (with an owner) for this test."""
+    from core import models
+
+    count = db.query(models.Company).count()
+    company = models.Company(name="Acme", company_code=f"TEST{count + 1}")
+    db.add(company)
+    db.flush()
+    db.add(models.User(email=f"owner{company.id}@acme.test", hashed_password="x",
+                       role="owner", company_id=company.id))
+    db.commit()
+    return company
+
+
+@pytest.fixture
+def owner(db, company):
+    """The company's owner, as the services see a logged-in user."""
+    from core import models, principals
+
+    user = db.query(models.User).filter(models.User.company_id == company.id, models.User.role == "owner").one()
+    return principals.Principal.from_user(user)
+
+
+@pytest.fixture
+def make_employee(db, company):
+    """Adds an employee to the company; returns their Principal."""
+    from core import models, principals
+
+    def make(email_name: str = "employee"):
+        user = models.User(email=f"{email_name}{company.id}@acme.test", hashed_password="x",
+                           role="employee", company_id=company.id)
+        db.add(user)
+        db.commit()
+        return principals.Principal.from_user(user)
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def app(_migrated):
+    from Calendar_app.main import create_app
+
+    return create_app()
+
+
+@pytest.fixture
+def client_for(app):
+    """client_for(principal): a test client logged in as that user."""
+    from fastapi.testclient import TestClient
+    from core import auth
+
+    def make(user):
+        client = TestClient(app)
+        client.cookies.set("access_token", auth.create_access_token(
+            {"sub": user.email, "id": user.id, "role": user.role}
+        ))
+        return client
+
+    return make
@@ -0,0 +1,62 @@
+# tests/test_app_factory.py
+
+"""
+create_app() builds the engines, caches and password pool from its own
+settings. Each case runs in a fresh interpreter so the apps it makes don't
+replace the engines the other tests share.
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(tmp_path, code, **env):
+    script = textwrap.dedent("""
+        from core.config import Settings
+        from Calendar_app.main import create_app
+        from core import auth, database, response_cache
+    """) + textwrap.dedent(code)
+    environ = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path}/app.db", **env}
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=environ,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+
+
+def test_second_app_gets_its_own_engines_and_caches(tmp_path):
+    _run(tmp_path, """
+        create_app()
+        dev_engine = database.engine
+        assert database.read_engine is dev_engine
+        assert response_cache.cache.backend is not None
+
+        create_app(Settings(DB_PROFILE="production", BCRYPT_ROUNDS=5, RESPONSE_CACHE_BACKEND="off"))
+        assert database.engine is not dev_engine
+        assert database.read_engine is not database.engine
+        assert database.read_engine.url.query["mode"] == "ro"
+        assert database.ReadSessionLocal.kw["bind"] is database.read_engine
+        assert response_cache.cache.backend is None
+        assert auth.hash_password("pw").startswith("$2b$05$")
+
+        # Same settings again: the engines stay
+        engine = database.engine
+        create_app(Settings(DB_PROFILE="production", BCRYPT_ROUNDS=5, RESPONSE_CACHE_BACKEND="off"))
+        assert database.engine is engine
+    """)
+
+
+def test_password_workers_use_the_apps_rounds(tmp_path):
+    # The workers' own environment says 4; the app says 5
+    _run(tmp_path, """
+        import asyncio
+
+        create_app(Settings(PASSWORD_POOL_WORKERS=1, BCRYPT_ROUNDS=5))
+        try:
+            hashed = asyncio.run(auth.hash_password_async("pw"))
+        finally:
+            auth.shutdown_password_pool()
+        assert hashed.startswith("$2b$05$"), hashed
+    """, BCRYPT_ROUNDS="4")
@@ -0,0 +1,50 @@
+# tests/test_etags.py
+
+DASHBOARD = "/api/finance/dashboard"
+EXPENSE = {"amount": 4.5, "type": "expense", "category": "Food", "date": "2025-03-01T12:00:00"}
+
+
+def test_matching_etag_is_a_304_without_a_body(owner, client_for):
+    client = client_for(owner)
+    first = client.get(DASHBOARD)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"finance-')
+
+    again = client.get(DASHBOARD, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+    # The strong form of the same tag matches too (weak comparison)
+    assert client.get(DASHBOARD, headers={"If-None-Match": etag.removeprefix("W/")}).status_code == 304
+
+
+def test_a_write_changes_the_etag(owner, client_for):
+    client = client_for(owner)
+    etag = client.get(DASHBOARD).headers["etag"]
+
+    assert client.post("/api/finance/transactions", json=EXPENSE).status_code == 200
+
+    after = client.get(DASHBOARD, headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["etag"] != etag
+    assert after.json()["total_expense"] == 4.5
+
+
+def test_a_write_elsewhere_keeps_the_etag(owner, client_for):
+    client = client_for(owner)
+    etag = client.get(DASHBOARD).headers["etag"]
+
+    created = client.post("/calendar/general/events", json={
+        "title": "Standup", "start_time": "2025-03-03T09:00:00", "end_time": "2025-03-03T09:15:00",
+    })
+    assert created.status_code == 200, created.text
+    assert client.get(DASHBOARD, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_users_and_queries_get_their_own_etags(owner, make_employee, client_for):
+    employee = make_employee()
+    owner_tag = client_for(owner).get("/api/finance/transactions").headers["etag"]
+    employee_tag = client_for(employee).get("/api/finance/transactions").headers["etag"]
+    filtered_tag = client_for(owner).get("/api/finance/transactions?type=income").headers["etag"]
+    assert len({owner_tag, employee_tag, filtered_tag}) == 3
@@ -0,0 +1,222 @@
+# tests/test_finance.py
+
+import io
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from core import schemas
+from core.services import finance as finance_service
+
+
+def _transaction(amount, t_type="expense", category="Food", day=1, notes=None):
+    return schemas.TransactionCreate(amount=amount, type=t_type, category=category,
+                                     date=datetime(2025, 3, day, 12, 0), notes=notes)
+
+
+# --- 1. ROLLUPS ---
+
+def test_rollup_follows_single_creates(db, owner):
+    finance_service.create_transaction(_transaction(12.5), owner, db)
+    finance_service.create_transaction(_transaction(0.1), owner, db)
+    finance_service.create_transaction(_transaction(0.2), owner, db)
+    finance_service.create_transaction(_transaction(1000, "income", "Salary", day=2), owner, db)
+
+    assert finance_service.check_rollups(db, owner.company_id) == []
+    stats = finance_service.get_dashboard_stats(owner, db)
+    assert (stats["total_income"], stats["total_expense"]) == (1000.0, 12.8)
+
+
+def test_rollup_follows_bulk_creates(db, owner):
+    rows = [{"amount": 1.15, "type": "expense", "category": "Taxi", "date": f"2025-03-{day:02d}T08:00:00"}
+            for day in (1, 1, 2, 3)]
+    result = finance_service.bulk_create_transactions(rows, owner, db)
+
+    assert result["created"] == 4
+    assert finance_service.check_rollups(db, owner.company_id) == []
+
+
+def test_rebuild_rollups_repairs_a_drifted_rollup(db, owner):
+    from core import models
+
+    finance_service.create_transaction(_transaction(5), owner, db)
+    db.query(models.FinanceDailyRollup).filter(
+        models.FinanceDailyRollup.company_id == owner.company_id
+    ).update({"total_cents": 1})
+    db.commit()
+    assert len(finance_service.check_rollups(db, owner.company_id)) == 1
+
+    finance_service.rebuild_rollups(db, owner.company_id)
+    assert finance_service.check_rollups(db, owner.company_id) == []
+
+
+# --- 2. LEDGER PAGES ---
+
+def _all_pages(user, db, limit, **kw):
+    ids, cursor = [], None
+    while True:
+        page = finance_service.get_transactions_list(user, db, limit=limit, cursor=cursor, **kw)
+        ids += [item.id for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_cursor_pages_have_no_gaps_or_duplicates_on_ties(db, owner):
+    # Many rows with the same date and amount: only the id tells them apart
+    rows = [{"amount": 10, "type": "expense", "category": "Food", "date": "2025-03-05T09:00:00"}] * 23
+    rows += [{"amount": 10, "type": "expense", "category": "Food", "date": "2025-03-04T09:00:00"}] * 5
+    finance_service.bulk_create_transactions(rows, owner, db)
+
+    everything = [t.id for t in finance_service._ledger_query(owner, db)]
+    assert len(everything) == 28
+    for limit in (1, 4, 7, 28, 50):
+        assert _all_pages(owner, db, limit) == everything
+
+
+def test_cursor_pages_as_rows_match_orm_pages(db, owner):
+    finance_service.bulk_create_transactions(
+        [{"amount": 1, "type": "expense", "category": "Food", "date": "2025-03-05T09:00:00"}] * 9, owner, db
+    )
+    first = finance_service.get_transactions_list(owner, db, limit=4, as_rows=True)
+    second = finance_service.get_transactions_list(owner, db, limit=4, cursor=first["next_cursor"], as_rows=True)
+    ids = [item["id"] for item in first["items"] + second["items"]]
+    assert ids == _all_pages(owner, db, 8)[:8]
+
+
+def test_employee_pages_only_hold_their_own_rows(db, owner, make_employee):
+    employee = make_employee()
+    finance_service.create_transaction(_transaction(3), owner, db)
+    finance_service.create_transaction(_transaction(4), employee, db)
+
+    page = finance_service.get_transactions_list(employee, db)
+    assert [item.user_id for item in page["items"]] == [employee.id]
+
+
+def test_bad_cursor_is_a_400(db, owner):
+    with pytest.raises(HTTPException) as error:
+        finance_service.get_transactions_list(owner, db, cursor="not-a-cursor")
+    assert error.value.status_code == 400
+
+
+# --- 3. BULK CREATE ---
+
+def _ledger_size(user, db):
+    return finance_service._ledger_query(user, db).count()
+
+
+def test_bulk_create_skips_and_reports_bad_rows(db, owner):
+    rows = [
+        {"amount": 5, "type": "expense", "category": "Food", "date": "2025-03-01T12:00:00"},
+        {"amount": "lots", "type": "expense", "category": "Food", "date": "2025-03-01T12:00:00"},
+        {"amount": 5, "type": "refund", "category": "Food", "date": "2025-03-01T12:00:00"},
+        {"amount": 7, "type": "income", "category": "Sales", "date": "2025-03-02T12:00:00"},
+    ]
+    result = finance_service.bulk_create_transactions(rows, owner, db)
+
+    assert result["created"] == 2
+    assert [error["row"] for error in result["errors"]] == [2, 3]
+    assert _ledger_size(owner, db) == 2
+    assert finance_service.check_rollups(db, owner.company_id) == []
+
+
+def test_atomic_bulk_create_writes_nothing_on_any_error(db, owner):
+    rows = [{"amount": 5, "type": "expense", "category": "Food", "date": "2025-03-01T12:00:00"}] * 3
+    rows.append({"amount": 5, "type": "expense", "category": "Food", "date": "someday"})
+    result = finance_service.bulk_create_transactions(rows, owner, db, atomic=True)
+
+    assert result["created"] == 0
+    assert [error["row"] for error in result["errors"]] == [4]
+    assert _ledger_size(owner, db) == 0
+
+
+def test_employees_cannot_bulk_add_income(db, make_employee):
+    employee = make_employee()
+    rows = [{"amount": 5, "type": "income", "category": "Sales", "date": "2025-03-01T12:00:00"},
+            {"amount": 5, "type": "expense", "category": "Food", "date": "2025-03-01T12:00:00"}]
+    result = finance_service.bulk_create_transactions(rows, employee, db)
+
+    assert result["created"] == 1
+    assert result["errors"] == [{"row": 1, "errors": ["Only owners can add income"]}]
+
+
+def test_exported_csv_imports_again(db, owner):
+    finance_service.create_transaction(_transaction(12.5, notes="Lunch, with team"), owner, db)
+    exported = "".join(finance_service.export_transactions(owner, db, "csv"))
+
+    result = finance_service.bulk_create_transactions(list(finance_service.parse_transactions_csv(exported)),
+                                                      owner, db)
+    assert result == {"created": 1, "errors": []}
+    assert [t.notes for t in finance_service._ledger_query(owner, db)] == ["Lunch, with team"] * 2
+
+
+# --- 4. STATEMENT IMPORT ---
+
+STATEMENT_CSV = b"""Date,Amount,Description
+01/03/2025,-3.50,Coffee
+01/03/2025,-3.50,Coffee
+02/03/2025,"1,200.00",Salary
+03/03/2025,(20.00),Taxi
+"""
+
+STATEMENT_OFX = b"""OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKACCTFROM><ACCTID>12345</BANKACCTFROM>
+<BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250301120000<TRNAMT>-9.99<FITID>A1<NAME>Books</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250301120000<TRNAMT>-9.99<FITID>A2<NAME>Books</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250302<TRNAMT>50.00<FITID>A3<MEMO>Refund</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+CSV_MAPPING = schemas.StatementMapping(amount="Amount", date="Date", notes="Description",
+                                       type=None, category=None, date_format="%d/%m/%Y")
+
+
+def _import(body, fmt, mapping, user, db):
+    records = finance_service.read_statement(io.BytesIO(body), fmt, mapping)
+    return list(finance_service.import_statement(records, user, db))[-1]
+
+
+@pytest.mark.parametrize("body, fmt, mapping", [
+    (STATEMENT_CSV, "csv", CSV_MAPPING),
+    (STATEMENT_OFX, "ofx", schemas.StatementMapping()),
+])
+def test_importing_the_same_statement_twice_inserts_nothing(db, owner, body, fmt, mapping):
+    first = _import(body, fmt, mapping, owner, db)
+    # Identical lines within one file (the two coffees / two books) are both kept
+    assert (first["created"], first["duplicates"], first["errors"]) == (first["rows"], 0, 0)
+
+    second = _import(body, fmt, mapping, owner, db)
+    assert (second["created"], second["duplicates"]) == (0, first["rows"])
+    assert _ledger_size(owner, db) == first["rows"]
+    assert finance_service.check_rollups(db, owner.company_id) == []
+
+
+def test_statement_with_a_new_line_adds_only_that_line(db, owner):
+    _import(STATEMENT_CSV, "csv", CSV_MAPPING, owner, db)
+    # The next statement overlaps: same lines plus a third coffee
+    again = _import(STATEMENT_CSV + b"01/03/2025,-3.50,Coffee\n", "csv", CSV_MAPPING, owner, db)
+    assert (again["created"], again["duplicates"]) == (1, 4)
+
+
+def test_statement_signs_become_types(db, owner):
+    _import(STATEMENT_CSV, "csv", CSV_MAPPING, owner, db)
+    rows = {(t.notes, t.type, float(t.amount)) for t in finance_service._ledger_query(owner, db)}
+    assert rows == {("Coffee", "expense", 3.5), ("Salary", "income", 1200.0), ("Taxi", "expense", 20.0)}
+
+
+def test_another_company_can_import_the_same_statement(db, owner, company):
+    from core import models, principals
+
+    other_company = models.Company(name="Other", company_code=f"OTHER{company.id}")
+    db.add(other_company)
+    db.flush()
+    other = models.User(email=f"boss{company.id}@other.test", hashed_password="x", role="owner",
+                        company_id=other_company.id)
+    db.add(other)
+    db.commit()
+
+    _import(STATEMENT_OFX, "ofx", schemas.StatementMapping(), owner, db)
+    result = _import(STATEMENT_OFX, "ofx", schemas.StatementMapping(), principals.Principal.from_user(other), db)
+    assert result["created"] == 3
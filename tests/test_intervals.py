@@ -0,0 +1,76 @@
+# tests/test_intervals.py
+
+import random
+from datetime import datetime, timedelta
+
+from core import intervals
+from core.intervals import IntervalIndex
+
+DAY = datetime(2025, 3, 3)
+
+
+def _item(key, start_hour, hours=1):
+    start = DAY + timedelta(hours=start_hour)
+    return (start, start + timedelta(hours=hours), key)
+
+
+def _keys(index, start_hour=0, end_hour=48):
+    return [item[2] for item in index.overlapping(DAY + timedelta(hours=start_hour), DAY + timedelta(hours=end_hour))]
+
+
+def test_overlapping_is_half_open():
+    index = IntervalIndex([_item("a", 9), _item("b", 10), _item("c", 11)])
+    assert _keys(index, 10, 11) == ["b"]
+    assert _keys(index, 9, 11) == ["a", "b"]
+    assert _keys(index, 12, 13) == []
+
+
+def test_long_interval_is_found_from_inside():
+    index = IntervalIndex([_item("trip", 0, hours=40)] + [_item(i, i + 1) for i in range(30)])
+    assert "trip" in _keys(index, 39, 40)
+
+
+def test_remove_then_add_same_key_keeps_only_the_new_item():
+    index = IntervalIndex([_item("a", 9), _item("b", 10)])
+    index.remove("a")
+    index.add(_item("a", 14))
+    assert len(index) == 2
+    assert _keys(index) == ["b", "a"]
+    assert _keys(index, 9, 10) == []
+
+
+def test_add_existing_key_replaces_it():
+    index = IntervalIndex([_item("a", 9)])
+    index.add(_item("a", 12))
+    index.add(_item("a", 15))
+    assert len(index) == 1
+    assert [item[0].hour for item in index.overlapping(DAY, DAY + timedelta(days=1))] == [15]
+
+
+def test_remove_unknown_key_is_a_no_op():
+    index = IntervalIndex([_item("a", 9)])
+    index.remove("nope")
+    assert len(index) == 1
+
+
+def test_matches_a_linear_scan_across_rebuilds(monkeypatch):
+    monkeypatch.setattr(intervals, "REBUILD_MIN", 4)
+    rng = random.Random(7)
+    live = {key: _item(key, rng.randrange(40), rng.randrange(1, 6)) for key in range(50)}
+    index = IntervalIndex(live.values())
+
+    for _ in range(500):
+        key = rng.randrange(70)
+        if rng.random() < 0.4:
+            index.remove(key)
+            live.pop(key, None)
+        else:
+            live[key] = _item(key, rng.randrange(40), rng.randrange(1, 6))
+            index.add(live[key])
+
+        assert len(index) == len(live)
+        lo = rng.randrange(45)
+        hi = lo + rng.randrange(1, 8)
+        expected = {item for item in live.values()
+                    if item[0] < DAY + timedelta(hours=hi) and item[1] > DAY + timedelta(hours=lo)}
+        assert set(index.overlapping(DAY + timedelta(hours=lo), DAY + timedelta(hours=hi))) == expected
@@ -0,0 +1,106 @@
+# tests/test_migrations.py
+
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from core import migrations, models
+
+# app.db as the app shipped it, before there were migrations, with some data
+BASELINE_APP_DB = """
+CREATE TABLE companies (id INTEGER NOT NULL, name VARCHAR NOT NULL, company_code VARCHAR NOT NULL, PRIMARY KEY (id));
+CREATE UNIQUE INDEX ix_companies_company_code ON companies (company_code);
+CREATE INDEX ix_companies_id ON companies (id);
+CREATE TABLE users (id INTEGER NOT NULL, email VARCHAR NOT NULL, hashed_password VARCHAR NOT NULL, role VARCHAR NOT NULL, company_id INTEGER, PRIMARY KEY (id), FOREIGN KEY(company_id) REFERENCES companies (id));
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+CREATE INDEX ix_users_id ON users (id);
+CREATE TABLE tasks (id INTEGER NOT NULL, title VARCHAR NOT NULL, status VARCHAR(7) NOT NULL, due_date DATETIME NOT NULL, owner_id INTEGER, assignee_id INTEGER, company_id INTEGER, PRIMARY KEY (id), FOREIGN KEY(owner_id) REFERENCES users (id), FOREIGN KEY(assignee_id) REFERENCES users (id), FOREIGN KEY(company_id) REFERENCES companies (id));
+CREATE INDEX ix_tasks_id ON tasks (id);
+CREATE TABLE events (id INTEGER NOT NULL, title VARCHAR, start_time DATETIME, end_time DATETIME, place VARCHAR, notes VARCHAR, calendar_type VARCHAR, company_id INTEGER, owner_id INTEGER, PRIMARY KEY (id), FOREIGN KEY(company_id) REFERENCES companies (id), FOREIGN KEY(owner_id) REFERENCES users (id));
+CREATE INDEX ix_events_id ON events (id);
+CREATE TABLE transactions (id INTEGER NOT NULL, amount NUMERIC(10, 2) NOT NULL, type VARCHAR NOT NULL, category VARCHAR NOT NULL, date DATETIME NOT NULL, notes VARCHAR, company_id INTEGER, user_id INTEGER, PRIMARY KEY (id), FOREIGN KEY(company_id) REFERENCES companies (id), FOREIGN KEY(user_id) REFERENCES users (id));
+CREATE INDEX ix_transactions_id ON transactions (id);
+CREATE TABLE notebooks (id INTEGER NOT NULL, name VARCHAR NOT NULL, cover VARCHAR, company_id INTEGER, owner_id INTEGER, PRIMARY KEY (id), FOREIGN KEY(company_id) REFERENCES companies (id), FOREIGN KEY(owner_id) REFERENCES users (id));
+CREATE INDEX ix_notebooks_id ON notebooks (id);
+CREATE TABLE notes (id INTEGER NOT NULL, title VARCHAR, type VARCHAR, content VARCHAR, color VARCHAR, created_at DATETIME, updated_at DATETIME, notebook_id INTEGER, PRIMARY KEY (id), FOREIGN KEY(notebook_id) REFERENCES notebooks (id));
+CREATE INDEX ix_notes_id ON notes (id);
+
+INSERT INTO companies VALUES (1, 'Acme', 'ACME');
+INSERT INTO users VALUES (1, 'owner@acme.test', 'x', 'owner', 1);
+INSERT INTO tasks VALUES (1, 'File the report', 'pending', '2025-03-01 09:00:00', 1, 1, 1);
+INSERT INTO events VALUES (1, 'Standup', '2025-03-03 09:00:00', '2025-03-03 09:15:00', NULL, NULL, 'general', 1, 1);
+INSERT INTO transactions VALUES (1, 12.50, 'expense', 'Food', '2025-03-02 12:00:00', 'Lunch', 1, 1);
+INSERT INTO notebooks VALUES (1, 'Plans', NULL, 1, 1);
+INSERT INTO notes VALUES (1, 'Groceries', 'checklist', '[{"text": "milk", "done": true}, {"text": "eggs"}]',
+                          NULL, '2025-03-01 08:00:00', '2025-03-01 08:00:00', 1);
+"""
+
+
+def _engine(path):
+    return create_engine(f"sqlite:///{path}")
+
+
+def _schema(engine):
+    """table -> (column names, index names) for the app's tables."""
+    inspector = inspect(engine)
+    return {
+        table: (
+            {column["name"] for column in inspector.get_columns(table)},
+            {index["name"] for index in inspector.get_indexes(table)},
+        )
+        for table in models.Base.metadata.tables
+    }
+
+
+@pytest.fixture
+def baseline_engine(tmp_path):
+    path = tmp_path / "baseline.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(BASELINE_APP_DB)
+    engine = _engine(path)
+    yield engine
+    engine.dispose()
+
+
+def test_upgrade_from_baseline_applies_every_step(baseline_engine):
+    assert migrations.upgrade(baseline_engine) == [version for version, _, _ in migrations.MIGRATIONS]
+    assert migrations.pending_migrations(baseline_engine) == []
+    assert migrations.upgrade(baseline_engine) == []
+
+
+def test_upgrade_from_baseline_reaches_the_models(baseline_engine):
+    migrations.upgrade(baseline_engine)
+
+    expected = {
+        table.name: ({column.name for column in table.columns}, {index.name for index in table.indexes})
+        for table in models.Base.metadata.tables.values()
+    }
+    for table, (columns, indexes) in _schema(baseline_engine).items():
+        assert columns == expected[table][0], table
+        assert expected[table][1] <= indexes, table
+
+
+def test_upgrade_from_baseline_matches_a_fresh_database(baseline_engine, tmp_path):
+    fresh = _engine(tmp_path / "fresh.db")
+    migrations.upgrade(fresh)
+    migrations.upgrade(baseline_engine)
+    assert _schema(baseline_engine) == _schema(fresh)
+    fresh.dispose()
+
+
+def test_upgrade_from_baseline_keeps_and_converts_data(baseline_engine):
+    migrations.upgrade(baseline_engine)
+
+    with baseline_engine.connect() as conn:
+        items = conn.execute(text(
+            "SELECT text, done FROM checklist_items WHERE note_id = 1 ORDER BY position"
+        )).all()
+        assert [(row.text, bool(row.done)) for row in items] == [("milk", True), ("eggs", False)]
+
+        assert conn.execute(text("SELECT total_cents FROM finance_daily_rollups")).scalar() == 1250
+        assert conn.execute(text("SELECT rrule FROM events WHERE id = 1")).scalar() is None
+        assert conn.execute(text(
+            "SELECT count(*) FROM search_index WHERE search_index MATCH 'standup'"
+        )).scalar() == 1
+        assert conn.execute(text("SELECT count(*) FROM change_log WHERE company_id = 1")).scalar() > 0
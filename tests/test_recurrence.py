@@ -0,0 +1,85 @@
+# tests/test_recurrence.py
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from core import recurrence
+
+HOUR = timedelta(hours=1)
+WED = datetime(2025, 1, 1, 9, 0)  # a Wednesday
+
+
+def _all(rrule, dtstart, until=datetime(2030, 1, 1)):
+    return recurrence.expand(rrule, dtstart, HOUR, dtstart, until)
+
+
+@pytest.mark.parametrize("rrule, expected", [
+    ("FREQ=DAILY;INTERVAL=3;COUNT=4", ["2025-01-01", "2025-01-04", "2025-01-07", "2025-01-10"]),
+    # DTSTART's week only has its days from Wednesday on
+    ("FREQ=WEEKLY;BYDAY=MO,WE,FR;COUNT=5", ["2025-01-01", "2025-01-03", "2025-01-06", "2025-01-08", "2025-01-10"]),
+    ("FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;COUNT=4", ["2025-01-02", "2025-01-13", "2025-01-16", "2025-01-27"]),
+    # Months without a 31st are skipped, and don't count
+    ("FREQ=MONTHLY;BYMONTHDAY=31;COUNT=3", ["2025-01-31", "2025-03-31", "2025-05-31"]),
+    ("FREQ=YEARLY;COUNT=2", ["2025-01-01", "2026-01-01"]),
+])
+def test_count_numbers_occurrences_from_dtstart(rrule, expected):
+    dtstart = WED.replace(day=31) if "BYMONTHDAY=31" in rrule else WED
+    assert [start.date().isoformat() for start in _all(rrule, dtstart)] == expected
+
+
+@pytest.mark.parametrize("rrule", [
+    "FREQ=DAILY;COUNT=40",
+    "FREQ=DAILY;INTERVAL=4;COUNT=25",
+    "FREQ=WEEKLY;BYDAY=MO,WE,FR;COUNT=31",
+    "FREQ=WEEKLY;INTERVAL=3;BYDAY=TU,SU;COUNT=17",
+    "FREQ=WEEKLY;BYDAY=TU,TH;UNTIL=20250320",
+    "FREQ=MONTHLY;BYMONTHDAY=1,15;COUNT=9",
+])
+def test_a_late_window_agrees_with_expanding_from_the_start(rrule):
+    # DAILY/WEEKLY skip ahead to the window: the numbering (so COUNT) must
+    # come out the same as walking every occurrence from DTSTART
+    everything = _all(rrule, WED)
+    for offset in range(0, 120, 5):
+        window_start = WED + timedelta(days=offset)
+        window_end = window_start + timedelta(days=9)
+        expected = tuple(start for start in everything if window_start - HOUR < start < window_end)
+        assert recurrence.expand(rrule, WED, HOUR, window_start, window_end) == expected, offset
+
+
+def test_until_date_includes_that_whole_day():
+    starts = _all("FREQ=DAILY;UNTIL=20250103", WED)
+    assert [start.day for start in starts] == [1, 2, 3]
+    assert recurrence.last_start("FREQ=DAILY;UNTIL=20250103", WED) == datetime(2025, 1, 3, 9, 0)
+
+
+def test_until_with_time_is_the_last_possible_start():
+    assert [start.day for start in _all("FREQ=DAILY;UNTIL=20250103T085959", WED)] == [1, 2]
+
+
+@pytest.mark.parametrize("rrule", [
+    "FREQ=DAILY;INTERVAL=2;COUNT=7",
+    "FREQ=WEEKLY;BYDAY=MO,FR;COUNT=9",
+    "FREQ=WEEKLY;BYDAY=SU;UNTIL=20250601",
+    "FREQ=MONTHLY;COUNT=14",
+])
+def test_last_start_is_the_last_expanded_occurrence(rrule):
+    assert recurrence.last_start(rrule, WED) == _all(rrule, WED)[-1]
+
+
+def test_never_ending_series_has_no_last_start():
+    assert recurrence.last_start("FREQ=WEEKLY", WED) is None
+
+
+def test_until_before_dtstart_has_no_occurrences():
+    with pytest.raises(ValueError):
+        recurrence.last_start("FREQ=DAILY;UNTIL=20241231", WED)
+
+
+@pytest.mark.parametrize("rrule", [
+    "FREQ=HOURLY", "FREQ=DAILY;COUNT=0", "FREQ=DAILY;COUNT=2;UNTIL=20250301",
+    "FREQ=DAILY;BYDAY=MO", "FREQ=WEEKLY;BYSETPOS=1",
+])
+def test_unsupported_rules_are_rejected(rrule):
+    with pytest.raises(ValueError):
+        recurrence.parse(rrule)
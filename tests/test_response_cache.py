@@ -0,0 +1,82 @@
+# tests/test_response_cache.py
+
+import logging
+
+import pytest
+
+from core import models, response_cache, schemas
+from core.services import notebooks as notebook_service
+from core.services import versions
+
+cache = response_cache.cache
+
+
+def _cached(company_id, resource):
+    key = cache.make_key(company_id, resource, 1, "owner", None, f"/test/{resource}", "")
+    cache.set(key, b"{}", company_id, resource)
+    return key
+
+
+def test_commit_invalidates_the_bumped_resource_only(db, company):
+    finance, calendar = _cached(company.id, versions.FINANCE), _cached(company.id, versions.CALENDAR)
+    other = _cached(company.id + 1000, versions.FINANCE)
+
+    versions.bump(db, company.id, versions.FINANCE)
+    assert cache.get(finance) is not None  # not yet: the write isn't visible
+    db.commit()
+
+    assert cache.get(finance) is None
+    assert cache.get(calendar) is not None
+    assert cache.get(other) is not None
+    assert versions.get_version(db, company.id, versions.FINANCE) == 1
+
+
+def test_rollback_keeps_the_cache_and_the_version(db, company):
+    finance = _cached(company.id, versions.FINANCE)
+
+    versions.bump(db, company.id, versions.FINANCE)
+    db.rollback()
+    assert cache.get(finance) is not None
+    assert versions.get_version(db, company.id, versions.FINANCE) == 0
+
+    # ...and the rolled-back bump isn't replayed by the next commit
+    db.commit()
+    assert cache.get(finance) is not None
+
+
+def test_service_write_invalidates_after_its_commit(db, company):
+    notebooks = _cached(company.id, versions.NOTEBOOKS)
+    owner = db.query(models.User).filter(models.User.company_id == company.id).one()
+    notebook_service.create_new_notebook(schemas.NotebookCreate(name="Plans"), owner, db)
+    assert cache.get(notebooks) is None
+
+
+def test_failing_hook_is_logged_not_raised(db, company, monkeypatch, caplog):
+    def broken(company_id, resource):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(versions, "_commit_hooks", [broken, cache.invalidate])
+    finance = _cached(company.id, versions.FINANCE)
+
+    versions.bump(db, company.id, versions.FINANCE)
+    with caplog.at_level(logging.ERROR, logger=versions.__name__):
+        db.commit()
+
+    assert "after-commit hook" in caplog.text
+    assert cache.get(finance) is None  # the hooks after it still ran
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_backends_invalidate_by_company_and_resource(backend, tmp_path):
+    if backend == "memory":
+        store = response_cache.MemoryBackend(max_entries=100, max_bytes=1 << 20, ttl_seconds=60)
+    else:
+        store = response_cache.SQLiteBackend(str(tmp_path / "cache.db"), max_entries=100, ttl_seconds=60)
+
+    store.set("a", b"1", 1, "finance")
+    store.set("b", b"2", 1, "finance")
+    store.set("c", b"3", 1, "calendar")
+    store.set("d", b"4", 2, "finance")
+
+    assert store.invalidate(1, "finance") == 2
+    assert [store.get(key) for key in "abcd"] == [None, None, b"3", b"4"]
@@ -0,0 +1,139 @@
+# tests/test_search.py
+
+from datetime import datetime
+
+import pytest
+
+from core import models, principals
+from core.services import search as search_service
+
+DAY = datetime(2025, 3, 3, 9, 0)
+
+
+def _found(user, db, query, **kw):
+    return {(hit["kind"], hit["id"]) for hit in search_service.search(query, user, db, **kw)}
+
+
+def _add(db, obj):
+    db.add(obj)
+    db.commit()
+    return obj
+
+
+@pytest.fixture
+def other_owner(db, company):
+    """The owner of a second company."""
+    other = _add(db, models.Company(name="Rival", company_code=f"RIVAL{company.id}"))
+    user = _add(db, models.User(email=f"boss{company.id}@rival.test", hashed_password="x",
+                                role="owner", company_id=other.id))
+    return principals.Principal.from_user(user)
+
+
+def _documents(db, owner, employee, word):
+    """One of everything the index holds, all containing `word`."""
+    notebook = _add(db, models.Notebook(name="Plans", company_id=owner.company_id, owner_id=owner.id))
+    return {
+        "note": _add(db, models.Note(title=f"{word} note", type="text", content="", notebook_id=notebook.id)),
+        "general": _add(db, models.Event(title=f"{word} meeting", start_time=DAY, end_time=DAY,
+                                         calendar_type="general", company_id=owner.company_id, owner_id=owner.id)),
+        "personal": _add(db, models.Event(title=f"{word} dentist", start_time=DAY, end_time=DAY,
+                                          calendar_type="personal", company_id=owner.company_id,
+                                          owner_id=employee.id)),
+        "task": _add(db, models.Task(title=f"{word} report", status="to_do", due_date=DAY,
+                                     owner_id=owner.id, assignee_id=employee.id, company_id=owner.company_id)),
+        "transaction": _add(db, models.Transaction(amount=5, type="expense", category=word, date=DAY,
+                                                   company_id=owner.company_id, user_id=employee.id)),
+    }
+
+
+def _keys(documents, *names):
+    kinds = {"general": "event", "personal": "event"}
+    return {(kinds.get(name, name), documents[name].id) for name in names}
+
+
+# --- 1. WHO SEES WHAT ---
+
+def test_other_companies_never_match(db, owner, make_employee, other_owner):
+    ours = _documents(db, owner, make_employee(), "zeppelin")
+    rival_employee = principals.Principal.from_user(_add(db, models.User(
+        email=f"staff{other_owner.company_id}@rival.test", hashed_password="x", role="employee",
+        company_id=other_owner.company_id)))
+    theirs = _documents(db, other_owner, rival_employee, "zeppelin")
+
+    assert _found(owner, db, "zeppelin") == _keys(ours, "note", "general", "task", "transaction")
+    assert _found(other_owner, db, "zeppelin") == _keys(theirs, "note", "general", "task", "transaction")
+    assert _found(rival_employee, db, "zeppelin") == _keys(theirs, *theirs)
+
+
+def test_employees_see_the_company_and_their_own_rows(db, owner, make_employee):
+    employee, colleague = make_employee("alice"), make_employee("bob")
+    documents = _documents(db, owner, employee, "walrus")
+
+    # Everything is the employee's: assigned task, own expense, own personal event
+    assert _found(employee, db, "walrus") == _keys(documents, *documents)
+    # A colleague only sees what the whole company sees
+    assert _found(colleague, db, "walrus") == _keys(documents, "note", "general")
+    # The owner sees the company's tasks and ledger, but not personal calendars
+    assert _found(owner, db, "walrus") == _keys(documents, "note", "general", "task", "transaction")
+
+
+def test_kind_filter_stays_within_visibility(db, owner, make_employee):
+    employee = make_employee()
+    documents = _documents(db, owner, employee, "otter")
+    assert _found(make_employee("carol"), db, "otter", kinds=["event"]) == _keys(documents, "general")
+    assert _found(employee, db, "otter", kinds=["event", "task"]) == _keys(documents, "general", "personal", "task")
+
+
+def test_acl_words_in_the_query_match_nothing_extra(db, owner, make_employee, other_owner):
+    _documents(db, owner, make_employee(), "heron")
+    # The tokens live in the acl column; a query only searches title/body
+    assert _found(other_owner, db, f"c{owner.company_id}") == set()
+    assert _found(other_owner, db, "heron OR acl") == set()
+
+
+# --- 2. THE TRIGGERS KEEP IT IN STEP ---
+
+def test_updates_reindex_the_row(db, owner, make_employee):
+    employee, colleague = make_employee("dave"), make_employee("erin")
+    documents = _documents(db, owner, employee, "badger")
+
+    documents["note"].title = "ferret note"
+    documents["general"].calendar_type = "personal"  # now only its owner's
+    documents["task"].assignee_id = colleague.id
+    db.commit()
+
+    assert ("note", documents["note"].id) not in _found(owner, db, "badger")
+    assert _found(owner, db, "ferret") == _keys(documents, "note")
+    assert _found(colleague, db, "badger") == _keys(documents, "task")
+    assert _keys(documents, "general", "task").isdisjoint(_found(employee, db, "badger"))
+
+
+def test_deletes_drop_the_row(db, owner, make_employee):
+    documents = _documents(db, owner, make_employee(), "marmot")
+    for name in ("note", "task", "transaction"):
+        db.delete(documents[name])
+    db.commit()
+    assert _found(owner, db, "marmot") == _keys(documents, "general")
+
+
+def test_checklist_items_are_part_of_their_note(db, owner, make_employee):
+    documents = _documents(db, owner, make_employee(), "lemur")
+    note = documents["note"]
+    item = _add(db, models.ChecklistItem(note_id=note.id, position=0, text="buy quokka food", done=False))
+    assert _found(owner, db, "quokka") == _keys(documents, "note")
+
+    item.text = "buy wombat food"
+    db.commit()
+    assert _found(owner, db, "quokka") == set()
+    assert _found(owner, db, "wombat") == _keys(documents, "note")
+
+    db.delete(item)
+    db.commit()
+    assert _found(owner, db, "wombat") == set()
+
+
+def test_rebuild_matches_what_the_triggers_built(db, owner, make_employee):
+    _documents(db, owner, make_employee(), "gecko")
+    before = _found(owner, db, "gecko")
+    search_service.rebuild_search_index(db)
+    assert _found(owner, db, "gecko") == before
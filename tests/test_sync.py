@@ -0,0 +1,97 @@
+# tests/test_sync.py
+
+from datetime import datetime
+
+from core import schemas
+from core.services import events as event_service
+from core.services import finance as finance_service
+from core.services import notebooks as notebook_service
+from core.services import sync as sync_service
+
+DAY = datetime(2025, 3, 3, 9, 0)
+
+
+def _event(user, db, title, calendar_type="general"):
+    return event_service.create_new_event(schemas.EventCreate(
+        title=title, start_time=DAY, end_time=DAY.replace(hour=10), calendar_type=calendar_type
+    ), user, db)
+
+
+def _sync(user, db, since=0, limit=sync_service.SYNC_PAGE_DEFAULT):
+    return sync_service.get_changes_since(since, user, db, limit=limit)
+
+
+def _ops(page):
+    return [(change["entity"], change["id"], change["op"]) for change in page["changes"]]
+
+
+def test_a_deleted_row_comes_back_as_a_tombstone(db, owner):
+    kept, deleted = _event(owner, db, "Standup"), _event(owner, db, "Retro")
+    cursor = _sync(owner, db)["cursor"]
+
+    event_service.delete_event_by_id(deleted.id, owner, db)
+    page = _sync(owner, db, cursor)
+    assert page["changes"] == [
+        {"seq": page["cursor"], "entity": "event", "id": deleted.id, "op": "delete", "data": None}
+    ]
+    # From the start, the deleted row is a tombstone and the other one current
+    assert _ops(_sync(owner, db)) == [("event", kept.id, "upsert"), ("event", deleted.id, "delete")]
+
+
+def test_rows_deleted_by_a_cascade_are_tombstones_too(db, owner):
+    notebook = notebook_service.create_new_notebook(schemas.NotebookCreate(name="Plans"), owner, db)
+    note = notebook_service.create_note_in_notebook(
+        notebook.id, schemas.NoteCreate(title="Ideas", type="text", content="x"), owner, db
+    )
+    notebook_service.delete_note_by_id(note.id, owner, db)
+    assert ("note", note.id, "delete") in _ops(_sync(owner, db))
+
+
+def test_the_cursor_only_returns_later_changes(db, owner):
+    first = _event(owner, db, "Standup")
+    page = _sync(owner, db)
+    assert _ops(page) == [("event", first.id, "upsert")]
+
+    assert _sync(owner, db, page["cursor"]) == {"changes": [], "cursor": page["cursor"], "has_more": False}
+
+    second = _event(owner, db, "Retro")
+    later = _sync(owner, db, page["cursor"])
+    assert _ops(later) == [("event", second.id, "upsert")]
+    assert later["changes"][0]["data"]["title"] == "Retro"
+    assert later["cursor"] > page["cursor"]
+
+
+def test_small_pages_add_up_to_one_big_page(db, owner):
+    for i in range(7):
+        _event(owner, db, f"Event {i}")
+    finance_service.create_transaction(schemas.TransactionCreate(
+        amount=3, type="expense", category="Food", date=DAY
+    ), owner, db)
+
+    everything = _ops(_sync(owner, db))
+    paged, cursor = [], 0
+    while True:
+        page = _sync(owner, db, cursor, limit=3)
+        paged += _ops(page)
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            break
+    assert paged == everything
+    assert len(everything) == 8
+
+
+def test_a_row_changed_twice_is_sent_once_at_its_latest(db, owner):
+    event = _event(owner, db, "Standup")
+    _event(owner, db, "Retro")
+    event_service.delete_event_by_id(event.id, owner, db)
+    assert [op for entity, id_, op in _ops(_sync(owner, db)) if id_ == event.id] == ["delete"]
+
+
+def test_invisible_changes_are_skipped_but_move_the_cursor(db, owner, make_employee):
+    employee = make_employee()
+    private = _event(employee, db, "Dentist", calendar_type="personal")
+
+    page = _sync(owner, db)
+    assert ("event", private.id, "upsert") not in _ops(page)
+    assert page["cursor"] > 0
+    assert _ops(_sync(employee, db)) == [("event", private.id, "upsert")]